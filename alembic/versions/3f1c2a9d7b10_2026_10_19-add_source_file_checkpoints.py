@@ -0,0 +1,40 @@
+"""add source file checkpoints
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'mon_source_file_checkpoints',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('source_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('file_path', sa.Text(), nullable=False),
+        sa.Column('inode', sa.BigInteger(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('byte_offset', sa.BigInteger(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['source_id'], ['mon_sources.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_id', 'file_path', name='uq_source_file_checkpoint'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('mon_source_file_checkpoints')
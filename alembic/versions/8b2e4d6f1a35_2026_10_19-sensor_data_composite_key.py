@@ -0,0 +1,50 @@
+"""sensor data composite key and ingest idempotency keys
+
+Revision ID: 8b2e4d6f1a35
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-19 14:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a35'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the most recently written copy of every (sensor_field_id, timestamp);
+    # duplicates share a timestamp and therefore live in the same partition
+    op.execute("""
+        DELETE FROM mon_sensor_data a
+        USING mon_sensor_data b
+        WHERE a.sensor_field_id = b.sensor_field_id
+          AND a.timestamp = b.timestamp
+          AND (a.last_updated, a.ctid) < (b.last_updated, b.ctid)
+    """)
+    op.execute("ALTER TABLE mon_sensor_data DROP CONSTRAINT IF EXISTS mon_sensor_data_pkey")
+    # includes the partition key, so it is valid on the partitioned parent and cascades to partitions
+    op.create_primary_key('mon_sensor_data_pkey', 'mon_sensor_data', ['sensor_field_id', 'timestamp'])
+
+    op.create_table(
+        'mon_ingest_idempotency_keys',
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_mon_ingest_idempotency_keys_created_at', 'mon_ingest_idempotency_keys', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mon_ingest_idempotency_keys_created_at', table_name='mon_ingest_idempotency_keys')
+    op.drop_table('mon_ingest_idempotency_keys')
+    op.drop_constraint('mon_sensor_data_pkey', 'mon_sensor_data', type_='primary')
+    op.create_primary_key('mon_sensor_data_pkey', 'mon_sensor_data', ['timestamp'])
@@ -0,0 +1,44 @@
+"""per field baselines
+
+Revision ID: a6d4e2f81c57
+Revises: f3c8a1e6d702
+Create Date: 2026-10-19 20:12:44.903115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e2f81c57'
+down_revision: Union[str, None] = 'f3c8a1e6d702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mon_sensor_baselines', sa.Column('sensor_field_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('mon_sensor_baselines', sa.Column('method', sa.Text(), server_default=sa.text("'manual'"), nullable=False))
+    op.add_column('mon_sensor_baselines', sa.Column('window_start', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('mon_sensor_baselines', sa.Column('window_end', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('mon_sensor_baselines', sa.Column('sample_count', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_mon_sensor_baselines_sensor_field_id', 'mon_sensor_baselines', 'mon_sensor_fields',
+        ['sensor_field_id'], ['id'], ondelete='CASCADE',
+    )
+    op.create_index('ix_mon_sensor_baselines_field_recorded_at', 'mon_sensor_baselines', ['sensor_field_id', 'recorded_at'])
+    op.create_index('ix_mon_sensor_baselines_sensor_id', 'mon_sensor_baselines', ['sensor_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mon_sensor_baselines_sensor_id', table_name='mon_sensor_baselines')
+    op.drop_index('ix_mon_sensor_baselines_field_recorded_at', table_name='mon_sensor_baselines')
+    op.drop_constraint('fk_mon_sensor_baselines_sensor_field_id', 'mon_sensor_baselines', type_='foreignkey')
+    op.drop_column('mon_sensor_baselines', 'sample_count')
+    op.drop_column('mon_sensor_baselines', 'window_end')
+    op.drop_column('mon_sensor_baselines', 'window_start')
+    op.drop_column('mon_sensor_baselines', 'method')
+    op.drop_column('mon_sensor_baselines', 'sensor_field_id')
@@ -0,0 +1,26 @@
+"""checkpoint tail anchor
+
+Revision ID: a7d3e9c5f182
+Revises: e4a6c2d8b391
+Create Date: 2026-10-20 09:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c5f182'
+down_revision: Union[str, None] = 'e4a6c2d8b391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mon_source_file_checkpoints', sa.Column('tail_anchor', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('mon_source_file_checkpoints', 'tail_anchor')
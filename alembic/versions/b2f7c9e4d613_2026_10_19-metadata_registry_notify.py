@@ -0,0 +1,54 @@
+"""metadata registry notify
+
+Revision ID: b2f7c9e4d613
+Revises: a6d4e2f81c57
+Create Date: 2026-10-19 21:03:27.615240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f7c9e4d613'
+down_revision: Union[str, None] = 'a6d4e2f81c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the tables app.metadata_registry keeps in memory
+TABLES = ('projects', 'mon_loc', 'mon_sources', 'mon_sensors', 'mon_sensor_fields', 'mon_loc_groups')
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE metadata_version")
+    # payloads are "<table>:<id>"; identical ones sent in one transaction are delivered once
+    op.execute("""
+        CREATE FUNCTION notify_metadata_change() RETURNS trigger AS $$
+        DECLARE
+            changed_id uuid;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed_id := OLD.id;
+            ELSE
+                changed_id := NEW.id;
+            END IF;
+            PERFORM nextval('metadata_version');
+            PERFORM pg_notify('metadata_changed', TG_TABLE_NAME || ':' || changed_id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify_metadata_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION notify_metadata_change()
+        """)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify_metadata_change ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS notify_metadata_change()")
+    op.execute("DROP SEQUENCE IF EXISTS metadata_version")
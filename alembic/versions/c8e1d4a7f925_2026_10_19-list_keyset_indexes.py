@@ -0,0 +1,41 @@
+"""list keyset indexes
+
+Revision ID: c8e1d4a7f925
+Revises: b2f7c9e4d613
+Create Date: 2026-10-19 23:12:05.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1d4a7f925'
+down_revision: Union[str, None] = 'b2f7c9e4d613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns): the keyset sort of every list endpoint, alone and under its parent filter
+INDEXES = [
+    ('ix_projects_start_date_id', 'projects', ['start_date', 'id']),
+    ('ix_mon_loc_name_id', 'mon_loc', ['loc_name', 'id']),
+    ('ix_mon_loc_project_name_id', 'mon_loc', ['project_id', 'loc_name', 'id']),
+    ('ix_mon_sources_name_id', 'mon_sources', ['source_name', 'id']),
+    ('ix_mon_sources_loc_name_id', 'mon_sources', ['mon_loc_id', 'source_name', 'id']),
+    ('ix_mon_sensors_name_id', 'mon_sensors', ['sensor_name', 'id']),
+    ('ix_mon_sensors_source_name_id', 'mon_sensors', ['mon_source_id', 'sensor_name', 'id']),
+    ('ix_mon_loc_groups_name_id', 'mon_loc_groups', ['group_name', 'id']),
+    ('ix_mon_loc_groups_loc_name_id', 'mon_loc_groups', ['mon_loc_id', 'group_name', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,40 @@
+"""search trigram indexes
+
+Revision ID: d5b9e3f1a284
+Revises: c8e1d4a7f925
+Create Date: 2026-10-19 23:47:51.902614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b9e3f1a284'
+down_revision: Union[str, None] = 'c8e1d4a7f925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, column) searched by /search with ILIKE '%q%' and the % operator
+INDEXES = [
+    ('ix_projects_project_name_trgm', 'projects', 'project_name'),
+    ('ix_projects_project_number_trgm', 'projects', 'project_number'),
+    ('ix_mon_loc_loc_name_trgm', 'mon_loc', 'loc_name'),
+    ('ix_mon_loc_loc_number_trgm', 'mon_loc', 'loc_number'),
+    ('ix_mon_sources_source_name_trgm', 'mon_sources', 'source_name'),
+    ('ix_mon_sensors_sensor_name_trgm', 'mon_sensors', 'sensor_name'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [column], postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    # the extension stays: other objects may depend on it
@@ -0,0 +1,60 @@
+"""add sensor alert rules
+
+Revision ID: d91f3b7c4e28
+Revises: c4a7e19b2f60
+Create Date: 2026-10-19 18:22:51.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91f3b7c4e28'
+down_revision: Union[str, None] = 'c4a7e19b2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'mon_sensor_alert_rules',
+        sa.Column('id', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('sensor_field_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('rule_type', sa.Text(), nullable=False),
+        sa.Column('lower', sa.Float(), nullable=True),
+        sa.Column('upper', sa.Float(), nullable=True),
+        sa.Column('hysteresis', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('suppress_seconds', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('active', sa.Integer(), server_default=sa.text('1'), nullable=False),
+        sa.Column('in_alarm', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('last_value', sa.Float(), nullable=True),
+        sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_triggered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.CheckConstraint(
+            "rule_type IN ('threshold', 'baseline_deviation', 'rate_of_change')",
+            name='ck_mon_sensor_alert_rules_rule_type',
+        ),
+        sa.ForeignKeyConstraint(['sensor_field_id'], ['mon_sensor_fields.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_mon_sensor_alert_rules_sensor_field_id', 'mon_sensor_alert_rules', ['sensor_field_id'])
+
+    op.add_column('mon_sensor_alerts', sa.Column('rule_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_mon_sensor_alerts_rule_id', 'mon_sensor_alerts', 'mon_sensor_alert_rules',
+        ['rule_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_mon_sensor_alerts_rule_id', 'mon_sensor_alerts', type_='foreignkey')
+    op.drop_column('mon_sensor_alerts', 'rule_id')
+    op.drop_index('ix_mon_sensor_alert_rules_sensor_field_id', table_name='mon_sensor_alert_rules')
+    op.drop_table('mon_sensor_alert_rules')
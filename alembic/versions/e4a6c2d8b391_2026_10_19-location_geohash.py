@@ -0,0 +1,38 @@
+"""location geohash
+
+Revision ID: e4a6c2d8b391
+Revises: d5b9e3f1a284
+Create Date: 2026-10-20 00:21:36.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.location.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6c2d8b391'
+down_revision: Union[str, None] = 'd5b9e3f1a284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mon_loc', sa.Column('geohash', sa.Text(), nullable=True))
+    conn = op.get_bind()
+    rows = conn.execute(sa.text('SELECT id, lat, lon FROM mon_loc')).fetchall()
+    if rows:
+        conn.execute(
+            sa.text('UPDATE mon_loc SET geohash = :geohash WHERE id = :id'),
+            [{'id': id, 'geohash': encode(lat, lon)} for id, lat, lon in rows],
+        )
+    op.alter_column('mon_loc', 'geohash', nullable=False)
+    op.create_index('ix_mon_loc_geohash', 'mon_loc', ['geohash'], postgresql_ops={'geohash': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mon_loc_geohash', table_name='mon_loc')
+    op.drop_column('mon_loc', 'geohash')
@@ -0,0 +1,63 @@
+"""alert fingerprints
+
+Revision ID: e7a2c5d9b314
+Revises: d91f3b7c4e28
+Create Date: 2026-10-19 19:05:12.481927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c5d9b314'
+down_revision: Union[str, None] = 'd91f3b7c4e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('mon_sensor_alerts', sa.Column('fingerprint', sa.Text(), nullable=True))
+    op.add_column('mon_sensor_alerts', sa.Column('occurrences', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('mon_sensor_alerts', sa.Column('first_seen', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('mon_sensor_alerts', sa.Column('last_seen', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('mon_sensor_alerts', sa.Column('acknowledged_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('mon_sensor_alerts', sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True))
+
+    # same digest as app.monitoring_sensor_alert.models.alert_fingerprint
+    op.execute("""
+        UPDATE mon_sensor_alerts
+        SET fingerprint = encode(sha256(convert_to(
+                sensor_id::text || ':' || alert_type || ':' || coalesce(rule_id::text, ''), 'UTF8')), 'hex'),
+            first_seen = triggered_at,
+            last_seen = triggered_at,
+            resolved_at = CASE WHEN active = 1 THEN NULL ELSE last_updated END
+    """)
+    # only one alert per fingerprint may stay open: resolve all but the latest
+    op.execute("""
+        UPDATE mon_sensor_alerts a
+        SET active = 0, resolved_at = now()
+        WHERE a.active = 1
+          AND EXISTS (
+              SELECT 1 FROM mon_sensor_alerts b
+              WHERE b.fingerprint = a.fingerprint AND b.active = 1
+                AND (b.triggered_at, b.id) > (a.triggered_at, a.id)
+          )
+    """)
+    op.alter_column('mon_sensor_alerts', 'fingerprint', nullable=False)
+    op.create_index(
+        'uq_mon_sensor_alerts_open_fingerprint', 'mon_sensor_alerts', ['fingerprint'],
+        unique=True, postgresql_where=sa.text('active = 1'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_mon_sensor_alerts_open_fingerprint', table_name='mon_sensor_alerts')
+    op.drop_column('mon_sensor_alerts', 'resolved_at')
+    op.drop_column('mon_sensor_alerts', 'acknowledged_at')
+    op.drop_column('mon_sensor_alerts', 'last_seen')
+    op.drop_column('mon_sensor_alerts', 'first_seen')
+    op.drop_column('mon_sensor_alerts', 'occurrences')
+    op.drop_column('mon_sensor_alerts', 'fingerprint')
@@ -0,0 +1,40 @@
+"""alert list indexes
+
+Revision ID: f3c8a1e6d702
+Revises: e7a2c5d9b314
+Create Date: 2026-10-19 19:41:37.220584
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a1e6d702'
+down_revision: Union[str, None] = 'e7a2c5d9b314'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_mon_sensor_alerts_triggered_at', 'mon_sensor_alerts', ['triggered_at', 'id'])
+    op.create_index('ix_mon_sensor_alerts_sensor_triggered_at', 'mon_sensor_alerts', ['sensor_id', 'triggered_at', 'id'])
+    op.create_index('ix_mon_sensor_alerts_type_triggered_at', 'mon_sensor_alerts', ['alert_type', 'triggered_at', 'id'])
+    op.create_index(
+        'ix_mon_sensor_alerts_open_triggered_at', 'mon_sensor_alerts', ['triggered_at', 'id'],
+        postgresql_where=sa.text('active = 1'),
+    )
+    # project/location filters and the summary join alerts up through these
+    op.create_index('ix_mon_sources_mon_loc_id', 'mon_sources', ['mon_loc_id'])
+    op.create_index('ix_mon_loc_project_id', 'mon_loc', ['project_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_mon_loc_project_id', table_name='mon_loc')
+    op.drop_index('ix_mon_sources_mon_loc_id', table_name='mon_sources')
+    op.drop_index('ix_mon_sensor_alerts_open_triggered_at', table_name='mon_sensor_alerts')
+    op.drop_index('ix_mon_sensor_alerts_type_triggered_at', table_name='mon_sensor_alerts')
+    op.drop_index('ix_mon_sensor_alerts_sensor_triggered_at', table_name='mon_sensor_alerts')
+    op.drop_index('ix_mon_sensor_alerts_triggered_at', table_name='mon_sensor_alerts')
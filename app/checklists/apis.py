@@ -6,7 +6,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit
 from . import services, schemas, models
 
 router = APIRouter(prefix="/checklists", tags=["Checklists"])
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/checklists", tags=["Checklists"])
 def read_templates(
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
 ):
     return services.get_templates(db, skip=skip, limit=limit)
 
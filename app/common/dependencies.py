@@ -1,7 +1,14 @@
 """This module contains common dependencies used in the application"""
 
-from app.common.types import PaginationParams
+from typing import Literal, Optional
+
+from fastapi import Query
+
+from app.common.types import PageParams, PaginationParams
 from app.config.database import SessionLocal
+from app.config.settings import get_settings
+
+_settings = get_settings()
 
 
 def get_db():
@@ -16,3 +23,18 @@ def get_db():
 def pagination_params(page: int = 1, size: int = 10):
     """Helper Dependency for pagination"""
     return PaginationParams(page=page, size=size)
+
+
+def page_params(
+    limit: int = Query(_settings.PAGE_SIZE_DEFAULT, ge=1, le=_settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    skip: int = Query(0, ge=0, description="Offset, when no cursor is given"),
+    count: Literal["none", "estimated", "exact"] = Query("none", description="Total returned in X-Total-Count"),
+):
+    """Helper Dependency for keyset pagination"""
+    return PageParams(limit=limit, cursor=cursor, skip=skip, count=count)
+
+
+def page_limit(limit: int = Query(_settings.PAGE_SIZE_DEFAULT, ge=1, le=_settings.PAGE_SIZE_MAX)) -> int:
+    """Helper Dependency for the page size of offset-paged lists"""
+    return limit
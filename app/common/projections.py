@@ -0,0 +1,82 @@
+"""Lean row projections for list endpoints.
+
+A ``Projection`` names the SQL column behind every field of a response schema,
+joined names included (a nested model such as ``details`` maps to a dict of
+columns). Its rows are plain dicts that ``RowsResponse`` hands straight to
+orjson, skipping the ORM objects, the per-row Pydantic models and FastAPI's
+re-validation of the ``response_model``.
+
+The fast path stays validated: the column names are checked against the
+schema when the projection is declared, and the first row of every response
+is validated against the schema, so a column of the wrong type fails loudly.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type, Union, get_args
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy.sql import ColumnElement
+
+Columns = Mapping[str, Union[ColumnElement, Mapping[str, ColumnElement]]]
+# (key, column position) for a scalar field, (key, [(key, position), ...]) for a nested model
+Layout = List[Tuple[str, Union[int, List[Tuple[str, int]]]]]
+
+
+class RowsResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        # UTC as "Z", the way Pydantic writes it on the regular path
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    for candidate in (annotation, *get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _check_fields(schema: Type[BaseModel], names: Sequence[str]) -> None:
+    missing = set(schema.model_fields) - set(names)
+    extra = set(names) - set(schema.model_fields)
+    if missing or extra:
+        raise TypeError(
+            f"Projection for {schema.__name__} does not match its fields "
+            f"(missing: {sorted(missing)}, unknown: {sorted(extra)})"
+        )
+
+
+class Projection:
+    def __init__(self, schema: Type[BaseModel], columns: Columns):
+        _check_fields(schema, list(columns))
+        self.schema = schema
+        self.columns: List[ColumnElement] = []
+        self._layout: Layout = []
+        for key, column in columns.items():
+            if isinstance(column, Mapping):
+                nested = _nested_model(schema.model_fields[key].annotation)
+                if nested is None:
+                    raise TypeError(f"{schema.__name__}.{key} is not a nested model")
+                _check_fields(nested, list(column))
+                self._layout.append((key, [(sub, self._add(f"{key}__{sub}", c)) for sub, c in column.items()]))
+            else:
+                self._layout.append((key, self._add(key, column)))
+
+    def _add(self, label: str, column: ColumnElement) -> int:
+        self.columns.append(column.label(label))
+        return len(self.columns) - 1
+
+    def rows(self, result: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        layout = self._layout
+        return [
+            {
+                key: row[pos] if isinstance(pos, int) else {sub: row[i] for sub, i in pos}
+                for key, pos in layout
+            }
+            for row in result
+        ]
+
+    def response(self, rows: List[Dict[str, Any]], status_code: int = 200) -> RowsResponse:
+        if rows:
+            self.schema.model_validate(rows[0])
+        return RowsResponse(rows, status_code=status_code)
@@ -1,6 +1,6 @@
 """This module contains common types used in the application."""
 
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 
 class PaginationParams(NamedTuple):
@@ -8,3 +8,12 @@ class PaginationParams(NamedTuple):
 
     page: int
     size: int
+
+
+class PageParams(NamedTuple):
+    """Keyset page parameters for the list endpoints."""
+
+    limit: int
+    cursor: Optional[str] = None
+    skip: int = 0  # only without a cursor; scans the skipped rows
+    count: str = "none"  # "none" | "estimated" | "exact"
@@ -0,0 +1,101 @@
+"""This module contains the dialect aware INSERT used for upserts."""
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import Table, func, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import GenericFunction
+
+
+class greatest(GenericFunction):
+    """``GREATEST(a, b, ...)``, for upserts that must never move a value backwards."""
+    inherit_cache = True
+
+
+@compiles(greatest, "sqlite")
+def _compile_greatest_sqlite(element, compiler, **kw):
+    # SQLite's multi-argument max() is its GREATEST
+    return "max(%s)" % compiler.process(element.clause_expr.element, **kw)
+
+
+def insert_for(db: Session, table: Table):
+    """Return an ``INSERT`` construct supporting ``ON CONFLICT`` for the session's dialect.
+
+    Postgres and SQLite expose the same ``on_conflict_do_update`` /
+    ``on_conflict_do_nothing`` API, so callers can build one statement and
+    run it against the production database and the SQLite test engine.
+
+    Args:
+        db (Session): The session the statement will run on
+        table (Table): The target table
+
+    Returns:
+        Insert: A dialect specific insert statement
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def upsert_returning_ids(
+    db: Session,
+    table: Table,
+    rows: Iterable[Dict[str, Any]],
+    keys: Sequence[str],
+    updates: Sequence[str],
+) -> Dict[Tuple, Tuple[UUID, str]]:
+    """Upsert ``rows`` on the unique ``keys`` and report every row's id.
+
+    One ``SELECT`` finds the rows that already exist, then one
+    ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` writes the new rows and
+    the existing rows whose ``updates`` columns differ (``last_updated`` is
+    bumped with them, when the table has one). Duplicate keys within ``rows``
+    collapse to the last one. The caller owns the transaction.
+
+    Args:
+        db (Session): The session to run on
+        table (Table): The target table, with a unique constraint on ``keys``
+        rows (Iterable[Dict[str, Any]]): Column values, ``id`` included
+        keys (Sequence[str]): The columns of the unique constraint
+        updates (Sequence[str]): The columns rewritten on conflict
+
+    Returns:
+        Dict[Tuple, Tuple[UUID, str]]: ``key values -> (id, status)`` in the
+        order of ``rows``, status being "created", "updated" or "unchanged"
+    """
+    unique = {tuple(row[k] for k in keys): row for row in rows}
+    if not unique:
+        return {}
+    key_columns = [table.c[k] for k in keys]
+
+    def ids_of(wanted: List[Tuple]) -> Dict[Tuple, UUID]:
+        found = db.execute(select(*key_columns, table.c.id).where(tuple_(*key_columns).in_(wanted)))
+        return {tuple(row[:-1]): row[-1] for row in found}
+
+    existing = ids_of(list(unique))
+    stmt = insert_for(db, table)
+    set_ = {c: stmt.excluded[c] for c in updates}
+    if "last_updated" in table.c:
+        set_["last_updated"] = func.now()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_=set_,
+        where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in updates)),
+    ).returning(*key_columns, table.c.id)
+    written = {tuple(row[:-1]): row[-1] for row in db.execute(stmt, list(unique.values()))}
+
+    # inserted by someone else between the two statements, and left unchanged
+    racing = [key for key in unique if key not in written and key not in existing]
+    if racing:
+        existing.update(ids_of(racing))
+
+    results = {}
+    for key in unique:
+        if key in written:
+            results[key] = (written[key], "updated" if key in existing else "created")
+        else:
+            results[key] = (existing[key], "unchanged")
+    return results
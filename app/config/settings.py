@@ -4,9 +4,13 @@ from dotenv import load_dotenv
 load_dotenv(".env")  # force load before Settings()
 
 from functools import lru_cache
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 
+# repository root, so default data directories do not depend on the working directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     """The settings for the application."""
 
@@ -21,6 +25,33 @@ class Settings(BaseSettings):
     KAFKA_BROKER: str = "kafka.railway.internal:29092"
     KAFKA_TOPIC: str = "sensor.readings"
     KAFKA_CLIENT_ID: str = "fastapi-kafka"
+    KAFKA_DLQ_TOPIC: str = "sensor.readings.dlq"  # where messages Kafka rejects for good are parked
+    KAFKA_QUEUE_MAX_MESSAGES: int = 100_000  # librdkafka local queue size
+    KAFKA_ENQUEUE_TIMEOUT_SEC: float = 5.0  # how long a full local queue may delay a request
+    # Topic provisioning; per-topic overrides are JSON, e.g. {"sensor.readings": 12}
+    KAFKA_DEFAULT_PARTITIONS: int = 6
+    KAFKA_DEFAULT_REPLICATION_FACTOR: int = 1
+    KAFKA_TOPIC_PARTITIONS: Dict[str, int] = {}
+    KAFKA_TOPIC_REPLICATION_FACTORS: Dict[str, int] = {}
+    # Disk spool for messages Kafka cannot take; "" disables it
+    KAFKA_SPOOL_DIR: str = os.path.join(BASE_DIR, "var", "kafka-spool")
+    KAFKA_SPOOL_SEGMENT_MB: int = 64
+    KAFKA_SPOOL_MAX_MB: int = 1024
+    KAFKA_SPOOL_FSYNC: bool = False
+    OUTBOX_RELAY_INTERVAL_SEC: float = 1.0  # in-app outbox relay, 0 = scheduler job only
+    ALERT_RULE_REFRESH_SEC: float = 5.0  # how stale the in-memory alert rule index may get
+    ALERT_DEDUP_WINDOW_SEC: int = 3600  # repeat triggers closer than this extend the open alert
+    PROJECT_TREE_CACHE_SIZE: int = 256  # cached /projects/{id}/tree documents
+    METADATA_REGISTRY_ENABLED: bool = True  # in-process metadata copy kept fresh by LISTEN/NOTIFY
+    PAGE_SIZE_DEFAULT: int = 100  # list endpoints without ?limit=
+    PAGE_SIZE_MAX: int = 1000  # hard cap on ?limit= for every list endpoint
+    LOCATION_MAP_MARKER_ZOOM: int = 12  # /locations/map sends markers from this zoom on, clusters below
+    LOCATION_MAP_MAX_MARKERS: int = 2000  # more locations than this in view are clustered at any zoom
+
+    # Source file ingestion
+    INGEST_WORKERS: int = 0  # parser processes, 0 = one per CPU
+    INGEST_COPY_BATCH_ROWS: int = 200_000  # readings per COPY/commit
+    INGEST_TAIL_CHUNK_BYTES: int = 16 * 1024 * 1024  # most bytes of a file parsed at once
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -31,8 +62,4 @@ class Settings(BaseSettings):
 @lru_cache
 def get_settings():
     """Returns a cached Settings instance."""
-    s = Settings()
-    print("🔑 Loaded POSTGRES_DATABASE_URL:", s.POSTGRES_DATABASE_URL)
-    print("📡 Kafka Broker:", s.KAFKA_BROKER)
-
-    return s
+    return Settings()
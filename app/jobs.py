@@ -62,6 +62,50 @@ def create_upcoming_mon_sensor_data_partitions(*, db=None) -> None:
         db=db,
     )
 
+def ingest_source_files(*, db=None) -> None:
+    """Scan every active Source folder and load new logger rows."""
+    if db is None:
+        raise RuntimeError("DB session required")
+    from app.source_ingestion.services import ingest_active_sources
+
+    ingest_active_sources(db)
+
+def relay_outbox_events(*, db=None) -> None:
+    """Publish pending outbox events to Kafka (the app also relays on its own when enabled)."""
+    if db is None:
+        raise RuntimeError("DB session required")
+    from app.outbox.services import relay_outbox
+
+    relay_outbox(db)
+
+def purge_ingest_idempotency_keys(*, db=None, days: int = 7) -> None:
+    """Forget ingest idempotency keys older than ``days``; retries are expected well within that."""
+    if db is None:
+        raise RuntimeError("DB session required")
+    db.execute(
+        text("DELETE FROM mon_ingest_idempotency_keys WHERE created_at < now() - make_interval(days => :days)"),
+        {"days": days},
+    )
+    db.commit()
+
+def compute_sensor_baselines(
+    *,
+    db=None,
+    project_id: Optional[str] = None,
+    method: str = "median",
+    window_hours: float = 24.0 * 7,
+    min_samples: int = 10,
+) -> None:
+    """Recompute per-field baselines (of one project, or of every field) from their first data window."""
+    if db is None:
+        raise RuntimeError("DB session required")
+    from app.monitoring_sensor_baseline import schemas
+    from app.monitoring_sensor_baseline.services import compute_monitoring_sensor_baselines
+
+    compute_monitoring_sensor_baselines(db, schemas.MonitoringSensorBaselineCompute(
+        project_id=project_id, method=method, window_hours=window_hours, min_samples=min_samples,
+    ))
+
 def say_hello(name: str = "World"):
     print(f"[{datetime.now(timezone.utc).isoformat()}] Hello, {name}!")
 
@@ -1,56 +1,437 @@
 # app/kafka_producer.py
-from confluent_kafka import Producer, KafkaException
-from confluent_kafka.admin import AdminClient, NewTopic
-import os
+# confluent_kafka is imported lazily (it loads librdkafka) so importing the app stays fast
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
 
-producer: Producer = None
+from app.config.settings import get_settings
+from app.kafka_spool import DiskSpool, SpoolFullError
+
+logger = logging.getLogger(__name__)
+
+producer: "KafkaProducerService" = None
+# messages Kafka could not take right now; drained in order by the replayer thread
+spool: Optional[DiskSpool] = None
+
+# set once the producer exists and every startup topic has been checked
+ready = threading.Event()
+_stop_init = threading.Event()
+_init_thread: Optional[threading.Thread] = None
+_stop_replay = threading.Event()
+_replay_thread: Optional[threading.Thread] = None
+
+# called once per message with None when it was delivered or safely parked
+# (spooled, dead-lettered), or with the error when it was lost
+DeliveryCallback = Callable[[Optional[str]], None]
+
+# delivery errors worth replaying from the spool; any other (a message that is
+# too large, a topic we may not write to) would fail the same way every time
+TRANSIENT_DELIVERY_ERRORS = frozenset({
+    "_MSG_TIMED_OUT", "_TIMED_OUT", "_TRANSPORT", "_ALL_BROKERS_DOWN", "_PURGE_QUEUE", "_PURGE_INFLIGHT",
+    "_QUEUE_FULL", "REQUEST_TIMED_OUT", "NETWORK_EXCEPTION", "BROKER_NOT_AVAILABLE", "LEADER_NOT_AVAILABLE",
+    "NOT_LEADER_FOR_PARTITION", "NOT_ENOUGH_REPLICAS", "NOT_ENOUGH_REPLICAS_AFTER_APPEND",
+})
+
+class KafkaUnavailableError(RuntimeError):
+    """Kafka cannot take the message right now and there is no room to spool it."""
+
+
+class TopicSpec(NamedTuple):
+    partitions: int
+    replication_factor: int
+
+
+def topic_specs(topics: List[str]) -> Dict[str, TopicSpec]:
+    """Partitions/replication for ``topics`` from settings (per-topic overrides, then defaults)."""
+    settings = get_settings()
+    return {
+        topic: TopicSpec(
+            partitions=settings.KAFKA_TOPIC_PARTITIONS.get(topic, settings.KAFKA_DEFAULT_PARTITIONS),
+            replication_factor=settings.KAFKA_TOPIC_REPLICATION_FACTORS.get(topic, settings.KAFKA_DEFAULT_REPLICATION_FACTOR),
+        )
+        for topic in topics
+    }
+
+
+def plan_topic_changes(
+    existing: Dict[str, int],
+    wanted: Dict[str, TopicSpec],
+) -> Tuple[Dict[str, TopicSpec], Dict[str, int]]:
+    """Split ``wanted`` into topics to create and topics whose partition count must grow.
+
+    ``existing`` maps topic name to its current partition count. Kafka cannot
+    drop partitions, so a lower wanted count is left alone.
+    """
+    to_create = {topic: spec for topic, spec in wanted.items() if topic not in existing}
+    to_grow = {
+        topic: spec.partitions
+        for topic, spec in wanted.items()
+        if topic in existing and spec.partitions > existing[topic]
+    }
+    return to_create, to_grow
+
+
+def ensure_kafka_topics(bootstrap_servers: str, wanted: Dict[str, TopicSpec]):
+    from confluent_kafka import KafkaException
+    from confluent_kafka.admin import AdminClient, NewPartitions, NewTopic
 
-def ensure_kafka_topic(bootstrap_servers: str, topic_name: str):
     admin = AdminClient({'bootstrap.servers': bootstrap_servers})
     metadata = admin.list_topics(timeout=10)
+    existing = {name: len(topic.partitions) for name, topic in metadata.topics.items()}
 
-    if topic_name in metadata.topics:
-        print(f"✅ Kafka topic '{topic_name}' already exists.")
-        return
+    to_create, to_grow = plan_topic_changes(existing, wanted)
+    for topic in wanted.keys() - to_create.keys() - to_grow.keys():
+        print(f"✅ Kafka topic '{topic}' already exists ({existing[topic]} partitions).")
 
-    print(f"📦 Creating Kafka topic: {topic_name}")
-    new_topic = NewTopic(topic=topic_name, num_partitions=1, replication_factor=1)
+    futures = {}
+    if to_create:
+        for topic, spec in to_create.items():
+            print(f"📦 Creating Kafka topic: {topic} ({spec.partitions} partitions, rf={spec.replication_factor})")
+        futures.update(admin.create_topics([
+            NewTopic(topic=topic, num_partitions=spec.partitions, replication_factor=spec.replication_factor)
+            for topic, spec in to_create.items()
+        ]))
+    if to_grow:
+        for topic, partitions in to_grow.items():
+            # keys hash onto the new partition count from now on; per-key order holds for new messages
+            print(f"📈 Growing Kafka topic '{topic}': {existing[topic]} -> {partitions} partitions")
+        futures.update(admin.create_partitions([NewPartitions(topic, partitions) for topic, partitions in to_grow.items()]))
 
-    futures = admin.create_topics([new_topic])
+    for topic, future in futures.items():
+        try:
+            future.result()  # Blocks until the change is applied or fails
+            print(f"✅ Kafka topic '{topic}' ready.")
+        except KafkaException as e:
+            print(f"❌ Failed to provision topic '{topic}':", e)
+
+
+class KafkaProducerService:
+    """Owns a confluent ``Producer`` and the thread that serves its callbacks.
+
+    Request code only ever appends to librdkafka's local queue; delivery
+    reports are polled on a dedicated daemon thread. When the local queue is
+    full, ``produce`` waits up to ``enqueue_timeout`` seconds for deliveries
+    to free capacity instead of failing straight away with ``BufferError``.
+
+    Messages whose delivery finally fails for a transient reason are handed
+    to ``on_failure`` (the disk spool, when one is configured) instead of
+    being dropped; those rejected for good go to ``on_permanent_failure``
+    (the dead-letter topic), so they are not replayed forever.
+    """
+
+    def __init__(self, config: dict, enqueue_timeout: float = 5.0, poll_interval: float = 0.1, client=None):
+        if client is None:
+            from confluent_kafka import Producer
+
+            client = Producer({**config, "error_cb": self._on_error})
+        self._producer = client
+        self.on_failure: Optional[Callable[[str, str, bytes], None]] = None
+        self.on_permanent_failure: Optional[Callable[[str, str, bytes, str], None]] = None
+        self._last_error_at: Optional[float] = None
+        self.enqueue_timeout = enqueue_timeout
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll_loop, name="kafka-poller", daemon=True)
+        self._capacity = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.delivered = 0
+        self.failed = 0
+        self.queue_full_waits = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> int:
+        """Stop polling and flush; returns the number of messages still undelivered."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.poll_interval * 10)
+        remaining = self._producer.flush(timeout)
+        if remaining and self.on_failure is not None:
+            # purged messages come back through the delivery callback and go to on_failure
+            self._producer.purge()
+            self._producer.poll(0)
+        return remaining
+
+    def flush(self, timeout: float) -> int:
+        return self._producer.flush(timeout)
+
+    def _poll_loop(self) -> None:
+        while not self._stop.is_set():
+            self._producer.poll(self.poll_interval)
+
+    def _on_delivery(self, enqueued_at: float, on_done: Optional[DeliveryCallback] = None):
+        def callback(err, msg):
+            latency = time.monotonic() - enqueued_at
+            with self._stats_lock:
+                if err:
+                    self.failed += 1
+                else:
+                    self.delivered += 1
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+            error = None
+            if err:
+                permanent = err.name() not in TRANSIENT_DELIVERY_ERRORS
+                if not permanent:
+                    self._last_error_at = time.monotonic()
+                topic, key, value = msg.topic(), (msg.key() or b"").decode(), msg.value()
+                try:
+                    if permanent and self.on_permanent_failure is not None:
+                        self.on_permanent_failure(topic, key, value, str(err))
+                    elif not permanent and self.on_failure is not None:
+                        self.on_failure(topic, key, value)
+                    else:
+                        error = str(err)
+                        print(f"[Kafka] ❌ {err}: {topic}:{key}")
+                except Exception as e:
+                    error = f"{err} (not spooled: {e})"
+                    print(f"[Kafka] ❌ {err}: {topic}:{key} (not spooled: {e})")
+            if on_done is not None:
+                on_done(error)
+            with self._capacity:
+                self._capacity.notify_all()
+        return callback
+
+    def _on_error(self, err) -> None:
+        # client-level errors (broker down, transport failures) rather than per-message ones
+        self._last_error_at = time.monotonic()
+
+    def healthy(self, cooldown: float = 15.0) -> bool:
+        """No client or delivery error seen in the last ``cooldown`` seconds."""
+        return self._last_error_at is None or time.monotonic() - self._last_error_at > cooldown
+
+    def _try_produce(self, topic: str, key: str, value, on_done: Optional[DeliveryCallback] = None) -> bool:
+        try:
+            self._producer.produce(
+                topic=topic,
+                key=key,
+                value=value if isinstance(value, bytes) else json.dumps(value),
+                on_delivery=self._on_delivery(time.monotonic(), on_done),
+            )
+            return True
+        except BufferError:
+            return False
+
+    def _queue_full(self, timeout: float) -> BufferError:
+        return BufferError(f"Kafka local queue still full after {timeout}s ({self.queue_depth()} messages pending)")
+
+    def produce(
+        self,
+        topic: str,
+        key: str,
+        value,
+        timeout: Optional[float] = None,
+        on_done: Optional[DeliveryCallback] = None,
+    ) -> None:
+        """Queue a message (a dict, or already encoded bytes) from a worker thread, blocking while the local queue is full."""
+        timeout = self.enqueue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while not self._try_produce(topic, key, value, on_done):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._queue_full(timeout)
+            with self._stats_lock:
+                self.queue_full_waits += 1
+            with self._capacity:
+                self._capacity.wait(min(remaining, self.poll_interval))
+
+    def queue_depth(self) -> int:
+        """Messages waiting in the local queue or in flight to the broker."""
+        return len(self._producer)
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue_depth(),
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "queue_full_waits": self.queue_full_waits,
+                "delivery_latency_avg_ms": round(self._latency_total / self.delivered * 1000, 3) if self.delivered else None,
+                "delivery_latency_max_ms": round(self._latency_max * 1000, 3),
+            }
 
-    try:
-        futures[topic_name].result()  # Blocks until topic is created or fails
-        print(f"✅ Kafka topic '{topic_name}' created.")
-    except KafkaException as e:
-        print(f"❌ Failed to create topic '{topic_name}':", e)
 
 def init_producer(topics: list[str] = None,):
     global producer
 
-    kafka_broker = os.getenv("KAFKA_BROKER", "kafka_test:29092")
-    client_id = os.getenv("KAFKA_CLIENT_ID", "fastapi-kafka")
+    settings = get_settings()
+    kafka_broker = settings.KAFKA_BROKER
+    client_id = settings.KAFKA_CLIENT_ID
 
-    producer = Producer({
-        "bootstrap.servers": kafka_broker,
-        "client.id": client_id,
-        "security.protocol": "PLAINTEXT",  # <- required for Railway internal
-    })
+    producer = KafkaProducerService(
+        {
+            "bootstrap.servers": kafka_broker,
+            "client.id": client_id,
+            "security.protocol": "PLAINTEXT",  # <- required for Railway internal
+            "queue.buffering.max.messages": settings.KAFKA_QUEUE_MAX_MESSAGES,
+            # Java-compatible hash of the key (sensor_id): a sensor always maps to the same
+            # partition, so its readings stay ordered while consumers scale across partitions
+            "partitioner": "murmur2_random",
+        },
+        enqueue_timeout=settings.KAFKA_ENQUEUE_TIMEOUT_SEC,
+    )
+    producer.on_failure = _spool_failed_delivery
+    producer.on_permanent_failure = _dead_letter_failed_delivery
+    producer.start()
 
     if topics:
-        for topic in topics:
-            ensure_kafka_topic(kafka_broker, topic)
+        ensure_kafka_topics(kafka_broker, topic_specs(topics))
 
-def send_kafka_message(topic: str, key: str, value: dict):
-    if producer is None:
-        raise RuntimeError("Kafka producer not initialized")
-
-    producer.produce(
-        topic=topic,
-        key=key,
-        value=json.dumps(value),
-        on_delivery=lambda err, msg: print(
-            f"[Kafka] {'✅' if not err else f'❌ {err}'}: {msg.topic()}:{msg.key()}"
-        )
+def _init_in_background(topics: Optional[list[str]], retry_max_sec: float) -> None:
+    started = time.perf_counter()
+    delay = 1.0
+    while not _stop_init.is_set():
+        try:
+            if producer is None:
+                init_producer()
+            if topics:
+                ensure_kafka_topics(get_settings().KAFKA_BROKER, topic_specs(topics))
+            ready.set()
+            logger.info("Kafka ready in %.2fs", time.perf_counter() - started)
+            return
+        except Exception as e:
+            logger.warning("Kafka initialisation failed, retrying in %.0fs: %s", delay, e)
+            _stop_init.wait(delay)
+            delay = min(delay * 2, retry_max_sec)
+
+def _kafka_available() -> bool:
+    return producer is not None and ready.is_set() and producer.healthy()
+
+def _spool_failed_delivery(topic: str, key: str, value: bytes) -> None:
+    if spool is not None:
+        spool.append(topic, key, value)
+
+def _dead_letter_failed_delivery(topic: str, key: str, value: bytes, reason: str) -> None:
+    """Park a message Kafka rejected for good on the DLQ; one the DLQ rejects too is dropped."""
+    dlq = get_settings().KAFKA_DLQ_TOPIC
+    envelope = {
+        "reason": f"undeliverable: {reason}",
+        "rejected_at": datetime.now(timezone.utc).isoformat(),
+        "topic": topic,
+        "key": key,
+        "message": value.decode("utf-8", "replace"),
+    }
+    # never block here: this runs on the poller thread that frees queue capacity
+    if topic == dlq or producer is None or not producer._try_produce(dlq, key, json.dumps(envelope).encode()):
+        logger.error("Dropped undeliverable message %s:%s: %s", topic, key, reason)
+
+def _replay_spool(interval: float) -> None:
+    """Drain the spool, oldest first, whenever Kafka is reachable."""
+    while not _stop_replay.is_set():
+        sent = 0
+        if spool.pending() and _kafka_available():
+            try:
+                sent = spool.replay(lambda topic, key, value: producer.produce(topic, key, value, timeout=interval))
+            except Exception as e:  # queue full or broker trouble: keep the rest for the next round
+                print("[Kafka] spool replay paused:", e)
+        if not sent:
+            _stop_replay.wait(interval)
+
+def open_spool() -> Optional[DiskSpool]:
+    """Open the on-disk spool from settings and start its replayer (``KAFKA_SPOOL_DIR=""`` disables it)."""
+    global spool, _replay_thread
+
+    settings = get_settings()
+    if not settings.KAFKA_SPOOL_DIR:
+        return None
+    spool = DiskSpool(
+        settings.KAFKA_SPOOL_DIR,
+        segment_bytes=settings.KAFKA_SPOOL_SEGMENT_MB * 1024 * 1024,
+        max_bytes=settings.KAFKA_SPOOL_MAX_MB * 1024 * 1024,
+        fsync=settings.KAFKA_SPOOL_FSYNC,
     )
-    producer.poll(0)
+    _stop_replay.clear()
+    _replay_thread = threading.Thread(target=_replay_spool, args=(1.0,), name="kafka-spool-replay", daemon=True)
+    _replay_thread.start()
+    return spool
+
+def start_producer(topics: list[str] = None, retry_max_sec: float = 60.0) -> None:
+    """Create the producer and check ``topics`` on a daemon thread.
+
+    Returns immediately so the app can serve while brokers are slow or
+    unreachable; failures are retried with backoff. ``ready`` reports when
+    the producer is usable and the topics are provisioned.
+    """
+    global _init_thread
+
+    _stop_init.clear()
+    ready.clear()
+    open_spool()
+    _init_thread = threading.Thread(
+        target=_init_in_background, args=(topics, retry_max_sec), name="kafka-init", daemon=True
+    )
+    _init_thread.start()
+
+def close_producer(timeout: float = 10.0):
+    global producer, spool
+
+    _stop_init.set()
+    _stop_replay.set()
+    ready.clear()
+    for thread in (_init_thread, _replay_thread):
+        if thread is not None:
+            thread.join(timeout=timeout)
+    if producer is not None:
+        remaining = producer.close(timeout)
+        if remaining:
+            print(f"[Kafka] {remaining} messages undelivered at shutdown" + (", spooled" if spool else ""))
+        producer = None
+    if spool is not None:
+        spool.close()
+        spool = None
+
+def send_kafka_message(topic: str, key: str, value: dict, on_done: Optional[DeliveryCallback] = None):
+    """Produce ``value`` as JSON, or spool it to disk while Kafka is unavailable or backed up.
+
+    While the spool holds a backlog new messages join its tail, so they are
+    still delivered in order once the replayer catches up; if that backlog
+    is full but Kafka is reachable again, the message skips the queue.
+    ``on_done`` hears about this one message: right away when it was
+    spooled, otherwise from its delivery report. Raises
+    ``KafkaUnavailableError`` when the message could be neither produced
+    nor spooled.
+    """
+    data = json.dumps(value).encode()
+    if spool is not None and (not _kafka_available() or spool.pending()):
+        try:
+            spool.append(topic, key, data)
+        except SpoolFullError as e:
+            if not _kafka_available():
+                raise KafkaUnavailableError(f"Kafka is unavailable and {e}") from e
+        else:
+            if on_done is not None:
+                on_done(None)
+            return
+    if producer is None:
+        raise KafkaUnavailableError("Kafka producer not ready")
+
+    try:
+        producer.produce(topic=topic, key=key, value=data, on_done=on_done)
+    except BufferError as e:
+        if spool is None:
+            raise KafkaUnavailableError(str(e)) from e
+        try:
+            spool.append(topic, key, data)
+        except SpoolFullError as full:
+            raise KafkaUnavailableError(f"{e}; {full}") from full
+        if on_done is not None:
+            on_done(None)
+
+def flush(timeout: float = 10.0) -> int:
+    """Wait for queued messages to be delivered or spooled; returns how many are still pending."""
+    if producer is None:
+        return 0
+    return producer.flush(timeout)
+
+def metrics() -> dict:
+    result = producer.metrics() if producer is not None else {"status": "not initialized"}
+    result["ready"] = ready.is_set()
+    if spool is not None:
+        result["spool"] = spool.metrics()
+    return result
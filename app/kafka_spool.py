@@ -0,0 +1,206 @@
+# app/kafka_spool.py
+"""Durable on-disk buffer for Kafka messages the broker could not take.
+
+Messages are appended as ``topic \\t key \\t value \\n`` lines to numbered
+segment files, named ``<seq>-<first write, epoch ms>.spool`` so the age of the
+backlog survives later writes. A cursor file remembers how far replay got;
+segments that are fully replayed are deleted. Segments are only created by
+their first append, and after a restart writing continues in a fresh one, so
+a line torn by a crash is never extended, and replay skips it.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+SEGMENT_SUFFIX = ".spool"
+CURSOR_FILE = "cursor"
+
+# (segment number, byte offset) of the next record to replay
+Position = Tuple[int, int]
+# (topic, key, encoded value)
+Record = Tuple[str, str, bytes]
+
+
+class SpoolFullError(Exception):
+    """The spool reached its disk quota; the message was not stored."""
+
+
+class DiskSpool:
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync: bool = False,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.replayed = 0
+        self.rejected = 0
+
+        self._names = self._scan()
+        for seq in [seq for seq in self._names if os.path.getsize(self._path(seq)) == 0]:
+            os.remove(self._path(seq))
+            del self._names[seq]
+        segments = sorted(self._names)
+        self._bytes = sum(os.path.getsize(self._path(seq)) for seq in segments)
+        self._read = self._load_cursor(segments)
+        self._write_seq = (segments[-1] + 1) if segments else self._read[0]
+        self._writer = None  # opened by the first append, which names the segment
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, self._names[seq])
+
+    def _scan(self) -> Dict[int, str]:
+        names = {}
+        for name in os.listdir(self.directory):
+            seq = name[: -len(SEGMENT_SUFFIX)].partition("-")[0]
+            if name.endswith(SEGMENT_SUFFIX) and seq.isdigit():
+                names[int(seq)] = name
+        return names
+
+    def _created(self, seq: int) -> float:
+        """When the segment got its first record; older segments without a stamp fall back to mtime."""
+        stamp = self._names[seq][: -len(SEGMENT_SUFFIX)].partition("-")[2]
+        return int(stamp) / 1000 if stamp.isdigit() else os.path.getmtime(self._path(seq))
+
+    def _load_cursor(self, segments: List[int]) -> Position:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                seq, offset = (int(part) for part in f.read().split())
+        except (OSError, ValueError):
+            return (segments[0], 0) if segments else (1, 0)
+        if not segments:
+            return 1, 0
+        if seq < segments[0]:
+            return segments[0], 0
+        if seq > segments[-1]:
+            return segments[-1] + 1, 0
+        return seq, offset
+
+    def _save_cursor(self) -> None:
+        tmp = os.path.join(self.directory, CURSOR_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(f"{self._read[0]} {self._read[1]}")
+        os.replace(tmp, os.path.join(self.directory, CURSOR_FILE))
+
+    def _open_writer(self) -> None:
+        self._names[self._write_seq] = f"{self._write_seq:012d}-{int(time.time() * 1000)}{SEGMENT_SUFFIX}"
+        self._writer = open(self._path(self._write_seq), "ab")
+
+    def _rotate(self) -> None:
+        self._writer.close()
+        self._write_seq += 1
+        self._open_writer()
+
+    def append(self, topic: str, key: str, value: bytes) -> None:
+        """Store one encoded message; raises ``SpoolFullError`` past ``max_bytes``."""
+        if "\t" in topic or "\t" in key or b"\n" in value:
+            raise ValueError("Spooled topic/key may not contain tabs and values may not contain newlines")
+        line = f"{topic}\t{key}\t".encode() + value + b"\n"
+        with self._lock:
+            if self._bytes + len(line) > self.max_bytes:
+                self.rejected += 1
+                raise SpoolFullError(f"Kafka spool is full ({self._bytes} bytes in {self.directory})")
+            if self._writer is None:
+                self._open_writer()
+            elif self._writer.tell() and self._writer.tell() + len(line) > self.segment_bytes:
+                self._rotate()
+            self._writer.write(line)
+            self._writer.flush()
+            if self.fsync:
+                os.fsync(self._writer.fileno())
+            self._bytes += len(line)
+            self.appended += 1
+
+    def pending(self) -> bool:
+        with self._lock:
+            seq, offset = self._read
+            written = self._writer.tell() if self._writer is not None else 0
+            return seq < self._write_seq or offset < written
+
+    def read_batch(self, max_records: int) -> Tuple[List[Tuple[Record, Position]], int]:
+        """Up to ``max_records`` records from the cursor, each with the position after it.
+
+        Also returns the last segment scanned, so a caller that got nothing
+        back can skip segments that only held a torn line.
+        """
+        with self._lock:
+            (seq, offset), write_seq = self._read, self._write_seq
+            names = dict(self._names)
+        batch: List[Tuple[Record, Position]] = []
+        while seq <= write_seq:
+            try:
+                f = open(os.path.join(self.directory, names[seq]), "rb")
+            except (KeyError, FileNotFoundError):
+                f = None
+            if f is not None:
+                with f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # being written, or torn by a crash in an older segment
+                        offset += len(line)
+                        topic, key, value = line[:-1].split(b"\t", 2)
+                        batch.append(((topic.decode(), key.decode(), value), (seq, offset)))
+                        if len(batch) >= max_records:
+                            return batch, seq
+            if seq == write_seq:
+                break
+            seq, offset = seq + 1, 0
+        return batch, seq
+
+    def commit(self, position: Position, records: int) -> None:
+        """Move the cursor to ``position`` and delete the segments before it."""
+        with self._lock:
+            self._read = position
+            self.replayed += records
+            for seq in sorted(self._names):
+                if seq >= position[0] or seq == self._write_seq:
+                    break
+                path = self._path(seq)
+                self._bytes -= os.path.getsize(path)
+                os.remove(path)
+                del self._names[seq]
+            self._save_cursor()
+
+    def replay(self, send: Callable[[str, str, bytes], None], max_records: int = 500) -> int:
+        """Send records in order until ``send`` raises or the batch is done; returns how many went out."""
+        batch, scanned_seq = self.read_batch(max_records)
+        if not batch:
+            if self._read[0] < scanned_seq:
+                self.commit((scanned_seq, 0), 0)
+            return 0
+        sent = 0
+        try:
+            for (topic, key, value), _ in batch:
+                send(topic, key, value)
+                sent += 1
+        finally:
+            if sent:
+                self.commit(batch[sent - 1][1], sent)
+        return sent
+
+    def metrics(self) -> dict:
+        with self._lock:
+            oldest: Optional[float] = self._created(min(self._names)) if self._names else None
+            return {
+                "backlog_bytes": self._bytes,
+                "segments": len(self._names),
+                "appended": self.appended,
+                "replayed": self.replayed,
+                "rejected": self.rejected,
+                "oldest_segment_age_sec": round(time.time() - oldest, 1) if oldest else None,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
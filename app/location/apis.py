@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
-from app.location import schemas, selectors, services
-from app.monitoring_sensor import schemas as sensor_schemas, services as sensor_services
-from app.monitoring_source import schemas as source_schemas, services as source_services
+from app.common.dependencies import get_db, page_params
+from app.common.types import PageParams
+from app.config.settings import get_settings
+from app.location import geohash, schemas, selectors, services
+from app.monitoring_sensor import (
+    schemas as sensor_schemas,
+    selectors as sensor_selectors,
+    services as sensor_services,
+)
+from app.monitoring_source import (
+    schemas as source_schemas,
+    selectors as source_selectors,
+    services as source_services,
+)
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
@@ -18,6 +28,28 @@ def create_location(
     refreshed = selectors.get_location(db, created.id) or created
     return services.enrich_location(refreshed)
 
+# declared before /{loc_id} so "map" is not parsed as a location id
+@router.get("/map", response_model=schemas.LocationMap)
+def get_location_map(
+    bbox: str = Query(..., description="west,south,east,north in degrees"),
+    zoom: int = Query(..., ge=0, le=22),
+    project_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+):
+    """Markers (id, name, coordinates) when zoomed in, geohash clusters otherwise."""
+    try:
+        box = geohash.BBox.parse(bbox)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    settings = get_settings()
+    if zoom >= settings.LOCATION_MAP_MARKER_ZOOM:
+        max_markers = settings.LOCATION_MAP_MAX_MARKERS
+        markers = selectors.get_location_markers(db, box, max_markers + 1, project_id)
+        if len(markers) <= max_markers:
+            return {"zoom": zoom, "markers": markers}
+    clusters = selectors.get_location_clusters(db, box, geohash.cluster_precision(zoom), project_id)
+    return {"zoom": zoom, "clusters": clusters}
+
 @router.get("/{loc_id}", response_model=schemas.Location)
 def get_location(loc_id: UUID, db: Session = Depends(get_db)):
     obj = selectors.get_location(db, loc_id)
@@ -27,12 +59,11 @@ def get_location(loc_id: UUID, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[schemas.Location])
 def list_locations(
-    skip: int = 0,
-    limit: int = 100,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    locations = selectors.get_locations(db, skip=skip, limit=limit)
-    return [services.enrich_location(location) for location in locations]
+    locations = selectors.get_location_rows(db, page)
+    return locations.apply(selectors.LOCATION_ROW.response(locations.items))
 
 @router.get("/name/{location_name}", response_model=schemas.Location, status_code=status.HTTP_200_OK)
 def get_location_by_name(
@@ -50,11 +81,11 @@ def get_location_by_name(
 )
 def list_location_sensors(
     loc_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sensors = sensor_services.list_sensors_for_location(db, loc_id, skip=skip)
-    return [sensor_services.enrich_sensor(sen) for sen in sensors]
+    sensors = sensor_services.list_sensors_for_location(db, loc_id, page)
+    return sensors.apply(sensor_selectors.SENSOR_ROW.response(sensors.items))
 
 @router.get(
     "/{loc_id}/sources",
@@ -62,11 +93,11 @@ def list_location_sensors(
 )
 def list_location_sources(
     loc_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sources = source_services.list_sources_for_location(db, loc_id, skip=skip)
-    return [source_services.enrich_source(src) for src in sources]
+    sources = source_services.list_sources_for_location(db, loc_id, page)
+    return sources.apply(source_selectors.SOURCE_ROW.response(sources.items))
 
 @router.patch("/{loc_id}", response_model=schemas.Location)
 def update_location(
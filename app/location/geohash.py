@@ -0,0 +1,99 @@
+"""Geohashes for the location map.
+
+Every location stores the geohash of its coordinates (``mon_loc.geohash``,
+indexed for prefix matches). A map request turns its bounding box into a
+handful of covering cells, so the index narrows the rows before the exact
+lat/lon test, and clusters are the locations sharing a prefix whose length
+follows the zoom level.
+"""
+
+import math
+from typing import List, NamedTuple, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9  # stored precision, cells of about 5 x 5 m
+MAX_COVER_CELLS = 32
+
+
+class BBox(NamedTuple):
+    """A box in degrees; ``west > east`` means it crosses the antimeridian."""
+
+    west: float
+    south: float
+    east: float
+    north: float
+
+    @classmethod
+    def parse(cls, text: str) -> "BBox":
+        """``west,south,east,north`` in degrees, clamped to the globe."""
+        try:
+            west, south, east, north = (float(v) for v in text.split(","))
+        except ValueError:
+            raise ValueError("bbox must be west,south,east,north")
+        if not all(math.isfinite(v) for v in (west, south, east, north)):
+            raise ValueError("bbox must be finite")
+        west, east = min(max(west, -180.0), 180.0), min(max(east, -180.0), 180.0)
+        south, north = max(south, -90.0), min(north, 90.0)
+        if south > north:
+            raise ValueError("bbox must have south <= north")
+        return cls(west, south, east, north)
+
+    def parts(self) -> List["BBox"]:
+        """The box itself, or its two halves either side of the antimeridian."""
+        if self.west <= self.east:
+            return [self]
+        return [self._replace(east=180.0), self._replace(west=-180.0)]
+
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, index, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            index = index * 2 + 1
+            bounds[0] = mid
+        else:
+            index *= 2
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[index])
+            bits, index = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(degrees of latitude, degrees of longitude) spanned by one cell."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _cell_range(low: float, high: float, origin: float, size: float, count: int) -> range:
+    first = min(int((low + origin) // size), count - 1)
+    last = min(int((high + origin) // size), count - 1)
+    return range(first, last + 1)
+
+
+def covering_cells(bbox: BBox, max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """The finest cells, at most ``max_cells`` of them, that together cover ``bbox``."""
+    parts = bbox.parts()
+    if len(parts) > 1:
+        return sorted({cell for part in parts for cell in covering_cells(part, max_cells // len(parts))})
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = _cell_range(bbox.south, bbox.north, 90.0, height, round(180.0 / height))
+        cols = _cell_range(bbox.west, bbox.east, 180.0, width, round(360.0 / width))
+        if len(rows) * len(cols) <= max_cells or precision == 1:
+            break
+    return sorted({
+        encode((row + 0.5) * height - 90.0, (col + 0.5) * width - 180.0, precision)
+        for row in rows for col in cols
+    })
+
+
+def cluster_precision(zoom: int) -> int:
+    """Prefix length giving about four clusters across a 256 px map tile at ``zoom``."""
+    return max(1, min(PRECISION, 1 + round(zoom * 0.4)))
@@ -1,21 +1,34 @@
-from sqlalchemy import Column, Text, Float, Integer, DateTime, text
+from sqlalchemy import Column, Text, Float, Integer, DateTime, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import relationship
 from app.config.database import DBBase
+from app.location import geohash
 from app.monitoring_source.models import Source
 from app.monitoring_group.models import MonitoringGroup
 
+
+def _default_geohash(context) -> str:
+    params = context.get_current_parameters()
+    return geohash.encode(params["lat"], params["lon"])
+
+
 class Location(DBBase):
     __tablename__ = "mon_loc"
 
+    __table_args__ = (
+        # prefix matches (LIKE 'u4pr%') for the map's bounding box cells
+        Index("ix_mon_loc_geohash", "geohash", postgresql_ops={"geohash": "text_pattern_ops"}),
+    )
+
     id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
-    project_id = Column(PGUUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(PGUUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     loc_number = Column(Text, nullable=True)
     loc_name = Column(Text, nullable=False)
     lat = Column(Float, nullable=False)
     lon = Column(Float, nullable=False)
+    geohash = Column(Text, nullable=False, default=_default_geohash)  # kept in step with lat/lon by the services
     frequency = Column(Text, nullable=False)
     active = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -26,5 +39,5 @@ class Location(DBBase):
         back_populates="mon_locs"
     )
 
-    mon_sources = relationship(Source, back_populates="mon_loc", lazy="selectin")
-    mon_loc_groups = relationship(MonitoringGroup, back_populates="mon_loc", lazy="selectin")
+    mon_sources = relationship(Source, back_populates="mon_loc", lazy="raise_on_sql", passive_deletes=True)
+    mon_loc_groups = relationship(MonitoringGroup, back_populates="mon_loc", lazy="raise_on_sql", passive_deletes=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -35,4 +35,25 @@ class Location(LocationBase):
     details: Optional[LocationMetadata] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class LocationMarker(BaseModel):
+    id: UUID
+    loc_name: str
+    lat: float
+    lon: float
+
+
+class LocationCluster(BaseModel):
+    geohash: str  # the prefix shared by the cluster's locations
+    count: int
+    lat: float  # centroid of the locations
+    lon: float
+    active_alerts: int
+
+
+class LocationMap(BaseModel):
+    zoom: int
+    clusters: List[LocationCluster] = []
+    markers: List[LocationMarker] = []
@@ -1,9 +1,37 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
+from sqlalchemy import func, literal_column, or_
 from sqlalchemy.orm import Session, joinedload
 
+from app.common.paginators import Keyset, Page
+from app.common.projections import Projection
+from app.common.types import PageParams
+from app.location import geohash, schemas
 from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+# the columns behind schemas.Location, for the list endpoints
+LOCATION_ROW = Projection(schemas.Location, {
+    "id": Location.id,
+    "project_id": Location.project_id,
+    "loc_number": Location.loc_number,
+    "loc_name": Location.loc_name,
+    "lat": Location.lat,
+    "lon": Location.lon,
+    "frequency": Location.frequency,
+    "active": Location.active,
+    "created_at": Location.created_at,
+    "last_updated": Location.last_updated,
+    "details": {
+        "project_name": Project.project_name,
+        "project_number": Project.project_number,
+    },
+})
+LOCATION_KEYSET = Keyset(Location.loc_name, Location.id)
 
 def get_location(db: Session, loc_id: UUID) -> Optional[Location]:
     return db.query(Location).options(joinedload(Location.project)).filter(Location.id == loc_id).first()
@@ -22,10 +50,85 @@ def get_locations(
         query = query.filter(Location.project_id == project_id)
     return query.offset(skip).limit(limit).all()
 
+def get_location_rows(
+    db: Session,
+    page: PageParams,
+    project_id: Optional[UUID] = None,
+) -> Page:
+    query = db.query(*LOCATION_ROW.columns).join(Project, Project.id == Location.project_id)
+    if project_id is not None:
+        query = query.filter(Location.project_id == project_id)
+    result = LOCATION_KEYSET.paginate(query, page)
+    return result._replace(items=LOCATION_ROW.rows(result.items))
+
 def get_location_by_name(
     db: Session,
     location_name: str
 ) -> Optional[Location]:
     return (
         db.query(Location).options(joinedload(Location.project)).filter(Location.loc_name == location_name).first()
-    )
\ No newline at end of file
+    )
+
+def _in_bbox(bbox: geohash.BBox, project_id: Optional[UUID]) -> list:
+    criteria = [
+        Location.lat.between(bbox.south, bbox.north),
+        or_(*(Location.lon.between(part.west, part.east) for part in bbox.parts())),
+    ]
+    cells = geohash.covering_cells(bbox)
+    if len(cells[0]) > 1:  # single characters cover the globe: nothing to narrow
+        criteria.append(or_(*(Location.geohash.like(f"{cell}%") for cell in cells)))
+    if project_id is not None:
+        criteria.append(Location.project_id == project_id)
+    return criteria
+
+def get_location_markers(
+    db: Session,
+    bbox: geohash.BBox,
+    limit: int,
+    project_id: Optional[UUID] = None,
+) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(Location.id, Location.loc_name, Location.lat, Location.lon)
+          .filter(*_in_bbox(bbox, project_id))
+          .order_by(Location.geohash)
+          .limit(limit)
+          .all()
+    )
+    return [row._asdict() for row in rows]
+
+def get_location_clusters(
+    db: Session,
+    bbox: geohash.BBox,
+    precision: int,
+    project_id: Optional[UUID] = None,
+) -> List[Dict[str, Any]]:
+    """Locations in ``bbox`` grouped by geohash prefix, with their open alerts."""
+    in_bbox = _in_bbox(bbox, project_id)
+    # open alerts of the locations in the box only, counted before the grouping
+    open_alerts = (
+        db.query(Source.mon_loc_id.label("loc_id"), func.count().label("alerts"))
+          .select_from(MonitoringSensorAlert)
+          .join(MonitoringSensor, MonitoringSensor.id == MonitoringSensorAlert.sensor_id)
+          .join(Source, Source.id == MonitoringSensor.mon_source_id)
+          .join(Location, Location.id == Source.mon_loc_id)
+          .filter(MonitoringSensorAlert.active == 1, *in_bbox)
+          .group_by(Source.mon_loc_id)
+          .subquery()
+    )
+    # inlined, so SELECT, GROUP BY and ORDER BY share one expression
+    cell = func.substr(Location.geohash, literal_column("1"), literal_column(str(int(precision))))
+    rows = (
+        db.query(
+            cell.label("geohash"),
+            func.count().label("count"),
+            func.avg(Location.lat).label("lat"),
+            func.avg(Location.lon).label("lon"),
+            func.coalesce(func.sum(open_alerts.c.alerts), 0).label("active_alerts"),
+        )
+          .outerjoin(open_alerts, open_alerts.c.loc_id == Location.id)
+          .filter(*in_bbox)
+          .group_by(cell)
+          .order_by(cell)
+          .all()
+    )
+    return [row._asdict() for row in rows]
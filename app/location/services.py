@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.location import schemas, selectors
+from app.common.paginators import Page
+from app.common.types import PageParams
+from app.location import geohash, schemas, selectors
 from app.location.models import Location
-from typing import Optional, List
+from typing import Optional
 
 def create_location(db: Session, payload: schemas.LocationCreate) -> Location:
     obj = Location(**payload.dict())
@@ -15,8 +17,11 @@ def update_location(db: Session, loc_id: UUID, payload: schemas.LocationUpdate)
     obj = selectors.get_location(db, loc_id)
     if not obj:
         return None
-    for k, v in payload.dict(exclude_unset=True).items():
+    changes = payload.dict(exclude_unset=True)
+    for k, v in changes.items():
         setattr(obj, k, v)
+    if "lat" in changes or "lon" in changes:
+        obj.geohash = geohash.encode(obj.lat, obj.lon)
     db.commit()
     db.refresh(obj)
     return obj
@@ -30,10 +35,9 @@ def delete_location(db: Session, loc_id: UUID) -> None:
 def list_locations_for_project(
     db: Session,
     project_id: UUID,
-    skip: int = 0,
-    limit: int = 100
-) -> List[schemas.Location]:
-    return selectors.get_locations(db, skip=skip, limit=limit, project_id=project_id)
+    page: PageParams,
+) -> Page:
+    return selectors.get_location_rows(db, page, project_id=project_id)
 
 def get_location_by_name(
     db: Session,
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit
 from app.location_task import schemas, selectors, services
 
 router = APIRouter(prefix="/location-tasks", tags=["Location Tasks"])
@@ -17,7 +17,7 @@ def create_location_task(
 @router.get("/", response_model=List[schemas.LocationTask])
 def list_location_tasks(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
     db: Session = Depends(get_db),
 ):
     return selectors.get_location_tasks(db, skip=skip, limit=limit)
@@ -1,8 +1,12 @@
 """This module contains the main FastAPI application."""
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
 from contextlib import asynccontextmanager
 from anyio import to_thread
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Response, status
 from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -12,7 +16,12 @@ from app.common.security import login_for_access_token, get_current_user
 from app.common.dependencies import get_db
 from app.common import schemas
 
-from app.kafka_producer import init_producer
+from app import kafka_producer
+from app.kafka_producer import close_producer, start_producer
+from app.config.settings import get_settings
+from app.outbox.services import start_relay, stop_relay
+from app.metadata_registry import start_registry, stop_registry
+from app.source_ingestion.worker import stop_ingest_worker
 
 # Import your new modules’ routers
 from app.user.apis import router as user_router
@@ -27,6 +36,9 @@ from app.monitoring_sensor_baseline.apis import router as monitoring_sensor_base
 from app.monitoring_sensor_data.apis import router as monitoring_sensor_data_router
 from app.checklists.apis import router as checklists_router
 from app.scheduler_task.apis import router as tasks_router
+from app.search.apis import router as search_router
+
+logger = logging.getLogger(__name__)
 
 # Lifespan (startup, shutdown)
 @asynccontextmanager
@@ -35,14 +47,27 @@ async def lifespan(_: FastAPI):
     # Startup code
     print("System Call: Enhance Armament x_x")  # SAO Reference
 
-    init_producer(["sensor.readings", "alerts", "logs"])
+    # Kafka connects and checks topics in the background; see /ready
+    start_producer(["sensor.readings", "sensor.readings.dlq", "alerts", "logs"])
+    relay_interval = get_settings().OUTBOX_RELAY_INTERVAL_SEC
+    if relay_interval > 0:
+        start_relay(relay_interval)
+    # loads the metadata tables and follows their changes in the background
+    start_registry()
 
     # Bigger Threadpool i.e you send a bunch of requests it will handle a max of 1000 at a time, the default is 40
     limiter = to_thread.current_default_thread_limiter()
     limiter.total_tokens = 1000
 
+    logger.info("Startup completed in %.0f ms (Kafka broker %s)",
+                (time.perf_counter() - _IMPORT_STARTED) * 1000, get_settings().KAFKA_BROKER)
+
     # Shutdown
     yield
+    await to_thread.run_sync(stop_ingest_worker)
+    await to_thread.run_sync(stop_relay)
+    await to_thread.run_sync(stop_registry)
+    await to_thread.run_sync(close_producer)
     print("System Call: Release Recollection...")
 
 
@@ -66,6 +91,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],  # list endpoint paging
 )
 app.add_middleware(
     GZipMiddleware,
@@ -79,6 +105,20 @@ async def health_check(db=Depends(get_db)):
     """This is the health check endpoint"""
     return {"status": "ok"}
 
+# Readiness Check
+@app.get("/ready", status_code=200, include_in_schema=False)
+async def readiness_check(response: Response):
+    """Ready once the Kafka producer is up and its topics are checked"""
+    kafka_ready = kafka_producer.ready.is_set()
+    if not kafka_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ok" if kafka_ready else "starting", "kafka": kafka_ready}
+
+@app.get("/metrics/kafka", status_code=200, include_in_schema=False)
+async def kafka_metrics():
+    """Local producer queue depth, delivery latency and disk spool backlog"""
+    return kafka_producer.metrics()
+
 # Token Endpoint
 @app.post("/token", response_model=schemas.Token, tags=["auth"])
 async def token(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(get_db)):
@@ -98,3 +138,4 @@ app.include_router(monitoring_sensor_baseline_router, dependencies=[])
 app.include_router(monitoring_sensor_data_router, dependencies=[])
 app.include_router(checklists_router, dependencies=[])
 app.include_router(tasks_router, dependencies=[])
+app.include_router(search_router, dependencies=[])
@@ -0,0 +1,368 @@
+# app/metadata_registry.py
+"""In-process copy of the metadata tables, kept fresh by LISTEN/NOTIFY.
+
+Projects, locations, sources, sensors, sensor fields and groups are small and
+change rarely, yet hot paths (bulk ingest validation, sensor-data filters)
+used to look them up on every request. Each worker loads them once into
+``TableIndex`` structures -- by id, by parent and by name-like keys -- and a
+listener thread applies changes as they happen: the ``notify_metadata_change``
+trigger (see the ``metadata_registry_notify`` migration) bumps the
+``metadata_version`` sequence and sends ``<table>:<id>`` on the
+``metadata_changed`` channel, and only the rows named there are re-read.
+
+The registry only answers while ``live``, i.e. while the listener is
+connected; otherwise callers fall back to the database. A lost connection
+reconnects and reloads everything if the version moved in the meantime.
+"""
+
+import select as select_module
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Type
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+CHANNEL = "metadata_changed"
+VERSION_SEQUENCE = "metadata_version"
+# resolved id lists longer than this are left to SQL joins
+MAX_RESOLVED_IDS = 5000
+
+
+class ProjectEntry(NamedTuple):
+    id: UUID
+    project_number: Optional[str]
+    project_name: str
+
+
+class LocationEntry(NamedTuple):
+    id: UUID
+    project_id: UUID
+    loc_number: Optional[str]
+    loc_name: str
+
+
+class SourceEntry(NamedTuple):
+    id: UUID
+    mon_loc_id: UUID
+    source_name: Optional[str]
+
+
+class SensorEntry(NamedTuple):
+    id: UUID
+    mon_source_id: UUID
+    sensor_group_id: Optional[UUID]
+    sensor_name: str
+    sensor_type: str
+
+
+class FieldEntry(NamedTuple):
+    id: UUID
+    sensor_id: UUID
+    field_name: str
+
+
+class GroupEntry(NamedTuple):
+    id: UUID
+    mon_loc_id: UUID
+    group_name: str
+
+
+class TableIndex:
+    """Rows of one table by id, grouped by parent id and by a few key columns."""
+
+    def __init__(self, model, entry: Type[NamedTuple], parent: Optional[str] = None, keys: Tuple[str, ...] = ()):
+        self.model = model
+        self.entry = entry
+        self.parent = parent
+        self.keys = keys
+        self.columns = [getattr(model, name) for name in entry._fields]
+        self.clear()
+
+    def clear(self) -> None:
+        self.by_id: Dict[UUID, Any] = {}
+        self.by_parent: Dict[UUID, Set[UUID]] = defaultdict(set)
+        self.by_key: Dict[str, Dict[Any, Set[UUID]]] = {key: defaultdict(set) for key in self.keys}
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, id: UUID):
+        return self.by_id.get(id)
+
+    def find(self, key: str, value: Any) -> Set[UUID]:
+        return self.by_key[key].get(value, set())
+
+    def children(self, parent_id: UUID) -> Set[UUID]:
+        return self.by_parent.get(parent_id, set())
+
+    def put(self, row: Iterable[Any]) -> None:
+        entry = self.entry(*row)
+        self.remove(entry.id)
+        self.by_id[entry.id] = entry
+        if self.parent:
+            self.by_parent[getattr(entry, self.parent)].add(entry.id)
+        for key in self.keys:
+            self.by_key[key][getattr(entry, key)].add(entry.id)
+
+    def remove(self, id: UUID) -> None:
+        old = self.by_id.pop(id, None)
+        if old is None:
+            return
+        if self.parent:
+            _discard(self.by_parent, getattr(old, self.parent), id)
+        for key in self.keys:
+            _discard(self.by_key[key], getattr(old, key), id)
+
+    def fetch(self, db: Session, ids: Optional[Iterable[UUID]] = None) -> List[Tuple]:
+        qs = db.query(*self.columns)
+        if ids is not None:
+            qs = qs.filter(self.model.id.in_(list(ids)))
+        return qs.all()
+
+
+def _discard(index: Dict[Any, Set[UUID]], key: Any, id: UUID) -> None:
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(id)
+        if not ids:
+            del index[key]
+
+
+class MetadataRegistry:
+    def __init__(self):
+        self.projects = TableIndex(Project, ProjectEntry, keys=("project_number",))
+        self.locations = TableIndex(Location, LocationEntry, parent="project_id", keys=("loc_number",))
+        self.sources = TableIndex(Source, SourceEntry, parent="mon_loc_id", keys=("source_name",))
+        self.sensors = TableIndex(MonitoringSensor, SensorEntry, parent="mon_source_id", keys=("sensor_name", "sensor_group_id"))
+        self.fields = TableIndex(MonitoringSensorField, FieldEntry, parent="sensor_id", keys=("field_name",))
+        self.groups = TableIndex(MonitoringGroup, GroupEntry, parent="mon_loc_id")
+        self.tables: Dict[str, TableIndex] = {
+            index.model.__tablename__: index
+            for index in (self.projects, self.locations, self.sources, self.sensors, self.fields, self.groups)
+        }
+        self.version: Optional[int] = None
+        self.live = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- loading ---------------------------------------------------------
+
+    def load(self, db: Session) -> None:
+        """Replace every table with a fresh read."""
+        version = _current_version(db)
+        rows = {name: index.fetch(db) for name, index in self.tables.items()}
+        with self._lock:
+            for name, index in self.tables.items():
+                index.clear()
+                for row in rows[name]:
+                    index.put(row)
+            self.version = version
+
+    def apply(self, db: Session, changes: Dict[str, Set[UUID]]) -> None:
+        """Re-read the rows named in ``changes`` (table -> ids); ids no longer found are dropped."""
+        version = _current_version(db)
+        fetched = {
+            name: self.tables[name].fetch(db, ids)
+            for name, ids in changes.items() if name in self.tables and ids
+        }
+        with self._lock:
+            for name, rows in fetched.items():
+                index = self.tables[name]
+                for id in changes[name]:
+                    index.remove(id)
+                for row in rows:
+                    index.put(row)
+            self.version = version
+
+    # -- lookups ---------------------------------------------------------
+
+    def sensor_sources(self, db: Session, sensor_ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+        """``sensor_id -> mon_source_id`` for the sensors that exist."""
+        return self._parents(db, self.sensors, sensor_ids)
+
+    def field_sensors(self, db: Session, field_ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+        """``field_id -> sensor_id`` for the fields that exist."""
+        return self._parents(db, self.fields, field_ids)
+
+    def _parents(self, db: Session, index: TableIndex, ids: Iterable[UUID]) -> Dict[UUID, UUID]:
+        ids = set(ids)
+        found: Dict[UUID, UUID] = {}
+        if self.live:
+            for id in ids:
+                entry = index.get(id)
+                if entry is not None:
+                    found[id] = getattr(entry, index.parent)
+        # rows created a moment ago may not have been announced yet
+        missing = ids - found.keys()
+        if missing:
+            found.update(
+                db.query(index.model.id, getattr(index.model, index.parent))
+                  .filter(index.model.id.in_(list(missing)))
+                  .all()
+            )
+        return found
+
+    def resolve_field_ids(
+        self,
+        *,
+        project_id: Optional[UUID] = None,
+        project_number: Optional[str] = None,
+        location_id: Optional[UUID] = None,
+        location_number: Optional[str] = None,
+        sensor_id: Optional[UUID] = None,
+        sensor_name: Optional[str] = None,
+        sensor_type: Optional[str] = None,
+        sensor_group_id: Optional[UUID] = None,
+        source_ids: Optional[List[UUID]] = None,
+        source_names: Optional[List[str]] = None,
+        field_name: Optional[str] = None,
+    ) -> Optional[Set[UUID]]:
+        """Sensor field ids matching the metadata filters of a sensor-data query.
+
+        Same semantics as filtering the joined tables in SQL (falsy filters
+        are ignored). Returns None when the registry is not live, when no
+        filter narrows the search or when the result is too large to be
+        worth sending as an id list.
+        """
+        if not self.live:
+            return None
+        with self._lock:
+            candidates = self._candidate_sensors(
+                project_id, project_number, location_id, location_number,
+                sensor_id, sensor_name, sensor_group_id, source_ids, source_names,
+            )
+            if candidates is None:
+                return None
+            source_ids = set(source_ids or ())
+            source_names = set(source_names or ())
+            field_ids: Set[UUID] = set()
+            for sid in candidates:
+                sensor = self.sensors.get(sid)
+                source = sensor and self.sources.get(sensor.mon_source_id)
+                location = source and self.locations.get(source.mon_loc_id)
+                project = location and self.projects.get(location.project_id)
+                if project is None:
+                    continue  # broken chain: the SQL inner joins would drop it too
+                if (
+                    (project_id and project.id != project_id)
+                    or (project_number and project.project_number != project_number)
+                    or (location_id and location.id != location_id)
+                    or (location_number and location.loc_number != location_number)
+                    or (sensor_id and sensor.id != sensor_id)
+                    or (sensor_name and sensor.sensor_name != sensor_name)
+                    or (sensor_type and sensor.sensor_type != sensor_type)
+                    or (sensor_group_id and sensor.sensor_group_id != sensor_group_id)
+                    or (source_ids and source.id not in source_ids)
+                    or (source_names and source.source_name not in source_names)
+                ):
+                    continue
+                for fid in self.fields.children(sid):
+                    if not field_name or self.fields.get(fid).field_name == field_name:
+                        field_ids.add(fid)
+                if len(field_ids) > MAX_RESOLVED_IDS:
+                    return None
+            return field_ids
+
+    def _candidate_sensors(
+        self, project_id, project_number, location_id, location_number,
+        sensor_id, sensor_name, sensor_group_id, source_ids, source_names,
+    ) -> Optional[Set[UUID]]:
+        """The sensors reachable from the most selective filter given, or None."""
+        if sensor_id:
+            return {sensor_id}
+        if sensor_name:
+            return set(self.sensors.find("sensor_name", sensor_name))
+        if sensor_group_id:
+            return set(self.sensors.find("sensor_group_id", sensor_group_id))
+        if source_ids or source_names:
+            sources = set(source_ids or ()) | {s for name in source_names or () for s in self.sources.find("source_name", name)}
+        else:
+            if location_id or location_number:
+                locations = {location_id} if location_id else set(self.locations.find("loc_number", location_number))
+            elif project_id or project_number:
+                projects = {project_id} if project_id else set(self.projects.find("project_number", project_number))
+                locations = {l for p in projects for l in self.locations.children(p)}
+            else:
+                return None
+            sources = {s for l in locations for s in self.sources.children(l)}
+        return {sensor for s in sources for sensor in self.sensors.children(s)}
+
+    # -- listener --------------------------------------------------------
+
+    def start(self, retry_sec: float = 5.0) -> None:
+        """Load and follow changes on a daemon thread; returns immediately."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_loop, args=(retry_sec,), name="metadata-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.live = False
+
+    def _listen_loop(self, retry_sec: float) -> None:
+        from app.config.database import SessionLocal, engine
+
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                raw.detach()  # held for good: keep it out of the pool
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                # LISTEN first, so nothing committed after the load is missed
+                with SessionLocal() as db:
+                    if self.version is None or _current_version(db) != self.version:
+                        self.load(db)
+                self.live = True
+                print(f"[Metadata] registry live at version {self.version}")
+                while not self._stop.is_set():
+                    if select_module.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    changes: Dict[str, Set[UUID]] = defaultdict(set)
+                    while conn.notifies:
+                        table, _, id = conn.notifies.pop(0).payload.partition(":")
+                        changes[table].add(UUID(id))
+                    if changes:
+                        with SessionLocal() as db:
+                            self.apply(db, changes)
+            except Exception as e:
+                print("[Metadata] registry listener failed:", e)
+            finally:
+                self.live = False
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+            self._stop.wait(retry_sec)
+
+
+def _current_version(db: Session) -> Optional[int]:
+    return db.execute(text(f"SELECT last_value FROM {VERSION_SEQUENCE}")).scalar()
+
+
+metadata_registry = MetadataRegistry()
+
+
+def start_registry() -> None:
+    if get_settings().METADATA_REGISTRY_ENABLED:
+        metadata_registry.start()
+
+
+def stop_registry() -> None:
+    metadata_registry.stop()
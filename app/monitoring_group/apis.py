@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_params
+from app.common.types import PageParams
 from app.monitoring_group import schemas, selectors, services
 
 router = APIRouter(prefix="/monitoring-groups", tags=["Monitoring Groups"])
@@ -14,13 +15,13 @@ router = APIRouter(prefix="/monitoring-groups", tags=["Monitoring Groups"])
 )
 def list_location_monitoring_groups(
     location_id: UUID,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    return selectors.get_location_monitoring_groups(
-        db, location_id=location_id, skip=skip, limit=limit
-    )
+    groups = selectors.get_location_monitoring_groups(db, location_id=location_id, page=page)
+    groups.apply(response)
+    return groups.items
 
 @router.get("/{group_id}", response_model=schemas.MonitoringGroup)
 def get_monitoring_group(group_id: UUID, db: Session = Depends(get_db)):
@@ -55,8 +56,10 @@ def create_monitoring_group(
 
 @router.get("/", response_model=List[schemas.MonitoringGroup])
 def list_monitoring_groups(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    return selectors.get_monitoring_groups(db, skip=skip, limit=limit)
+    groups = selectors.get_monitoring_groups(db, page)
+    groups.apply(response)
+    return groups.items
@@ -23,5 +23,5 @@ class MonitoringGroup(DBBase):
         back_populates="mon_loc_groups"
     )
 
-    mon_sensors = relationship(MonitoringSensor, back_populates="mon_loc_group", lazy="selectin")
+    mon_sensors = relationship(MonitoringSensor, back_populates="mon_loc_group", lazy="raise_on_sql", passive_deletes=True)
 
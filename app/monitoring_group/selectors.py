@@ -1,14 +1,18 @@
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.orm import Session
 from uuid import UUID
+from app.common.paginators import Keyset, Page
+from app.common.types import PageParams
 from app.monitoring_group.models import MonitoringGroup
 
+GROUP_KEYSET = Keyset(MonitoringGroup.group_name, MonitoringGroup.id)
+
 
 def get_monitoring_group(db: Session, group_id: UUID) -> Optional[MonitoringGroup]:
     return db.query(MonitoringGroup).filter(MonitoringGroup.id == group_id).first()
 
-def get_monitoring_groups(db: Session, skip: int = 0, limit: int = 100) -> List[MonitoringGroup]:
-    return db.query(MonitoringGroup).offset(skip).limit(limit).all()
+def get_monitoring_groups(db: Session, page: PageParams) -> Page:
+    return GROUP_KEYSET.paginate(db.query(MonitoringGroup), page)
 
-def get_location_monitoring_groups(db: Session, location_id: UUID, skip: int = 0, limit: int = 100) -> List[MonitoringGroup]:
-    return db.query(MonitoringGroup).filter(MonitoringGroup.mon_loc_id == location_id).offset(skip).limit(limit).all()
\ No newline at end of file
+def get_location_monitoring_groups(db: Session, location_id: UUID, page: PageParams) -> Page:
+    return GROUP_KEYSET.paginate(db.query(MonitoringGroup).filter(MonitoringGroup.mon_loc_id == location_id), page)
\ No newline at end of file
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from uuid import UUID
 from app.monitoring_group import schemas, selectors
 from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
 
 
 def create_monitoring_group(db: Session, payload: schemas.MonitoringGroupCreate) -> MonitoringGroup:
@@ -26,5 +27,9 @@ def update_monitoring_group(db: Session, group_id: UUID, payload: schemas.Monito
 def delete_monitoring_group(db: Session, group_id: UUID) -> None:
     obj = selectors.get_monitoring_group(db, group_id)
     if obj:
+        # sensors outlive their group; mon_sensors is not loaded, so detach them here
+        db.query(MonitoringSensor).filter(MonitoringSensor.sensor_group_id == group_id).update(
+            {"sensor_group_id": None}, synchronize_session=False
+        )
         db.delete(obj)
         db.commit()
\ No newline at end of file
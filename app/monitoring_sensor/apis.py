@@ -3,8 +3,10 @@ from typing import List, Any
 from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_params
+from app.common.types import PageParams
 from app.monitoring_sensor import schemas, selectors, services
+from app.monitoring_source import selectors as source_selectors
 from app.monitoring_sensor_fields import schemas as field_schemas, selectors as field_selectors, services as field_services
 
 router = APIRouter(prefix="/monitoring-sensors", tags=["Monitoring Sensors"])
@@ -31,13 +33,24 @@ def create_monitoring_sensor(
             return services.enrich_sensor(obj)
         raise
 
+@router.post("/bulk", response_model=schemas.MonitoringSensorBulkResult)
+def bulk_upsert_monitoring_sensors(
+    payload: schemas.MonitoringSensorBulkUpsert,
+    db: Session = Depends(get_db),
+):
+    source_ids = {s.mon_source_id for s in payload.sensors}
+    missing = source_ids - source_selectors.get_existing_source_ids(db, source_ids)
+    if missing:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Source not found: {', '.join(sorted(map(str, missing)))}")
+    return services.bulk_upsert_monitoring_sensors(db, payload.sensors)
+
 @router.get("/", response_model=List[schemas.MonitoringSensor])
 def list_monitoring_sensors(
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sensors = selectors.get_monitoring_sensors(db, skip=skip)
-    return [services.enrich_sensor(s) for s in sensors]
+    sensors = selectors.get_monitoring_sensor_rows(db, page)
+    return sensors.apply(selectors.SENSOR_ROW.response(sensors.items))
 
 @router.get("/{sensor_id}", response_model=schemas.MonitoringSensor)
 def get_monitoring_sensor(sensor_id: UUID, db: Session = Depends(get_db)):
@@ -102,6 +115,18 @@ def create_sensor_field(
         raise
 
 
+@router.post("/fields/bulk", response_model=field_schemas.MonitoringSensorFieldBulkResult)
+def bulk_upsert_sensor_fields(
+    payload: field_schemas.MonitoringSensorFieldBulkUpsert,
+    db: Session = Depends(get_db),
+):
+    sensor_ids = {f.sensor_id for f in payload.fields}
+    missing = sensor_ids - selectors.get_existing_sensor_ids(db, sensor_ids)
+    if missing:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Sensor not found: {', '.join(sorted(map(str, missing)))}")
+    return field_services.bulk_upsert_sensor_fields(db, payload.fields)
+
+
 @router.get("/{sensor_id}/fields", response_model=List[field_schemas.MonitoringSensorField])
 def list_sensor_fields(sensor_id: UUID, db: Session = Depends(get_db)):
     return field_selectors.get_sensor_fields(db, sensor_id)
@@ -1,6 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from app.monitoring_sensor_fields.schemas import MonitoringSensorField, MonitoringSensorFieldName
+from app.monitoring_sensor_fields.schemas import (
+    MAX_BULK_UPSERT,
+    MonitoringSensorField,
+    MonitoringSensorFieldName,
+    UpsertStatus,
+)
 from uuid import UUID
 from datetime import datetime
 
@@ -49,4 +54,23 @@ class MonitoringSensorName(BaseModel):
 
 
 class MonitoringSensorNameWithFields(MonitoringSensorName):
-    fields: List[MonitoringSensorFieldName] = Field(default_factory=list)
\ No newline at end of file
+    fields: List[MonitoringSensorFieldName] = Field(default_factory=list)
+
+
+# Bulk upsert, keyed on (mon_source_id, sensor_name)
+class MonitoringSensorBulkUpsert(BaseModel):
+    sensors: List[MonitoringSensorCreate] = Field(..., min_length=1, max_length=MAX_BULK_UPSERT)
+
+
+class MonitoringSensorUpsertResult(BaseModel):
+    id: UUID
+    mon_source_id: UUID
+    sensor_name: str
+    status: UpsertStatus
+
+
+class MonitoringSensorBulkResult(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    items: List[MonitoringSensorUpsertResult]
@@ -1,7 +1,32 @@
-from typing import List, Optional
+from typing import Optional, Set
 from sqlalchemy.orm import Session, joinedload
 from uuid import UUID
+from app.common.paginators import Keyset, Page
+from app.common.projections import Projection
+from app.common.types import PageParams
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor import schemas
 from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_source.models import Source
+
+# the columns behind schemas.MonitoringSensor, for the list endpoints
+SENSOR_ROW = Projection(schemas.MonitoringSensor, {
+    "id": MonitoringSensor.id,
+    "mon_source_id": MonitoringSensor.mon_source_id,
+    "sensor_group_id": MonitoringSensor.sensor_group_id,
+    "sensor_name": MonitoringSensor.sensor_name,
+    "sensor_type": MonitoringSensor.sensor_type,
+    "active": MonitoringSensor.active,
+    "created_at": MonitoringSensor.created_at,
+    "last_updated": MonitoringSensor.last_updated,
+    "source_name": Source.source_name,
+    "details": {
+        "mon_source_name": Source.source_name,
+        "group_name": MonitoringGroup.group_name,
+    },
+})
+SENSOR_KEYSET = Keyset(MonitoringSensor.sensor_name, MonitoringSensor.id)
 
 
 def get_monitoring_sensor(
@@ -18,16 +43,35 @@ def get_monitoring_sensor(
 
 def get_monitoring_sensors(
     db: Session,
-    skip: int = 0,
-) -> List[MonitoringSensor]:
-    return (
+    page: PageParams,
+) -> Page:
+    qs = (
         db.query(MonitoringSensor)
           # same eager-load on the list endpoint
           .options(joinedload(MonitoringSensor.mon_source), joinedload(MonitoringSensor.mon_loc_group))
-          .order_by(MonitoringSensor.sensor_name)
-          .offset(skip)
-          .all()
     )
+    return SENSOR_KEYSET.paginate(qs, page)
+
+def get_monitoring_sensor_rows(
+    db: Session,
+    page: PageParams,
+    project_id: Optional[UUID] = None,
+    loc_id: Optional[UUID] = None,
+    source_id: Optional[UUID] = None,
+) -> Page:
+    qs = (
+        db.query(*SENSOR_ROW.columns)
+          .join(Source, Source.id == MonitoringSensor.mon_source_id)
+          .outerjoin(MonitoringGroup, MonitoringGroup.id == MonitoringSensor.sensor_group_id)
+    )
+    if project_id is not None:
+        qs = qs.join(Location, Location.id == Source.mon_loc_id).filter(Location.project_id == project_id)
+    if loc_id is not None:
+        qs = qs.filter(Source.mon_loc_id == loc_id)
+    if source_id is not None:
+        qs = qs.filter(MonitoringSensor.mon_source_id == source_id)
+    result = SENSOR_KEYSET.paginate(qs, page)
+    return result._replace(items=SENSOR_ROW.rows(result.items))
 
 def get_monitoring_sensor_by_name(
     db: Session,
@@ -54,4 +98,7 @@ def get_sensor_by_source_and_name(
               MonitoringSensor.sensor_name == sensor_name,
           )
           .first()
-    )
\ No newline at end of file
+    )
+
+def get_existing_sensor_ids(db: Session, sensor_ids: Set[UUID]) -> Set[UUID]:
+    return {row[0] for row in db.query(MonitoringSensor.id).filter(MonitoringSensor.id.in_(list(sensor_ids)))}
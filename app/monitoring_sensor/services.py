@@ -1,13 +1,16 @@
 # File: app/monitoring_sensor/services.py
 
-from typing import Optional, List
+import uuid
+from collections import Counter
+from typing import List, Optional
 from uuid import UUID
-from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.orm import Session
+from app.common.paginators import Page
+from app.common.types import PageParams
+from app.common.upserts import upsert_returning_ids
 from app.monitoring_sensor import schemas, selectors
 from app.monitoring_sensor.models import MonitoringSensor
 from app.monitoring_source import services as source_services
-from app.monitoring_source.models import Source
-from app.location.models import Location
 
 def create_monitoring_sensor(db: Session, payload: schemas.MonitoringSensorCreate) -> MonitoringSensor:
     obj = MonitoringSensor(**payload.dict())
@@ -18,6 +21,33 @@ def create_monitoring_sensor(db: Session, payload: schemas.MonitoringSensorCreat
     source_services.touch_source(db, obj.mon_source_id)
     return obj
 
+def bulk_upsert_monitoring_sensors(db: Session, sensors: List[schemas.MonitoringSensorCreate]) -> dict:
+    """Create or update sensors by ``(mon_source_id, sensor_name)`` in one transaction.
+
+    Every source that gained or changed a sensor is touched once.
+    """
+    results = upsert_returning_ids(
+        db,
+        MonitoringSensor.__table__,
+        [dict(s.dict(), id=uuid.uuid4()) for s in sensors],
+        keys=("mon_source_id", "sensor_name"),
+        updates=("sensor_group_id", "sensor_type", "active"),
+    )
+    changed = {source_id for (source_id, _), (_, status) in results.items() if status != "unchanged"}
+    if changed:
+        source_services.touch_sources(db, changed)
+    db.commit()
+    counts = Counter(status for _, status in results.values())
+    return {
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "unchanged": counts["unchanged"],
+        "items": [
+            {"id": id, "mon_source_id": source_id, "sensor_name": name, "status": status}
+            for (source_id, name), (id, status) in results.items()
+        ],
+    }
+
 def update_monitoring_sensor(db: Session, sensor_id: UUID, payload: schemas.MonitoringSensorUpdate) -> Optional[MonitoringSensor]:
     obj = selectors.get_monitoring_sensor(db, sensor_id)
     if not obj:
@@ -37,46 +67,23 @@ def delete_monitoring_sensor(db: Session, sensor_id: UUID) -> None:
 def list_sensors_for_project(
     db: Session,
     project_id: UUID,
-    skip: int = 0,
-) -> List[MonitoringSensor]:
-    return (
-        db.query(MonitoringSensor)
-          .join(Source, MonitoringSensor.mon_source_id == Source.id)
-          .join(Location, Source.mon_loc_id == Location.id)
-          .filter(Location.project_id == project_id)
-          .order_by(MonitoringSensor.sensor_name)
-          .offset(skip)
-          .all()
-    )
+    page: PageParams,
+) -> Page:
+    return selectors.get_monitoring_sensor_rows(db, page, project_id=project_id)
 
 def list_sensors_for_location(
     db: Session,
     loc_id: UUID,
-    skip: int = 0,
-) -> List[MonitoringSensor]:
-    return (
-        db.query(MonitoringSensor)
-          .join(MonitoringSensor.mon_source)
-          .join(Source.mon_loc)
-          .filter(Location.id == loc_id)
-          .options(contains_eager(MonitoringSensor.mon_source))
-          .order_by(MonitoringSensor.sensor_name)
-          .offset(skip)
-          .all()
-    )
+    page: PageParams,
+) -> Page:
+    return selectors.get_monitoring_sensor_rows(db, page, loc_id=loc_id)
 
 def list_sensors_for_source(
     db: Session,
     source_id: UUID,
-    skip: int = 0,
-) -> List[MonitoringSensor]:
-    return (
-        db.query(MonitoringSensor)
-          .filter(MonitoringSensor.mon_source_id == source_id)
-          .order_by(MonitoringSensor.sensor_name)
-          .offset(skip)
-          .all()
-    )
+    page: PageParams,
+) -> Page:
+    return selectors.get_monitoring_sensor_rows(db, page, source_id=source_id)
 
 def get_monitoring_sensor_by_name(
     db: Session,
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit, page_params
+from app.common.types import PageParams
 from app.monitoring_sensor_alert import schemas, selectors, services
 
 router = APIRouter(prefix="/monitoring-sensor-alerts", tags=["Monitoring Sensor Alerts"])
@@ -16,11 +18,90 @@ def create_monitoring_sensor_alert(
 
 @router.get("/", response_model=List[schemas.MonitoringSensorAlert])
 def list_monitoring_sensor_alerts(
+    response: Response,
+    sensor_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    alert_type: Optional[str] = None,
+    active: Optional[int] = None,
+    acknowledged: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    alerts = selectors.get_monitoring_sensor_alerts(
+        db,
+        page,
+        sensor_id=sensor_id,
+        project_id=project_id,
+        location_id=location_id,
+        alert_type=alert_type,
+        active=active,
+        acknowledged=acknowledged,
+        since=since,
+        until=until,
+    )
+    alerts.apply(response)
+    return alerts.items
+
+@router.get("/summary", response_model=List[schemas.ProjectAlertSummary])
+def summarize_active_monitoring_sensor_alerts(
+    project_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+):
+    return selectors.get_active_alert_summary(db, project_id=project_id)
+
+@router.post("/bulk", response_model=schemas.MonitoringSensorAlertBulkResult)
+def bulk_update_monitoring_sensor_alerts(
+    payload: schemas.MonitoringSensorAlertBulkAction,
+    db: Session = Depends(get_db),
+):
+    if not (payload.ids or payload.sensor_id or payload.alert_type or payload.fingerprint):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Select alerts by ids, sensor_id, alert_type or fingerprint")
+    updated = services.bulk_update_monitoring_sensor_alerts(db, payload)
+    return {"action": payload.action, "updated": updated}
+
+# Alert rules (declared before /{alert_id} so "rules" is not parsed as an alert id)
+@router.post("/rules", response_model=schemas.MonitoringSensorAlertRule, status_code=status.HTTP_201_CREATED)
+def create_monitoring_sensor_alert_rule(
+    payload: schemas.MonitoringSensorAlertRuleCreate,
+    db: Session = Depends(get_db),
+):
+    return services.create_monitoring_sensor_alert_rule(db, payload)
+
+@router.get("/rules", response_model=List[schemas.MonitoringSensorAlertRule])
+def list_monitoring_sensor_alert_rules(
+    sensor_field_id: Optional[UUID] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
     db: Session = Depends(get_db),
 ):
-    return selectors.get_monitoring_sensor_alerts(db, skip=skip, limit=limit)
+    return selectors.get_monitoring_sensor_alert_rules(db, sensor_field_id=sensor_field_id, skip=skip, limit=limit)
+
+@router.get("/rules/{rule_id}", response_model=schemas.MonitoringSensorAlertRule)
+def get_monitoring_sensor_alert_rule(rule_id: UUID, db: Session = Depends(get_db)):
+    obj = selectors.get_monitoring_sensor_alert_rule(db, rule_id)
+    if not obj:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "MonitoringSensorAlertRule not found")
+    return obj
+
+@router.patch("/rules/{rule_id}", response_model=schemas.MonitoringSensorAlertRule)
+def update_monitoring_sensor_alert_rule(
+    rule_id: UUID,
+    payload: schemas.MonitoringSensorAlertRuleUpdate,
+    db: Session = Depends(get_db),
+):
+    obj = services.update_monitoring_sensor_alert_rule(db, rule_id, payload)
+    if not obj:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "MonitoringSensorAlertRule not found")
+    return obj
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_monitoring_sensor_alert_rule(rule_id: UUID, db: Session = Depends(get_db)):
+    if not selectors.get_monitoring_sensor_alert_rule(db, rule_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "MonitoringSensorAlertRule not found")
+    services.delete_monitoring_sensor_alert_rule(db, rule_id)
 
 @router.get("/{alert_id}", response_model=schemas.MonitoringSensorAlert)
 def get_monitoring_sensor_alert(alert_id: UUID, db: Session = Depends(get_db)):
@@ -35,10 +116,13 @@ def update_monitoring_sensor_alert(
     payload: schemas.MonitoringSensorAlertUpdate,
     db: Session = Depends(get_db),
 ):
-    obj = services.update_monitoring_sensor_alert(db, alert_id, payload)
+    obj = selectors.get_monitoring_sensor_alert(db, alert_id)
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "MonitoringSensorAlert not found")
-    return obj
+    duplicate = services.open_duplicate_alert(db, obj, payload)
+    if duplicate is not None:
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Alert {duplicate.id} is already open for this sensor and type")
+    return services.update_monitoring_sensor_alert(db, alert_id, payload)
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_monitoring_sensor_alert(alert_id: UUID, db: Session = Depends(get_db)):
@@ -0,0 +1,259 @@
+"""Evaluate alert rules against freshly ingested readings.
+
+Readings arrive as per-field series, the shape the ingest paths already use.
+The ``RuleIndex`` hands back the compiled rules of a field; their derived
+values are computed as one ``(rules, readings)`` matrix and the hysteresis
+state machine is resolved with a forward fill along each row. Only the (rare)
+alarm starts and ends are looped over, to apply suppression to the starts.
+The triggers and clears are handed to ``record_alerts``, which folds repeats
+of an open incident into it and resolves it when its alarm clears.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.monitoring_sensor_alert.models import MonitoringSensorAlertRule
+from app.monitoring_sensor_alert.rule_index import (
+    BASELINE_DEVIATION, RULE_TYPES, THRESHOLD, FieldRules, RuleIndex, rule_index,
+)
+from app.monitoring_sensor_alert.services import record_alerts
+
+# (mon_loc_id, sensor_id, sensor_field_id, timestamps, values), as for copy_sensor_data
+Series = Tuple[UUID, UUID, UUID, np.ndarray, np.ndarray]
+
+def _epoch_seconds(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.astype("datetime64[us]").astype(np.int64) / 1e6
+
+
+def _seconds(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else np.nan
+
+
+def _datetime(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def alarm_transitions(
+    derived: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    hysteresis: np.ndarray,
+    in_alarm: np.ndarray,
+) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray], np.ndarray]:
+    """Resolve the alarm state of ``k`` rules over ``n`` readings at once.
+
+    ``derived`` is ``(k, n)``, the other arrays hold one value per rule. A
+    value outside ``[lower, upper]`` sets the alarm, a value inside the bounds
+    shrunk by ``hysteresis`` clears it, anything else (including NaN) keeps
+    the previous state. Returns the (rule, reading) indices of every alarm
+    start, those of every alarm end, and the state of each rule after the
+    last reading.
+    """
+    lo, hi, h = lower[:, None], upper[:, None], hysteresis[:, None]
+    breach = (derived < lo) | (derived > hi)
+    clear = (derived >= lo + h) & (derived <= hi - h)
+    event = np.where(breach, 1, np.where(clear, -1, 0)).astype(np.int8)
+
+    # forward fill the last set/clear event along each row to get the state after every reading
+    last_event = np.where(event != 0, np.arange(derived.shape[1]), -1)
+    np.maximum.accumulate(last_event, axis=1, out=last_event)
+    filled = np.take_along_axis(event, np.maximum(last_event, 0), axis=1) > 0
+    state = np.where(last_event >= 0, filled, in_alarm[:, None])
+    previous = np.concatenate((in_alarm[:, None], state[:, :-1]), axis=1)
+    return np.nonzero(state & ~previous), np.nonzero(~state & previous), state[:, -1]
+
+
+def derived_matrix(
+    rules: FieldRules,
+    times: np.ndarray,
+    values: np.ndarray,
+    baseline: float,
+    last_time: np.ndarray,
+    last_value: np.ndarray,
+) -> np.ndarray:
+    """``(rules, readings)`` matrix of the values each rule bounds.
+
+    Readings at or before a rule's ``last_time`` are NaN, so they leave its
+    state alone; the first newer reading of a rate rule is compared with the
+    rule's ``last_value``.
+    """
+    n = len(times)
+    first = np.searchsorted(times, last_time, side="right")
+    first[np.isnan(last_time)] = 0  # never evaluated (NaN would sort past the end)
+    rows = np.arange(len(first))
+    newer = np.arange(n)[None, :] >= first[:, None]
+
+    # per hour; the previous reading is the one before in the series, or the rule's last one
+    prev_value = np.tile(np.concatenate(([np.nan], values[:-1])), (len(first), 1))
+    prev_time = np.tile(np.concatenate(([np.nan], times[:-1])), (len(first), 1))
+    starts = first < n
+    prev_value[rows[starts], first[starts]] = last_value[starts]
+    prev_time[rows[starts], first[starts]] = last_time[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (values - prev_value) / (times - prev_time) * 3600.0
+
+    kinds = rules.kinds[:, None]
+    derived = np.where(
+        kinds == THRESHOLD, values,
+        np.where(kinds == BASELINE_DEVIATION, values - baseline, rate),
+    )
+    derived[~newer | ~np.isfinite(derived)] = np.nan
+    return derived
+
+
+def _message(rules: FieldRules, r: int, value: float) -> str:
+    if rules.messages[r]:
+        return rules.messages[r]
+    lower = None if np.isinf(rules.lower[r]) else float(rules.lower[r])
+    upper = None if np.isinf(rules.upper[r]) else float(rules.upper[r])
+    return f"{RULE_TYPES[rules.kinds[r]]} {value:.6g} outside [{lower}, {upper}]"
+
+
+def _rule_states(db: Session, rule_ids: List[UUID]):
+    return (
+        db.query(
+            MonitoringSensorAlertRule.id,
+            MonitoringSensorAlertRule.in_alarm,
+            MonitoringSensorAlertRule.last_value,
+            MonitoringSensorAlertRule.last_timestamp,
+            MonitoringSensorAlertRule.last_triggered_at,
+            MonitoringSensorAlertRule.last_updated,
+        )
+        .filter(MonitoringSensorAlertRule.id.in_(rule_ids))
+        .all()
+    )
+
+
+def merge_series(series: Iterable[Series]) -> List[Series]:
+    """One series per field: the parts of a field (e.g. one per file of a COPY batch) concatenated.
+
+    Readings are sorted later; a timestamp given twice keeps its later copy,
+    as the sensor data upsert does.
+    """
+    parts: Dict[UUID, List[Series]] = {}
+    for s in series:
+        if len(s[3]):
+            parts.setdefault(s[2], []).append(s)
+    return [
+        group[0] if len(group) == 1 else (
+            group[0][0],
+            group[0][1],
+            field_id,
+            np.concatenate([p[3].astype("datetime64[us]") for p in group]),
+            np.concatenate([np.asarray(p[4], dtype=float) for p in group]),
+        )
+        for field_id, group in parts.items()
+    ]
+
+
+def evaluate_series(db: Session, series: Iterable[Series], index: Optional[RuleIndex] = None) -> List[Dict[str, Any]]:
+    """Run the active rules of every field in ``series`` and record the alerts they raise.
+
+    Rules are looked up in the in-memory ``RuleIndex``, so fields without
+    rules cost a dict lookup and no query; only the evaluation state of the
+    matched rules is read. Several series of one field are merged first, so
+    each rule runs once from its stored state. Only readings newer than a
+    rule's ``last_timestamp`` are evaluated, so re-ingested or back-filled
+    data does not alert twice. An alarm that clears resolves its open alert.
+    The caller owns the transaction.
+    """
+    index = rule_index if index is None else index
+    index.refresh(db)
+    # fields without rules are dropped before any merging
+    merged = merge_series(s for s in series if index.lookup(s[2]) is not None)
+    matched = [(s, index.lookup(s[2])) for s in merged]
+    matched = [(s, rules) for s, rules in matched if rules is not None]  # another thread may have refreshed
+    if not matched:
+        return []
+    states = {row.id: row for row in _rule_states(db, [i for _, rules in matched for i in rules.rule_ids])}
+
+    alerts: List[Dict[str, Any]] = []
+    clears: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for (_, sensor_id, field_id, timestamps, values), rules in matched:
+        finite = np.isfinite(values)
+        times, values = _epoch_seconds(timestamps[finite]), values[finite]
+        if not len(times):
+            continue
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        last_copy = np.append(times[1:] != times[:-1], True)
+        times, values = times[last_copy], values[last_copy]
+
+        # rules deleted since the index refreshed have no state row and are skipped
+        state_rows = [states.get(rule_id) for rule_id in rules.rule_ids]
+        known = np.array([row is not None for row in state_rows])
+        last_time = np.array([_seconds(row.last_timestamp) if row is not None else np.inf for row in state_rows])
+        last_value = np.array([
+            row.last_value if row is not None and row.last_value is not None else np.nan for row in state_rows
+        ])
+        in_alarm = np.array([bool(row.in_alarm) if row is not None else False for row in state_rows])
+        last_triggered = np.array([_seconds(row.last_triggered_at) if row is not None else np.nan for row in state_rows])
+
+        derived = derived_matrix(rules, times, values, index.baseline(sensor_id, field_id), last_time, last_value)
+        starts, ends, final = alarm_transitions(derived, rules.lower, rules.upper, rules.hysteresis, in_alarm)
+        for r, i in zip(*(a.tolist() for a in ends)):
+            clears.append({
+                "sensor_id": sensor_id,
+                "rule_id": rules.rule_ids[r],
+                "alert_type": RULE_TYPES[rules.kinds[r]],
+                "resolved_at": _datetime(times[i]),
+            })
+        for r, i in zip(*(a.tolist() for a in starts)):
+            if times[i] - last_triggered[r] < rules.suppress_seconds[r]:
+                continue  # NaN (never triggered) compares False, so it alerts
+            last_triggered[r] = times[i]
+            alerts.append({
+                "sensor_id": sensor_id,
+                "rule_id": rules.rule_ids[r],
+                "alert_type": RULE_TYPES[rules.kinds[r]],
+                "message": _message(rules, r, float(derived[r, i])),
+                "triggered_at": _datetime(times[i]),
+            })
+
+        updated = known & ~(times[-1] <= last_time)  # NaN last_time: never evaluated
+        for r in np.flatnonzero(updated).tolist():
+            row = state_rows[r]
+            updates.append({
+                "id": row.id,
+                "in_alarm": bool(final[r]),
+                "last_value": float(values[-1]),
+                "last_timestamp": _datetime(times[-1]),
+                "last_triggered_at": _datetime(last_triggered[r]) if not np.isnan(last_triggered[r]) else None,
+                # evaluation state is not a rule change; keep the RuleIndex refresh watermark still
+                "last_updated": row.last_updated,
+            })
+
+    if updates:
+        db.execute(update(MonitoringSensorAlertRule), updates)
+    return record_alerts(db, alerts, clears)
+
+
+def series_from_rows(rows: Iterable[Dict[str, Any]]) -> List[Series]:
+    """Group ``mon_sensor_data`` row dicts into per-field series."""
+    grouped: Dict[UUID, Tuple[UUID, UUID, List[datetime], List[float]]] = {}
+    for row in rows:
+        entry = grouped.setdefault(row["sensor_field_id"], (row["mon_loc_id"], row["sensor_id"], [], []))
+        entry[2].append(row["timestamp"])
+        entry[3].append(row["data"])
+    return [
+        (
+            mon_loc_id,
+            sensor_id,
+            field_id,
+            np.array([_as_utc(ts) for ts in timestamps], dtype="datetime64[us]"),
+            np.asarray(values, dtype=float),
+        )
+        for field_id, (mon_loc_id, sensor_id, timestamps, values) in grouped.items()
+    ]
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -1,16 +1,87 @@
-from sqlalchemy import Column, Text, Integer, DateTime, text, ForeignKey
+import hashlib
+
+from sqlalchemy import Column, Text, Integer, Float, Boolean, DateTime, Index, text, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from app.config.database import DBBase
 
+
+def alert_fingerprint(sensor_id, alert_type, rule_id=None) -> str:
+    """Identity shared by the repeat triggers of one incident."""
+    return hashlib.sha256(f"{sensor_id}:{alert_type}:{rule_id or ''}".encode()).hexdigest()
+
+
+def _default_fingerprint(context) -> str:
+    params = context.get_current_parameters()
+    return alert_fingerprint(params["sensor_id"], params["alert_type"], params.get("rule_id"))
+
+
 class MonitoringSensorAlert(DBBase):
+    """One incident: the triggers of a (sensor, type, rule) ``fingerprint``
+    that kept coming without a quiet period longer than the dedup window.
+
+    Repeat triggers bump ``occurrences`` and ``last_seen`` instead of adding
+    rows; at most one alert per fingerprint is open (``active = 1``).
+    """
     __tablename__ = "mon_sensor_alerts"
 
+    __table_args__ = (
+        Index(
+            "uq_mon_sensor_alerts_open_fingerprint", "fingerprint", unique=True,
+            postgresql_where=text("active = 1"), sqlite_where=text("active = 1"),
+        ),
+        # list filters; each ends in (triggered_at, id) for keyset pages
+        Index("ix_mon_sensor_alerts_triggered_at", "triggered_at", "id"),
+        Index("ix_mon_sensor_alerts_sensor_triggered_at", "sensor_id", "triggered_at", "id"),
+        Index("ix_mon_sensor_alerts_type_triggered_at", "alert_type", "triggered_at", "id"),
+        Index(
+            "ix_mon_sensor_alerts_open_triggered_at", "triggered_at", "id",
+            postgresql_where=text("active = 1"), sqlite_where=text("active = 1"),
+        ),
+    )
+
     id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     sensor_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensors.id", ondelete="CASCADE"), nullable=False)
+    rule_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensor_alert_rules.id", ondelete="SET NULL"), nullable=True)
     alert_type = Column(Text, nullable=False)
     message = Column(Text, nullable=True)
     triggered_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     active = Column(Integer, nullable=False, default=1)
+    fingerprint = Column(Text, nullable=False, default=_default_fingerprint)
+    occurrences = Column(Integer, nullable=False, default=1)
+    first_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    acknowledged_at = Column(DateTime(timezone=True), nullable=True)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class MonitoringSensorAlertRule(DBBase):
+    """Bounds on a value derived from one sensor field's readings.
+
+    ``rule_type`` picks the derived value: the reading itself (``threshold``),
+    the reading minus the sensor's active baseline (``baseline_deviation``)
+    or the change per hour since the previous reading (``rate_of_change``).
+    The rule alarms outside ``[lower, upper]`` and clears once back inside by
+    ``hysteresis``; a new alert is raised at most every ``suppress_seconds``.
+    """
+    __tablename__ = "mon_sensor_alert_rules"
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    sensor_field_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensor_fields.id", ondelete="CASCADE"), nullable=False, index=True)
+    rule_type = Column(Text, nullable=False)
+    lower = Column(Float, nullable=True)
+    upper = Column(Float, nullable=True)
+    hysteresis = Column(Float, nullable=False, default=0.0)
+    suppress_seconds = Column(Integer, nullable=False, default=0)
+    message = Column(Text, nullable=True)
+    active = Column(Integer, nullable=False, default=1)
+
+    # evaluation state, carried from one ingested batch to the next
+    in_alarm = Column(Boolean, nullable=False, default=False)
+    last_value = Column(Float, nullable=True)
+    last_timestamp = Column(DateTime(timezone=True), nullable=True)
+    last_triggered_at = Column(DateTime(timezone=True), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,229 @@
+"""In-memory index of active alert rules, keyed by sensor field.
+
+Each field maps to a ``FieldRules`` of small parallel arrays, so evaluating a
+reading only touches the rules of its own field, whatever the total number of
+rules. The index refreshes incrementally: rules and baselines changed since
+the last refresh are re-read (with some overlap for transactions that
+committed late), and only the fields they belong to are recompiled. A change
+in the number of active rows, which is how deletions show up, triggers a
+full reload. Refreshes build new dicts and swap them in whole, so readers,
+which do not take the lock, never see a half-loaded index.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.monitoring_sensor_alert.models import MonitoringSensorAlertRule
+from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+
+if TYPE_CHECKING:  # numpy is imported on use, so app startup does not pay for it
+    import numpy as np
+
+RULE_TYPES = ("threshold", "baseline_deviation", "rate_of_change")
+THRESHOLD, BASELINE_DEVIATION, RATE_OF_CHANGE = range(len(RULE_TYPES))
+
+# re-read rows updated this long before the last watermark, in case their transaction committed late
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+class RuleRow(NamedTuple):
+    id: UUID
+    sensor_field_id: UUID
+    sensor_id: UUID
+    rule_type: str
+    lower: Optional[float]
+    upper: Optional[float]
+    hysteresis: float
+    suppress_seconds: int
+    message: Optional[str]
+
+
+class FieldRules(NamedTuple):
+    """The compiled rules of one field; index ``i`` of every array is one rule."""
+
+    sensor_id: UUID
+    rule_ids: List[UUID]
+    kinds: "np.ndarray"  # int8 codes into RULE_TYPES
+    lower: "np.ndarray"  # -inf when unbounded
+    upper: "np.ndarray"  # +inf when unbounded
+    hysteresis: "np.ndarray"
+    suppress_seconds: "np.ndarray"
+    messages: List[Optional[str]]
+
+
+def compile_field(rows: List[RuleRow]) -> FieldRules:
+    import numpy as np
+
+    return FieldRules(
+        sensor_id=rows[0].sensor_id,
+        rule_ids=[r.id for r in rows],
+        kinds=np.array([RULE_TYPES.index(r.rule_type) for r in rows], dtype=np.int8),
+        lower=np.array([-np.inf if r.lower is None else r.lower for r in rows], dtype=float),
+        upper=np.array([np.inf if r.upper is None else r.upper for r in rows], dtype=float),
+        hysteresis=np.array([r.hysteresis or 0.0 for r in rows], dtype=float),
+        suppress_seconds=np.array([r.suppress_seconds or 0 for r in rows], dtype=float),
+        messages=[r.message for r in rows],
+    )
+
+
+class RuleIndex:
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._rules: Dict[UUID, RuleRow] = {}
+        self._fields: Dict[UUID, FieldRules] = {}
+        # sensor_id -> {sensor_field_id: value}; the None key holds a whole-sensor baseline
+        self._baselines: Dict[UUID, Dict[Optional[UUID], float]] = {}
+        self._rules_watermark: Optional[datetime] = None
+        self._baselines_watermark: Optional[datetime] = None
+        self._baseline_count = 0
+        self._refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def lookup(self, sensor_field_id: UUID) -> Optional[FieldRules]:
+        return self._fields.get(sensor_field_id)
+
+    def baseline(self, sensor_id: UUID, sensor_field_id: Optional[UUID] = None) -> float:
+        """The field's own baseline, else the sensor's, else NaN."""
+        values = self._baselines.get(sensor_id)
+        if not values:
+            return float("nan")
+        return values.get(sensor_field_id, values.get(None, float("nan")))
+
+    def invalidate(self) -> None:
+        """Refresh on the next use; rule and baseline services call this after committing."""
+        self._refreshed_at = None
+
+    def load(
+        self,
+        rows: Iterable[RuleRow],
+        baselines: Optional[Dict[UUID, Dict[Optional[UUID], float]]] = None,
+    ) -> None:
+        """Replace the index contents (used by tests and benchmarks)."""
+        with self._lock:
+            rules = {row.id: row for row in rows}
+            self._fields = _compile_fields(rules, {}, {row.sensor_field_id for row in rules.values()})
+            self._rules = rules
+            self._baselines = {sensor_id: dict(values) for sensor_id, values in (baselines or {}).items()}
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            self._refresh_rules(db)
+            self._refresh_baselines(db)
+            self._refreshed_at = now
+
+    def _rule_query(self, db: Session):
+        return (
+            db.query(
+                MonitoringSensorAlertRule.id,
+                MonitoringSensorAlertRule.sensor_field_id,
+                MonitoringSensorField.sensor_id,
+                MonitoringSensorAlertRule.rule_type,
+                MonitoringSensorAlertRule.lower,
+                MonitoringSensorAlertRule.upper,
+                MonitoringSensorAlertRule.hysteresis,
+                MonitoringSensorAlertRule.suppress_seconds,
+                MonitoringSensorAlertRule.message,
+                MonitoringSensorAlertRule.active,
+                MonitoringSensorAlertRule.last_updated,
+            )
+            .join(MonitoringSensorField, MonitoringSensorField.id == MonitoringSensorAlertRule.sensor_field_id)
+        )
+
+    def _refresh_rules(self, db: Session) -> None:
+        qs = self._rule_query(db)
+        full = self._rules_watermark is None
+        if not full:
+            qs = qs.filter(MonitoringSensorAlertRule.last_updated > self._rules_watermark - REFRESH_OVERLAP)
+        rows = qs.all()
+
+        rules = {} if full else dict(self._rules)
+        dirty: Set[UUID] = set()
+        for *values, active, last_updated in rows:
+            row = RuleRow(*values)
+            old = rules.pop(row.id, None)
+            if old is not None:
+                dirty.add(old.sensor_field_id)
+            if active == 1:
+                rules[row.id] = row
+            dirty.add(row.sensor_field_id)
+            if self._rules_watermark is None or last_updated > self._rules_watermark:
+                self._rules_watermark = last_updated
+        self._fields = _compile_fields(rules, {} if full else self._fields, dirty)
+        self._rules = rules
+
+        active_count = db.query(func.count(MonitoringSensorAlertRule.id)).filter(MonitoringSensorAlertRule.active == 1).scalar()
+        if active_count != len(self._rules) and not full:
+            self._rules_watermark = None  # rules were deleted: reload everything
+            self._refresh_rules(db)
+
+    def _refresh_baselines(self, db: Session) -> None:
+        count = db.query(func.count(MonitoringSensorBaseline.id)).scalar()
+        changed = db.query(MonitoringSensorBaseline.sensor_id, func.max(MonitoringSensorBaseline.last_updated))
+        if self._baselines_watermark is not None and count == self._baseline_count:
+            changed = changed.filter(MonitoringSensorBaseline.last_updated > self._baselines_watermark - REFRESH_OVERLAP)
+            baselines = dict(self._baselines)
+        else:
+            baselines = {}
+        changed = changed.group_by(MonitoringSensorBaseline.sensor_id).all()
+        self._baseline_count = count
+        sensor_ids = [sensor_id for sensor_id, _ in changed]
+        reloaded: Dict[UUID, Dict[Optional[UUID], float]] = {}
+        if sensor_ids:
+            rows = (
+                db.query(
+                    MonitoringSensorBaseline.sensor_id,
+                    MonitoringSensorBaseline.sensor_field_id,
+                    MonitoringSensorBaseline.baseline_value,
+                )
+                  .filter(MonitoringSensorBaseline.sensor_id.in_(sensor_ids), MonitoringSensorBaseline.active == 1)
+                  .order_by(MonitoringSensorBaseline.recorded_at)
+                  .all()
+            )
+            for sensor_id, sensor_field_id, value in rows:  # the most recently recorded active baseline wins
+                reloaded.setdefault(sensor_id, {})[sensor_field_id] = value
+        for sensor_id in sensor_ids:
+            if sensor_id in reloaded:
+                baselines[sensor_id] = reloaded[sensor_id]
+            else:
+                baselines.pop(sensor_id, None)
+        self._baselines = baselines
+        if changed:
+            newest = max(last_updated for _, last_updated in changed)
+            if self._baselines_watermark is None or newest > self._baselines_watermark:
+                self._baselines_watermark = newest
+
+
+def _compile_fields(
+    rules: Dict[UUID, RuleRow],
+    fields: Dict[UUID, FieldRules],
+    field_ids: Set[UUID],
+) -> Dict[UUID, FieldRules]:
+    """A copy of ``fields`` with the rules of ``field_ids`` recompiled from ``rules``."""
+    by_field: Dict[UUID, List[RuleRow]] = {field_id: [] for field_id in field_ids}
+    for row in rules.values():
+        if row.sensor_field_id in by_field:
+            by_field[row.sensor_field_id].append(row)
+    fields = dict(fields)
+    for field_id, rows in by_field.items():
+        if rows:
+            fields[field_id] = compile_field(rows)
+        else:
+            fields.pop(field_id, None)
+    return fields
+
+
+rule_index = RuleIndex(get_settings().ALERT_RULE_REFRESH_SEC)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -20,9 +20,75 @@ class MonitoringSensorAlertUpdate(BaseModel):
 
 class MonitoringSensorAlert(MonitoringSensorAlertBase):
     id: UUID
+    rule_id: Optional[UUID] = None
     triggered_at: datetime
+    fingerprint: str
+    occurrences: int
+    first_seen: datetime
+    last_seen: datetime
+    acknowledged_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
     created_at: datetime
     last_updated: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# Set-based acknowledge/resolve; at least one selector is required
+class MonitoringSensorAlertBulkAction(BaseModel):
+    action: Literal["acknowledge", "resolve"]
+    ids: Optional[List[UUID]] = None
+    sensor_id: Optional[UUID] = None
+    alert_type: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+class MonitoringSensorAlertBulkResult(BaseModel):
+    action: str
+    updated: int
+
+# Open alert counts for map and dashboard badges
+class LocationAlertSummary(BaseModel):
+    location_id: UUID
+    active: int
+    by_type: Dict[str, int]
+
+class ProjectAlertSummary(BaseModel):
+    project_id: UUID
+    active: int
+    by_type: Dict[str, int]
+    locations: List[LocationAlertSummary]
+
+# Alert rules
+RuleType = Literal["threshold", "baseline_deviation", "rate_of_change"]
+
+class MonitoringSensorAlertRuleBase(BaseModel):
+    sensor_field_id: UUID
+    rule_type: RuleType
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    hysteresis: float = 0.0
+    suppress_seconds: int = 0
+    message: Optional[str] = None
+    active: Optional[int] = 1
+
+class MonitoringSensorAlertRuleCreate(MonitoringSensorAlertRuleBase):
+    pass
+
+class MonitoringSensorAlertRuleUpdate(BaseModel):
+    rule_type: Optional[RuleType] = None
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    hysteresis: Optional[float] = None
+    suppress_seconds: Optional[int] = None
+    message: Optional[str] = None
+    active: Optional[int] = None
+
+class MonitoringSensorAlertRule(MonitoringSensorAlertRuleBase):
+    id: UUID
+    in_alarm: bool
+    last_triggered_at: Optional[datetime] = None
+    created_at: datetime
+    last_updated: datetime
+
+    class Config:
+        orm_mode = True
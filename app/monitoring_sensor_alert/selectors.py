@@ -1,12 +1,110 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.monitoring_sensor_alert.models import MonitoringSensorAlert
+from app.common.paginators import Keyset, Page
+from app.common.types import PageParams
+from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert, MonitoringSensorAlertRule
+from app.monitoring_source.models import Source
+
+# newest first; backed by the (triggered_at, id) index
+ALERT_KEYSET = Keyset(MonitoringSensorAlert.triggered_at, MonitoringSensorAlert.id, descending=True)
 
 
 def get_monitoring_sensor_alert(db: Session, alert_id: UUID) -> Optional[MonitoringSensorAlert]:
     return db.query(MonitoringSensorAlert).filter(MonitoringSensorAlert.id == alert_id).first()
 
 
-def get_monitoring_sensor_alerts(db: Session, skip: int = 0, limit: int = 100) -> List[MonitoringSensorAlert]:
-    return db.query(MonitoringSensorAlert).offset(skip).limit(limit).all()
\ No newline at end of file
+def get_open_monitoring_sensor_alert(db: Session, fingerprint: str) -> Optional[MonitoringSensorAlert]:
+    return (
+        db.query(MonitoringSensorAlert)
+          .filter(MonitoringSensorAlert.fingerprint == fingerprint, MonitoringSensorAlert.active == 1)
+          .first()
+    )
+
+
+def _sensor_ids_in(project_id: Optional[UUID] = None, location_id: Optional[UUID] = None):
+    """Subquery of the sensors under a project and/or location."""
+    qs = select(MonitoringSensor.id).join(Source, Source.id == MonitoringSensor.mon_source_id)
+    if location_id is not None:
+        qs = qs.where(Source.mon_loc_id == location_id)
+    if project_id is not None:
+        qs = qs.join(Location, Location.id == Source.mon_loc_id).where(Location.project_id == project_id)
+    return qs
+
+
+def get_monitoring_sensor_alerts(
+    db: Session,
+    page: PageParams,
+    sensor_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    location_id: Optional[UUID] = None,
+    alert_type: Optional[str] = None,
+    active: Optional[int] = None,
+    acknowledged: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Page:
+    """Alerts newest first, filtered on indexed columns and paged by ``ALERT_KEYSET``."""
+    qs = db.query(MonitoringSensorAlert)
+    if sensor_id is not None:
+        qs = qs.filter(MonitoringSensorAlert.sensor_id == sensor_id)
+    if project_id is not None or location_id is not None:
+        qs = qs.filter(MonitoringSensorAlert.sensor_id.in_(_sensor_ids_in(project_id, location_id)))
+    if alert_type is not None:
+        qs = qs.filter(MonitoringSensorAlert.alert_type == alert_type)
+    if active is not None:
+        qs = qs.filter(MonitoringSensorAlert.active == active)
+    if acknowledged is not None:
+        qs = qs.filter(
+            MonitoringSensorAlert.acknowledged_at.isnot(None) if acknowledged
+            else MonitoringSensorAlert.acknowledged_at.is_(None)
+        )
+    if since is not None:
+        qs = qs.filter(MonitoringSensorAlert.triggered_at >= since)
+    if until is not None:
+        qs = qs.filter(MonitoringSensorAlert.triggered_at < until)
+    return ALERT_KEYSET.paginate(qs, page)
+
+
+def get_active_alert_summary(db: Session, project_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+    """Open alert counts per project, location and alert type, from one grouped query."""
+    qs = (
+        db.query(Location.project_id, Source.mon_loc_id, MonitoringSensorAlert.alert_type, func.count())
+          .select_from(MonitoringSensorAlert)
+          .join(MonitoringSensor, MonitoringSensor.id == MonitoringSensorAlert.sensor_id)
+          .join(Source, Source.id == MonitoringSensor.mon_source_id)
+          .join(Location, Location.id == Source.mon_loc_id)
+          .filter(MonitoringSensorAlert.active == 1)
+    )
+    if project_id is not None:
+        qs = qs.filter(Location.project_id == project_id)
+    rows = qs.group_by(Location.project_id, Source.mon_loc_id, MonitoringSensorAlert.alert_type).all()
+
+    projects: Dict[UUID, Dict[str, Any]] = {}
+    for project, location, alert_type, count in rows:
+        p = projects.setdefault(project, {"project_id": project, "active": 0, "by_type": {}, "locations": {}})
+        loc = p["locations"].setdefault(location, {"location_id": location, "active": 0, "by_type": {}})
+        for node in (p, loc):
+            node["active"] += count
+            node["by_type"][alert_type] = node["by_type"].get(alert_type, 0) + count
+    return [dict(p, locations=list(p["locations"].values())) for p in projects.values()]
+
+
+def get_monitoring_sensor_alert_rule(db: Session, rule_id: UUID) -> Optional[MonitoringSensorAlertRule]:
+    return db.query(MonitoringSensorAlertRule).filter(MonitoringSensorAlertRule.id == rule_id).first()
+
+
+def get_monitoring_sensor_alert_rules(
+    db: Session,
+    sensor_field_id: Optional[UUID] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[MonitoringSensorAlertRule]:
+    qs = db.query(MonitoringSensorAlertRule)
+    if sensor_field_id is not None:
+        qs = qs.filter(MonitoringSensorAlertRule.sensor_field_id == sensor_field_id)
+    return qs.order_by(MonitoringSensorAlertRule.created_at).offset(skip).limit(limit).all()
@@ -1,15 +1,204 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, update
 from sqlalchemy.orm import Session
-from uuid import UUID
+from uuid import UUID, uuid4
+from app.common.upserts import greatest, insert_for
+from app.config.settings import get_settings
 from app.monitoring_sensor_alert import schemas, selectors
-from app.monitoring_sensor_alert.models import MonitoringSensorAlert
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert, MonitoringSensorAlertRule, alert_fingerprint
+from app.monitoring_sensor_alert.rule_index import rule_index
+from app.outbox.services import add_event
+
+ALERTS_TOPIC = "alerts"
+
+BULK_ACTION_EVENTS = {"acknowledge": "alert.acknowledged", "resolve": "alert.resolved"}
+
+
+def _alert_event(db: Session, event: str, obj: MonitoringSensorAlert) -> None:
+    add_event(db, ALERTS_TOPIC, str(obj.sensor_id), event, {
+        "id": obj.id,
+        "sensor_id": obj.sensor_id,
+        "alert_type": obj.alert_type,
+        "message": obj.message,
+        "active": obj.active,
+        "triggered_at": obj.triggered_at,
+        "fingerprint": obj.fingerprint,
+        "occurrences": obj.occurrences,
+        "last_seen": obj.last_seen,
+    })
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _incidents(
+    triggers: List[Dict[str, Any]],
+    clears: List[Dict[str, Any]],
+    window: timedelta,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, datetime]]:
+    """Fold triggers into alert rows per fingerprint, oldest first.
+
+    A clear resolves the fingerprint's latest run, and the next trigger
+    starts a new one. A clear before any trigger of its fingerprint is
+    returned separately: it resolves the alert already open.
+    """
+    events = sorted(
+        [(_utc(t["triggered_at"]), 0, t) for t in triggers] + [(_utc(c["resolved_at"]), 1, c) for c in clears],
+        key=lambda e: (e[0], e[1]),
+    )
+    incidents: Dict[str, List[Dict[str, Any]]] = {}
+    cleared: Dict[str, datetime] = {}
+    for seen, is_clear, event in events:
+        fingerprint = alert_fingerprint(event["sensor_id"], event["alert_type"], event.get("rule_id"))
+        runs = incidents.setdefault(fingerprint, [])
+        if is_clear:
+            if runs and runs[-1]["active"]:
+                runs[-1]["active"], runs[-1]["resolved_at"] = 0, seen
+            elif not runs:
+                cleared.setdefault(fingerprint, seen)
+            continue
+        if runs and runs[-1]["active"] and seen - runs[-1]["last_seen"] <= window:
+            runs[-1]["occurrences"] += 1
+            runs[-1]["last_seen"] = seen
+            runs[-1]["message"] = event.get("message") or runs[-1]["message"]
+            continue
+        runs.append({
+            "id": uuid4(),
+            "sensor_id": event["sensor_id"],
+            "rule_id": event.get("rule_id"),
+            "alert_type": event["alert_type"],
+            "message": event.get("message"),
+            "fingerprint": fingerprint,
+            "occurrences": 1,
+            "triggered_at": seen,
+            "first_seen": seen,
+            "last_seen": seen,
+            "active": 1,
+            "resolved_at": None,
+        })
+    return incidents, cleared
+
+
+def record_alerts(
+    db: Session,
+    triggers: List[Dict[str, Any]],
+    clears: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """Store alert triggers as incidents and return the alert rows that were inserted.
+
+    A trigger less than ``ALERT_DEDUP_WINDOW_SEC`` after the last one of its
+    fingerprint is folded into that alert (``occurrences`` and ``last_seen``);
+    a longer quiet period resolves the open alert and starts a new one.
+    ``clears`` (``sensor_id``, ``alert_type``, ``rule_id``, ``resolved_at``)
+    resolve the open alert of their fingerprint when a rule's alarm ends.
+    Only new and resolved alerts are published, so writes and events scale
+    with incidents rather than triggers. The caller owns the transaction.
+    """
+    if not triggers and not clears:
+        return []
+    window = timedelta(seconds=get_settings().ALERT_DEDUP_WINDOW_SEC)
+    incidents, cleared = _incidents(triggers, clears or [], window)
+    table = MonitoringSensorAlert.__table__
+    open_alerts = {
+        row.fingerprint: row
+        for row in db.query(
+            MonitoringSensorAlert.id,
+            MonitoringSensorAlert.sensor_id,
+            MonitoringSensorAlert.fingerprint,
+            MonitoringSensorAlert.last_seen,
+        ).filter(MonitoringSensorAlert.fingerprint.in_(list(incidents)), MonitoringSensorAlert.active == 1)
+    }
+
+    merged: List[Dict[str, Any]] = []
+    resolved: List[Dict[str, Any]] = []
+    inserted: List[Dict[str, Any]] = []
+    for fingerprint, runs in incidents.items():
+        current = open_alerts.get(fingerprint)
+        if current is not None and fingerprint in cleared:
+            resolved.append({"b_id": current.id, "b_resolved_at": cleared[fingerprint], "sensor_id": current.sensor_id})
+            current = None
+        if current is not None and runs and runs[0]["first_seen"] - _utc(current.last_seen) <= window:
+            run = runs.pop(0)
+            merged.append({
+                "b_id": current.id,
+                "b_occurrences": run["occurrences"],
+                "b_last_seen": run["last_seen"],
+                "b_message": run["message"],
+            })
+            if not run["active"]:
+                resolved.append({"b_id": current.id, "b_resolved_at": run["resolved_at"], "sensor_id": current.sensor_id})
+                current = None
+        if current is not None and runs:
+            resolved.append({"b_id": current.id, "b_resolved_at": runs[0]["first_seen"], "sensor_id": current.sensor_id})
+        for run, following in zip(runs, runs[1:]):
+            if run["active"]:
+                run["active"], run["resolved_at"] = 0, following["first_seen"]
+        inserted.extend(runs)
+
+    if merged:
+        db.execute(
+            table.update()
+                 .where(table.c.id == bindparam("b_id"))
+                 .values(
+                     occurrences=table.c.occurrences + bindparam("b_occurrences"),
+                     # backfilled triggers may be older than the alert's last one
+                     last_seen=greatest(table.c.last_seen, bindparam("b_last_seen")),
+                     message=func.coalesce(bindparam("b_message"), table.c.message),
+                 ),
+            merged,
+        )
+    if resolved:
+        db.execute(
+            table.update().where(table.c.id == bindparam("b_id")).values(active=0, resolved_at=bindparam("b_resolved_at")),
+            [{"b_id": r["b_id"], "b_resolved_at": r["b_resolved_at"]} for r in resolved],
+        )
+    if inserted:
+        stmt = insert_for(db, table)
+        # a concurrent writer may have opened the same incident since the lookup above
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.fingerprint],
+                index_where=table.c.active == 1,
+                set_={
+                    "occurrences": table.c.occurrences + stmt.excluded.occurrences,
+                    "last_seen": greatest(table.c.last_seen, stmt.excluded.last_seen),
+                    "message": stmt.excluded.message,
+                },
+            ),
+            inserted,
+        )
+
+    for r in resolved:
+        add_event(db, ALERTS_TOPIC, str(r["sensor_id"]), "alert.resolved", {
+            "id": r["b_id"], "sensor_id": r["sensor_id"], "resolved_at": r["b_resolved_at"],
+        })
+    for alert in inserted:
+        add_event(db, ALERTS_TOPIC, str(alert["sensor_id"]), "alert.created", alert)
+    return inserted
 
 
 def create_monitoring_sensor_alert(db: Session, payload: schemas.MonitoringSensorAlertCreate) -> MonitoringSensorAlert:
-    obj = MonitoringSensorAlert(**payload.dict())
-    db.add(obj)
+    trigger = payload.dict(exclude={"active"})
+    trigger["triggered_at"] = datetime.now(timezone.utc)
+    record_alerts(db, [trigger])
     db.commit()
-    db.refresh(obj)
-    return obj
+    return selectors.get_open_monitoring_sensor_alert(
+        db, alert_fingerprint(payload.sensor_id, payload.alert_type),
+    )
+
+
+def open_duplicate_alert(db: Session, obj: MonitoringSensorAlert, payload: schemas.MonitoringSensorAlertUpdate) -> Optional[MonitoringSensorAlert]:
+    """Another open alert the update would collide with (one open alert per fingerprint)."""
+    changes = payload.dict(exclude_unset=True)
+    if not changes.get("active", obj.active):
+        return None
+    fingerprint = alert_fingerprint(
+        changes.get("sensor_id", obj.sensor_id), changes.get("alert_type", obj.alert_type), obj.rule_id,
+    )
+    duplicate = selectors.get_open_monitoring_sensor_alert(db, fingerprint)
+    return duplicate if duplicate is not None and duplicate.id != obj.id else None
 
 
 def update_monitoring_sensor_alert(db: Session, alert_id: UUID, payload: schemas.MonitoringSensorAlertUpdate) -> MonitoringSensorAlert:
@@ -18,6 +207,10 @@ def update_monitoring_sensor_alert(db: Session, alert_id: UUID, payload: schemas
         return None
     for k, v in payload.dict(exclude_unset=True).items():
         setattr(obj, k, v)
+    obj.fingerprint = alert_fingerprint(obj.sensor_id, obj.alert_type, obj.rule_id)
+    if not obj.active and obj.resolved_at is None:
+        obj.resolved_at = datetime.now(timezone.utc)
+    _alert_event(db, "alert.updated", obj)
     db.commit()
     db.refresh(obj)
     return obj
@@ -25,6 +218,70 @@ def update_monitoring_sensor_alert(db: Session, alert_id: UUID, payload: schemas
 
 def delete_monitoring_sensor_alert(db: Session, alert_id: UUID) -> None:
     obj = selectors.get_monitoring_sensor_alert(db, alert_id)
+    if obj:
+        _alert_event(db, "alert.deleted", obj)
+        db.delete(obj)
+        db.commit()
+
+
+def bulk_update_monitoring_sensor_alerts(db: Session, payload: schemas.MonitoringSensorAlertBulkAction) -> int:
+    """Acknowledge or resolve every matching alert in one ``UPDATE``; returns how many changed."""
+    now = datetime.now(timezone.utc)
+    filters = []
+    if payload.ids:
+        filters.append(MonitoringSensorAlert.id.in_(payload.ids))
+    if payload.sensor_id is not None:
+        filters.append(MonitoringSensorAlert.sensor_id == payload.sensor_id)
+    if payload.alert_type is not None:
+        filters.append(MonitoringSensorAlert.alert_type == payload.alert_type)
+    if payload.fingerprint is not None:
+        filters.append(MonitoringSensorAlert.fingerprint == payload.fingerprint)
+    if payload.action == "acknowledge":
+        filters.append(MonitoringSensorAlert.acknowledged_at.is_(None))
+        values = {"acknowledged_at": now}
+    else:
+        filters.append(MonitoringSensorAlert.active == 1)
+        values = {"active": 0, "resolved_at": now}
+
+    rows = db.execute(
+        update(MonitoringSensorAlert)
+          .where(*filters)
+          .values(**values)
+          .returning(MonitoringSensorAlert.id, MonitoringSensorAlert.sensor_id)
+          .execution_options(synchronize_session=False)
+    ).all()
+    for alert_id, sensor_id in rows:
+        add_event(db, ALERTS_TOPIC, str(sensor_id), BULK_ACTION_EVENTS[payload.action], {
+            "id": alert_id, "sensor_id": sensor_id, **values,
+        })
+    db.commit()
+    return len(rows)
+
+
+def create_monitoring_sensor_alert_rule(db: Session, payload: schemas.MonitoringSensorAlertRuleCreate) -> MonitoringSensorAlertRule:
+    obj = MonitoringSensorAlertRule(**payload.dict())
+    db.add(obj)
+    db.commit()
+    rule_index.invalidate()
+    db.refresh(obj)
+    return obj
+
+
+def update_monitoring_sensor_alert_rule(db: Session, rule_id: UUID, payload: schemas.MonitoringSensorAlertRuleUpdate) -> MonitoringSensorAlertRule:
+    obj = selectors.get_monitoring_sensor_alert_rule(db, rule_id)
+    if not obj:
+        return None
+    for k, v in payload.dict(exclude_unset=True).items():
+        setattr(obj, k, v)
+    db.commit()
+    rule_index.invalidate()
+    db.refresh(obj)
+    return obj
+
+
+def delete_monitoring_sensor_alert_rule(db: Session, rule_id: UUID) -> None:
+    obj = selectors.get_monitoring_sensor_alert_rule(db, rule_id)
     if obj:
         db.delete(obj)
-        db.commit()
\ No newline at end of file
+        db.commit()
+        rule_index.invalidate()
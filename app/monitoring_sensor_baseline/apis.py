@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit
 from app.monitoring_sensor_baseline import schemas, selectors, services
 
 router = APIRouter(prefix="/monitoring-sensor-baselines", tags=["Monitoring Sensor Baselines"])
@@ -14,10 +14,20 @@ def create_monitoring_sensor_baseline(
 ):
     return services.create_monitoring_sensor_baseline(db, payload)
 
+@router.post("/compute", response_model=schemas.MonitoringSensorBaselineComputeResult)
+def compute_monitoring_sensor_baselines(
+    payload: schemas.MonitoringSensorBaselineCompute,
+    db: Session = Depends(get_db),
+):
+    if not (payload.project_id or payload.sensor_ids or payload.sensor_field_ids):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Select fields by project_id, sensor_ids or sensor_field_ids")
+    written = services.compute_monitoring_sensor_baselines(db, payload)
+    return {"method": payload.method, "baselines": written}
+
 @router.get("/", response_model=List[schemas.MonitoringSensorBaseline])
 def list_monitoring_sensor_baselines(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
     db: Session = Depends(get_db),
 ):
     return selectors.get_monitoring_sensor_baselines(db, skip=skip, limit=limit)
@@ -1,15 +1,31 @@
-from sqlalchemy import Column, Float, Integer, DateTime, text, ForeignKey
+from sqlalchemy import Column, Float, Integer, DateTime, Index, Text, text, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from app.config.database import DBBase
 
 class MonitoringSensorBaseline(DBBase):
+    """Reference value of a sensor field, or of the whole sensor when
+    ``sensor_field_id`` is null (hand-entered baselines).
+
+    Computed baselines record the statistic (``method``) and the data window
+    they were taken from; ``recorded_at`` is the window start.
+    """
     __tablename__ = "mon_sensor_baselines"
 
+    __table_args__ = (
+        Index("ix_mon_sensor_baselines_field_recorded_at", "sensor_field_id", "recorded_at"),
+        Index("ix_mon_sensor_baselines_sensor_id", "sensor_id"),
+    )
+
     id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     sensor_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensors.id", ondelete="CASCADE"), nullable=False)
+    sensor_field_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensor_fields.id", ondelete="CASCADE"), nullable=True)
     baseline_value = Column(Float, nullable=False)
     recorded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    method = Column(Text, nullable=False, default="manual")  # manual | median | mean
+    window_start = Column(DateTime(timezone=True), nullable=True)
+    window_end = Column(DateTime(timezone=True), nullable=True)
+    sample_count = Column(Integer, nullable=True)
     active = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
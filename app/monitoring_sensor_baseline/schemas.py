@@ -1,10 +1,11 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
 class MonitoringSensorBaselineBase(BaseModel):
     sensor_id: UUID
+    sensor_field_id: Optional[UUID] = None
     baseline_value: float
     active: Optional[int] = 1
 
@@ -13,14 +14,36 @@ class MonitoringSensorBaselineCreate(MonitoringSensorBaselineBase):
 
 class MonitoringSensorBaselineUpdate(BaseModel):
     sensor_id: Optional[UUID]
+    sensor_field_id: Optional[UUID] = None
     baseline_value: Optional[float]
     active: Optional[int]
 
 class MonitoringSensorBaseline(MonitoringSensorBaselineBase):
     id: UUID
     recorded_at: datetime
+    method: str
+    window_start: Optional[datetime] = None
+    window_end: Optional[datetime] = None
+    sample_count: Optional[int] = None
     created_at: datetime
     last_updated: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# Computed baselines; with no start/end each field's first window_hours of data is used
+BaselineMethod = Literal["median", "mean"]
+
+class MonitoringSensorBaselineCompute(BaseModel):
+    project_id: Optional[UUID] = None
+    sensor_ids: Optional[List[UUID]] = None
+    sensor_field_ids: Optional[List[UUID]] = None
+    method: BaselineMethod = "median"
+    window_hours: float = 24.0 * 7
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    min_samples: int = 10
+
+class MonitoringSensorBaselineComputeResult(BaseModel):
+    method: str
+    baselines: int
@@ -1,7 +1,14 @@
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+from sqlalchemy import Select, and_, func, select
 from sqlalchemy.orm import Session
 from uuid import UUID
+from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
 from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.monitoring_sensor_data.models import MonitoringSensorData
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
 
 
 def get_monitoring_sensor_baseline(db: Session, baseline_id: UUID) -> Optional[MonitoringSensorBaseline]:
@@ -9,4 +16,87 @@ def get_monitoring_sensor_baseline(db: Session, baseline_id: UUID) -> Optional[M
 
 
 def get_monitoring_sensor_baselines(db: Session, skip: int = 0, limit: int = 100) -> List[MonitoringSensorBaseline]:
-    return db.query(MonitoringSensorBaseline).offset(skip).limit(limit).all()
\ No newline at end of file
+    return db.query(MonitoringSensorBaseline).offset(skip).limit(limit).all()
+
+
+def baseline_field_scope(
+    project_id: Optional[UUID] = None,
+    sensor_ids: Optional[Sequence[UUID]] = None,
+    sensor_field_ids: Optional[Sequence[UUID]] = None,
+) -> Select:
+    """``SELECT id`` of the sensor fields a baseline run covers."""
+    qs = select(MonitoringSensorField.id)
+    if project_id is not None:
+        qs = (
+            qs.join(MonitoringSensor, MonitoringSensor.id == MonitoringSensorField.sensor_id)
+              .join(Source, Source.id == MonitoringSensor.mon_source_id)
+              .join(Location, Location.id == Source.mon_loc_id)
+              .where(Location.project_id == project_id)
+        )
+    if sensor_ids:
+        qs = qs.where(MonitoringSensorField.sensor_id.in_(sensor_ids))
+    if sensor_field_ids:
+        qs = qs.where(MonitoringSensorField.id.in_(sensor_field_ids))
+    return qs
+
+
+def baseline_statistics_query(
+    field_scope: Select,
+    window: timedelta,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    """Per-field baseline statistics in one grouped statement.
+
+    Without ``start``/``end`` each field's window begins at its first
+    reading, which the ``(sensor_field_id, timestamp)`` key finds without a
+    scan. Returns the median and an outlier-fenced mean (values beyond 1.5
+    IQR of the quartiles are left out), with the sample count and the time
+    span actually covered.
+    """
+    D = MonitoringSensorData
+    if start is not None or end is not None:
+        conditions = [D.sensor_field_id.in_(field_scope), D.data.isnot(None)]
+        if start is not None:
+            conditions.append(D.timestamp >= start)
+        if end is not None:
+            conditions.append(D.timestamp < end)
+        windowed = select(D.sensor_id, D.sensor_field_id, D.timestamp, D.data).where(*conditions)
+    else:
+        first = (
+            select(D.sensor_field_id, func.min(D.timestamp).label("t0"))
+              .where(D.sensor_field_id.in_(field_scope))
+              .group_by(D.sensor_field_id)
+              .cte("baseline_first")
+        )
+        windowed = (
+            select(D.sensor_id, D.sensor_field_id, D.timestamp, D.data)
+              .join(first, first.c.sensor_field_id == D.sensor_field_id)
+              .where(D.timestamp >= first.c.t0, D.timestamp < first.c.t0 + window, D.data.isnot(None))
+        )
+    w = windowed.cte("baseline_window")
+
+    q = (
+        select(
+            w.c.sensor_field_id,
+            func.percentile_cont(0.25).within_group(w.c.data).label("q1"),
+            func.percentile_cont(0.5).within_group(w.c.data).label("median"),
+            func.percentile_cont(0.75).within_group(w.c.data).label("q3"),
+        )
+        .group_by(w.c.sensor_field_id)
+        .cte("baseline_quartiles")
+    )
+    fence = 1.5 * (q.c.q3 - q.c.q1)
+    return (
+        select(
+            func.min(w.c.sensor_id).label("sensor_id"),
+            w.c.sensor_field_id,
+            q.c.median,
+            func.avg(w.c.data).filter(and_(w.c.data >= q.c.q1 - fence, w.c.data <= q.c.q3 + fence)).label("mean"),
+            func.count().label("sample_count"),
+            func.min(w.c.timestamp).label("window_start"),
+            func.max(w.c.timestamp).label("window_end"),
+        )
+        .join(q, q.c.sensor_field_id == w.c.sensor_field_id)
+        .group_by(w.c.sensor_field_id, q.c.median, q.c.q1, q.c.q3)
+    )
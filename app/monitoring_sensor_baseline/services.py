@@ -1,13 +1,18 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from uuid import UUID
+from uuid import UUID, uuid4
 from app.monitoring_sensor_baseline import schemas, selectors
 from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.monitoring_sensor_alert.rule_index import rule_index
 
 
 def create_monitoring_sensor_baseline(db: Session, payload: schemas.MonitoringSensorBaselineCreate) -> MonitoringSensorBaseline:
     obj = MonitoringSensorBaseline(**payload.dict())
     db.add(obj)
     db.commit()
+    rule_index.invalidate()
     db.refresh(obj)
     return obj
 
@@ -19,6 +24,7 @@ def update_monitoring_sensor_baseline(db: Session, baseline_id: UUID, payload: s
     for k, v in payload.dict(exclude_unset=True).items():
         setattr(obj, k, v)
     db.commit()
+    rule_index.invalidate()
     db.refresh(obj)
     return obj
 
@@ -27,4 +33,56 @@ def delete_monitoring_sensor_baseline(db: Session, baseline_id: UUID) -> None:
     obj = selectors.get_monitoring_sensor_baseline(db, baseline_id)
     if obj:
         db.delete(obj)
-        db.commit()
\ No newline at end of file
+        db.commit()
+        rule_index.invalidate()
+
+
+def compute_monitoring_sensor_baselines(db: Session, payload: schemas.MonitoringSensorBaselineCompute) -> int:
+    """Recompute the baselines of every field in scope and store them in bulk.
+
+    One grouped query returns the statistics of all fields; fields with
+    fewer than ``min_samples`` readings keep their current baseline. A new
+    baseline takes effect at its ``window_start``: active baselines of the
+    field recorded from then on are deactivated, older ones stay active so
+    readings before the window keep theirs, and the new rows are inserted in
+    the same transaction. Returns how many were written.
+    """
+    scope = selectors.baseline_field_scope(payload.project_id, payload.sensor_ids, payload.sensor_field_ids)
+    stats = db.execute(
+        selectors.baseline_statistics_query(scope, timedelta(hours=payload.window_hours), payload.start, payload.end)
+    ).all()
+    rows = [
+        {
+            "id": uuid4(),
+            "sensor_id": r.sensor_id,
+            "sensor_field_id": r.sensor_field_id,
+            "baseline_value": float(r.median if payload.method == "median" else r.mean),
+            "recorded_at": r.window_start,
+            "method": payload.method,
+            "window_start": r.window_start,
+            "window_end": r.window_end,
+            "sample_count": r.sample_count,
+            "active": 1,
+        }
+        for r in stats
+        if r.sample_count >= payload.min_samples
+    ]
+    if not rows:
+        return 0
+    fields_by_start = defaultdict(list)
+    for row in rows:
+        fields_by_start[row["recorded_at"]].append(row["sensor_field_id"])
+    for window_start, field_ids in fields_by_start.items():
+        (
+            db.query(MonitoringSensorBaseline)
+              .filter(
+                  MonitoringSensorBaseline.sensor_field_id.in_(field_ids),
+                  MonitoringSensorBaseline.recorded_at >= window_start,
+                  MonitoringSensorBaseline.active == 1,
+              )
+              .update({MonitoringSensorBaseline.active: 0}, synchronize_session=False)
+        )
+    db.execute(insert(MonitoringSensorBaseline), rows)
+    db.commit()
+    rule_index.invalidate()
+    return len(rows)
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit
+from app.kafka_producer import KafkaUnavailableError
 from app.monitoring_sensor_data import schemas, selectors, services
 
 router = APIRouter(prefix="/monitoring-sensor-data", tags=["Monitoring Sensor Data"])
 
+# A streamed batch is produced once it holds this many bytes, whatever batch_size says
+MAX_STREAM_BATCH_BYTES = 8 * 1024 * 1024
+# Batches with rejections listed in a stream response; totals cover the rest
+MAX_REPORTED_BATCHES = 100
+
 @router.post("/", response_model=schemas.MonitoringSensorData, status_code=status.HTTP_201_CREATED)
 def create_monitoring_sensor_data(
     payload: schemas.MonitoringSensorDataCreate,
@@ -18,7 +25,7 @@ def create_monitoring_sensor_data(
 @router.get("/", response_model=List[schemas.MonitoringSensorData])
 def list_monitoring_sensor_data(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
     db: Session = Depends(get_db),
 ):
     return selectors.get_monitoring_sensor_data_list(db, skip=skip, limit=limit)
@@ -61,6 +68,7 @@ def _query_data(
     trim_percentile_low: Optional[float] = None,
     trim_percentile_high: Optional[float] = None,
     include_field_name: bool = False,
+    relative_to: Optional[Literal["baseline"]] = None,
     output: str = "json",
     db: Session,
 ):
@@ -86,6 +94,7 @@ def _query_data(
         trim_low=trim_percentile_low,
         trim_high=trim_percentile_high,
         include_field_name=include_field_name,
+        relative_to=relative_to,
     )
 
     def row_to_dict(r):
@@ -145,6 +154,7 @@ def query_monitoring_sensor_data(
     aggregate_period: Optional[str] = None,
     trim_percentile_low: Optional[float] = None,
     trim_percentile_high: Optional[float] = None,
+    relative_to: Optional[Literal["baseline"]] = Query(None, description="Return data minus the baseline in effect"),
     output: str = "json",
     db: Session = Depends(get_db),
 ):
@@ -166,6 +176,7 @@ def query_monitoring_sensor_data(
         trim_percentile_low=trim_percentile_low,
         trim_percentile_high=trim_percentile_high,
         include_field_name=True,
+        relative_to=relative_to,
         output=output,
         db=db,
     )
@@ -189,6 +200,7 @@ def query_sensor_pivot(
     aggregate_period: Optional[str] = None,
     trim_percentile_low: Optional[float] = None,
     trim_percentile_high: Optional[float] = None,
+    relative_to: Optional[Literal["baseline"]] = Query(None, description="Return data minus the baseline in effect"),
     output: str = "json",
     db: Session = Depends(get_db),
 ):
@@ -210,6 +222,7 @@ def query_sensor_pivot(
         trim_percentile_low=trim_percentile_low,
         trim_percentile_high=trim_percentile_high,
         include_field_name=True,
+        relative_to=relative_to,
         output=output,
         db=db,
     )
@@ -234,9 +247,63 @@ def delete_monitoring_sensor_data(sensor_field_id: UUID, timestamp: datetime, db
         raise HTTPException(status.HTTP_404_NOT_FOUND, "MonitoringSensorData not found")
     services.delete_monitoring_sensor_data(db, sensor_field_id, timestamp)
 
-@router.post("/bulk-from-source", status_code=201)
+@router.post("/bulk-from-source", response_model=schemas.BulkIngestResult, status_code=201)
 def create_bulk_sensor_data_from_source(
     payload: schemas.MonitoringSensorDataBulkRequest,
     db: Session = Depends(get_db),
 ):
-    return services.create_bulk_sensor_data_from_source(db, payload)
+    try:
+        return services.create_bulk_sensor_data_from_source(db, payload)
+    except KafkaUnavailableError as exc:
+        db.rollback()
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, str(exc)) from exc
+
+@router.post("/stream-from-source", response_model=schemas.BulkIngestStreamResult, status_code=201)
+async def create_stream_sensor_data_from_source(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+):
+    """Ingest newline-delimited ``BulkSensorDataItem`` objects as they arrive.
+
+    The body is read incrementally and validated/produced ``batch_size``
+    lines (or ``MAX_STREAM_BATCH_BYTES``) at a time, so memory stays flat no
+    matter how large the upload is; only totals and the batches that
+    rejected something are kept for the response. A line longer than
+    ``MAX_NDJSON_LINE`` bytes ends the upload with 413, and a batch Kafka
+    can neither take nor spool ends it with 503. With an
+    ``Idempotency-Key`` header each batch is keyed ``<key>:<batch>``, so
+    retrying an interrupted upload with the same key and batch size only
+    produces the batches that did not finish.
+    """
+    result = schemas.BulkIngestStreamResult(status="enqueued", lines=0, accepted=0, rejected=0, batches=[])
+    pending: List[bytes] = []
+    pending_bytes = 0
+
+    async def flush_batch() -> None:
+        key = f"{idempotency_key}:{result.batch_count}" if idempotency_key else None
+        batch = await run_in_threadpool(services.ingest_sensor_data_batch, db, result.batch_count, pending, key)
+        result.batch_count += 1
+        result.lines += batch.lines
+        result.accepted += batch.accepted
+        result.rejected += batch.rejected
+        if batch.rejected and len(result.batches) < MAX_REPORTED_BATCHES:
+            result.batches.append(batch)
+
+    try:
+        async for line in services.iter_ndjson_lines(request.stream()):
+            pending.append(line)
+            pending_bytes += len(line)
+            if len(pending) >= batch_size or pending_bytes >= MAX_STREAM_BATCH_BYTES:
+                await flush_batch()
+                pending, pending_bytes = [], 0
+        if pending:
+            await flush_batch()
+    except services.LineTooLongError as exc:
+        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, str(exc))
+    except KafkaUnavailableError as exc:
+        db.rollback()
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, str(exc)) from exc
+
+    return result
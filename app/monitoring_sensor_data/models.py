@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Boolean, DateTime, Float, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy import Column, Boolean, DateTime, Float, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.sql import func
 from app.config.database import DBBase
 
@@ -8,8 +8,17 @@ class MonitoringSensorData(DBBase):
 
     mon_loc_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_loc.id", ondelete="CASCADE"), nullable=False)
     sensor_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensors.id", ondelete="CASCADE"), nullable=False)
-    sensor_field_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensor_fields.id", ondelete="CASCADE"), nullable=False)
+    # one reading per field and instant: (sensor_field_id, timestamp) is the key every ingest path upserts on
+    sensor_field_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sensor_fields.id", ondelete="CASCADE"), nullable=False, primary_key=True)
     timestamp = Column(DateTime(timezone=True), nullable=False, primary_key=True)
     data = Column(Float, nullable=False)
     is_approved = Column(Boolean, default=False, nullable=False)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+class IngestIdempotencyKey(DBBase):
+    """Result of an ingest request, stored under the client supplied idempotency key."""
+    __tablename__ = "mon_ingest_idempotency_keys"
+
+    key = Column(Text, primary_key=True)
+    response = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
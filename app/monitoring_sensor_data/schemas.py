@@ -45,6 +45,37 @@ class BulkSensorDataItem(BaseModel):
 
 class MonitoringSensorDataBulkRequest(BaseModel):
     items: List[BulkSensorDataItem]
+    # retries with the same key return the first response instead of producing again
+    idempotency_key: Optional[str] = None
+
+# Bulk ingestion results (per item of the request)
+class BulkIngestItemStatus(BaseModel):
+    index: int
+    accepted: int = 0
+    rejected: int = 0
+    errors: List[str] = []
+
+class BulkIngestResult(BaseModel):
+    status: str  # enqueued | partial | rejected
+    records_enqueued: int
+    records_rejected: int
+    items: List[BulkIngestItemStatus]
+
+# Streaming (NDJSON) ingestion results
+class BulkIngestBatchResult(BaseModel):
+    batch: int
+    lines: int
+    accepted: int
+    rejected: int
+    errors: List[str] = []
+
+class BulkIngestStreamResult(BaseModel):
+    status: str
+    lines: int
+    accepted: int
+    rejected: int
+    batch_count: int = 0
+    batches: List[BulkIngestBatchResult]  # only the batches that rejected something
 
 
 # Response model for queried/aggregated sensor data
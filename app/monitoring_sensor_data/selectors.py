@@ -1,10 +1,12 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import ColumnElement, func, and_, or_, select
 from datetime import datetime
 from uuid import UUID
 
+from app.metadata_registry import metadata_registry
 from app.monitoring_sensor_data.models import MonitoringSensorData
+from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
 from app.monitoring_sensor.models import MonitoringSensor
 from app.monitoring_sensor_fields.models import MonitoringSensorField
 from app.monitoring_group.models import MonitoringGroup
@@ -22,6 +24,118 @@ def get_monitoring_sensor_data_list(db: Session, skip: int = 0, limit: int = 100
     return db.query(MonitoringSensorData).offset(skip).limit(limit).all()
 
 
+def baseline_intervals(field_level: bool):
+    """Active baselines with the span each is in effect.
+
+    A baseline holds from its ``recorded_at`` until the next active one of
+    the same sensor field (``field_level``) or of the same whole sensor.
+    """
+    b = MonitoringSensorBaseline
+    scope = b.sensor_field_id.isnot(None) if field_level else b.sensor_field_id.is_(None)
+    return (
+        select(
+            b.sensor_id,
+            b.sensor_field_id,
+            b.baseline_value,
+            b.recorded_at.label("valid_from"),
+            func.lead(b.recorded_at)
+                .over(partition_by=(b.sensor_id, b.sensor_field_id), order_by=b.recorded_at)
+                .label("valid_to"),
+        )
+        .where(b.active == 1, scope)
+        .subquery("field_baseline" if field_level else "sensor_baseline")
+    )
+
+
+def _in_effect(intervals, key) -> ColumnElement:
+    D = MonitoringSensorData
+    return and_(
+        key,
+        intervals.c.valid_from <= D.timestamp,
+        or_(intervals.c.valid_to.is_(None), D.timestamp < intervals.c.valid_to),
+    )
+
+
+def join_baselines(q: Query) -> Tuple[Query, ColumnElement]:
+    """Outer-join each reading to the baseline in effect at its timestamp.
+
+    The field's own baselines take precedence: a whole-sensor baseline only
+    applies while none of the field's is in effect, even if it is newer --
+    the same fallback the alert rules use. The result is NULL (and so a NULL
+    delta) before the first baseline. Returns the query and the baseline.
+    """
+    D = MonitoringSensorData
+    field_b, sensor_b = baseline_intervals(True), baseline_intervals(False)
+    q = (
+        q.outerjoin(field_b, _in_effect(field_b, field_b.c.sensor_field_id == D.sensor_field_id))
+         .outerjoin(sensor_b, _in_effect(sensor_b, sensor_b.c.sensor_id == D.sensor_id))
+    )
+    return q, func.coalesce(field_b.c.baseline_value, sensor_b.c.baseline_value)
+
+
+def _metadata_filters(
+    *,
+    project_id: Optional[UUID],
+    project_number: Optional[str],
+    location_id: Optional[UUID],
+    location_number: Optional[str],
+    sensor_id: Optional[UUID],
+    sensor_name: Optional[str],
+    sensor_type: Optional[str],
+    sensor_group_id: Optional[UUID],
+    source_ids: Optional[List[UUID]],
+    source_names: Optional[List[str]],
+    field_name: Optional[str],
+) -> list:
+    """Criteria for the metadata filters of a sensor-data query.
+
+    While the metadata registry is live they are resolved in memory to one
+    ``sensor_field_id IN (...)``, which the primary key of
+    ``mon_sensor_data`` answers directly; otherwise they filter the joined
+    tables.
+    """
+    field_ids = metadata_registry.resolve_field_ids(
+        project_id=project_id,
+        project_number=project_number,
+        location_id=location_id,
+        location_number=location_number,
+        sensor_id=sensor_id,
+        sensor_name=sensor_name,
+        sensor_type=sensor_type,
+        sensor_group_id=sensor_group_id,
+        source_ids=source_ids,
+        source_names=source_names,
+        field_name=field_name,
+    )
+    if field_ids is not None:
+        return [MonitoringSensorData.sensor_field_id.in_(list(field_ids))]
+
+    filters = []
+    if project_id:
+        filters.append(Project.id == project_id)
+    if project_number:
+        filters.append(Project.project_number == project_number)
+    if location_id:
+        filters.append(Location.id == location_id)
+    if location_number:
+        filters.append(Location.loc_number == location_number)
+    if sensor_id:
+        filters.append(MonitoringSensor.id == sensor_id)
+    if sensor_name:
+        filters.append(MonitoringSensor.sensor_name == sensor_name)
+    if sensor_type:
+        filters.append(MonitoringSensor.sensor_type == sensor_type)
+    if sensor_group_id:
+        filters.append(MonitoringGroup.id == sensor_group_id)
+    if source_ids:
+        filters.append(Source.id.in_(source_ids))
+    if source_names:
+        filters.append(Source.source_name.in_(source_names))
+    if field_name:
+        filters.append(MonitoringSensorField.field_name == field_name)
+    return filters
+
+
 def query_monitoring_sensor_data(
     db: Session,
     *,
@@ -42,8 +156,13 @@ def query_monitoring_sensor_data(
     trim_low: Optional[float] = None,
     trim_high: Optional[float] = None,
     include_field_name: bool = False,
+    relative_to: Optional[str] = None,
 ) -> List:
-    """Query sensor data with optional filters and aggregation."""
+    """Query sensor data with optional filters and aggregation.
+
+    With ``relative_to="baseline"`` ``data`` is the reading minus the
+    baseline in effect at its timestamp, computed in the same statement.
+    """
 
     q = db.query(MonitoringSensorData)
     q = q.join(MonitoringSensor, MonitoringSensorData.sensor_id == MonitoringSensor.id)
@@ -53,67 +172,30 @@ def query_monitoring_sensor_data(
     q = q.join(Project, Location.project_id == Project.id)
     q = q.outerjoin(MonitoringGroup, MonitoringSensor.sensor_group_id == MonitoringGroup.id)
 
-    if project_id:
-        q = q.filter(Project.id == project_id)
-    if project_number:
-        q = q.filter(Project.project_number == project_number)
-    if location_id:
-        q = q.filter(Location.id == location_id)
-    if location_number:
-        q = q.filter(Location.loc_number == location_number)
-    if sensor_id:
-        q = q.filter(MonitoringSensor.id == sensor_id)
-    if sensor_name:
-        q = q.filter(MonitoringSensor.sensor_name == sensor_name)
-    if sensor_type:
-        q = q.filter(MonitoringSensor.sensor_type == sensor_type)
-    if sensor_group_id:
-        q = q.filter(MonitoringGroup.id == sensor_group_id)
-    if source_ids:
-        q = q.filter(Source.id.in_(source_ids))
-    if source_names:
-        q = q.filter(Source.source_name.in_(source_names))
-    if field_name:
-        q = q.filter(MonitoringSensorField.field_name == field_name)
+    # the same restrictions apply to the percentile subquery of a trimmed query
+    base_filters = _metadata_filters(
+        project_id=project_id,
+        project_number=project_number,
+        location_id=location_id,
+        location_number=location_number,
+        sensor_id=sensor_id,
+        sensor_name=sensor_name,
+        sensor_type=sensor_type,
+        sensor_group_id=sensor_group_id,
+        source_ids=source_ids,
+        source_names=source_names,
+        field_name=field_name,
+    )
     if start:
-        q = q.filter(MonitoringSensorData.timestamp >= start)
+        base_filters.append(MonitoringSensorData.timestamp >= start)
     if end:
-        q = q.filter(MonitoringSensorData.timestamp <= end)
+        base_filters.append(MonitoringSensorData.timestamp <= end)
+    q = q.filter(*base_filters)
 
     if trim_low is not None or trim_high is not None:
         lp = (trim_low or 0) / 100
         hp = (trim_high or 100) / 100
 
-        # Collect base filters so the same restrictions are applied to the
-        # percentile calculation subquery.
-        base_filters = []
-        if project_id:
-            base_filters.append(Project.id == project_id)
-        if project_number:
-            base_filters.append(Project.project_number == project_number)
-        if location_id:
-            base_filters.append(Location.id == location_id)
-        if location_number:
-            base_filters.append(Location.loc_number == location_number)
-        if sensor_id:
-            base_filters.append(MonitoringSensor.id == sensor_id)
-        if sensor_name:
-            base_filters.append(MonitoringSensor.sensor_name == sensor_name)
-        if sensor_type:
-            base_filters.append(MonitoringSensor.sensor_type == sensor_type)
-        if sensor_group_id:
-            base_filters.append(MonitoringGroup.id == sensor_group_id)
-        if source_ids:
-            base_filters.append(Source.id.in_(source_ids))
-        if source_names:
-            base_filters.append(Source.source_name.in_(source_names))
-        if field_name:
-            base_filters.append(MonitoringSensorField.field_name == field_name)
-        if start:
-            base_filters.append(MonitoringSensorData.timestamp >= start)
-        if end:
-            base_filters.append(MonitoringSensorData.timestamp <= end)
-
         if aggregate_period:
             ts_group = func.date_trunc(aggregate_period, MonitoringSensorData.timestamp)
             pct_sub = (
@@ -178,6 +260,11 @@ def query_monitoring_sensor_data(
                 MonitoringSensorData.data <= pct_sub.c.high,
             )
 
+    value = MonitoringSensorData.data
+    if relative_to == "baseline":
+        q, baseline = join_baselines(q)
+        value = MonitoringSensorData.data - baseline
+
     if aggregate_period:
         ts = func.date_trunc(aggregate_period, MonitoringSensorData.timestamp).label("timestamp")
         columns = [
@@ -189,7 +276,7 @@ def query_monitoring_sensor_data(
             MonitoringSensor.id.label("sensor_id"),
             MonitoringSensor.sensor_name.label("sensor_name"),
             MonitoringSensorField.id.label("sensor_field_id"),
-            func.avg(MonitoringSensorData.data).label("data"),
+            func.avg(value).label("data"),
         ]
         group_by_cols = [
             ts,
@@ -219,7 +306,7 @@ def query_monitoring_sensor_data(
             MonitoringSensor.id.label("sensor_id"),
             MonitoringSensor.sensor_name.label("sensor_name"),
             MonitoringSensorField.id.label("sensor_field_id"),
-            MonitoringSensorData.data.label("data"),
+            value.label("data"),
         ]
         if include_field_name:
             columns.append(MonitoringSensorField.field_name.label("field_name"))
@@ -1,28 +1,83 @@
-from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timezone
+from io import StringIO
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
+from app.common.upserts import insert_for
 from app.monitoring_sensor_data import schemas, selectors
-from app.monitoring_sensor_data.models import MonitoringSensorData
-from app.monitoring_sensor.models import MonitoringSensor
-from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_sensor_data.models import IngestIdempotencyKey, MonitoringSensorData
+from app.metadata_registry import metadata_registry
 from app.kafka_producer import send_kafka_message  # use this
+from app.outbox.services import add_event
+
+if TYPE_CHECKING:  # numpy is only needed by the COPY path; keep it off the app import path
+    import numpy as np
 
 KAFKA_TOPIC = "sensor.readings"
+KAFKA_DLQ_TOPIC = "sensor.readings.dlq"
+LOGS_TOPIC = "logs"
+
+# Keep per-batch error reporting bounded so huge uploads stay constant-memory
+MAX_BATCH_ERRORS = 20
+# Malformed NDJSON lines are dead-lettered truncated to this many bytes
+MAX_DEAD_LETTER_LINE = 4096
+# Longest NDJSON line a streamed upload may contain
+MAX_NDJSON_LINE = 1024 * 1024
+
+
+class LineTooLongError(ValueError):
+    """A streamed NDJSON line exceeded ``MAX_NDJSON_LINE`` bytes."""
+
+def upsert_sensor_data(db: Session, rows: Iterable[Dict[str, Any]]) -> int:
+    """Insert readings keyed on ``(sensor_field_id, timestamp)`` in one statement.
+
+    A reading that already exists only has its value (and location/sensor)
+    rewritten when the value differs, so re-delivered readings cost no
+    writes. Duplicate keys within ``rows`` collapse to the last one. Alert
+    rules are evaluated on the new readings. The caller owns the transaction.
+    """
+    unique = {(row["sensor_field_id"], row["timestamp"]): row for row in rows}
+    if not unique:
+        return 0
+    table = MonitoringSensorData.__table__
+    stmt = insert_for(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.sensor_field_id, table.c.timestamp],
+        set_={
+            "mon_loc_id": stmt.excluded.mon_loc_id,
+            "sensor_id": stmt.excluded.sensor_id,
+            "data": stmt.excluded.data,
+            "last_updated": func.now(),
+        },
+        where=table.c.data.is_distinct_from(stmt.excluded.data),
+    )
+    db.execute(stmt, list(unique.values()))
+
+    from app.monitoring_sensor_alert.engine import evaluate_series, series_from_rows
+
+    evaluate_series(db, series_from_rows(unique.values()))
+    return len(unique)
 
 def create_monitoring_sensor_data(db: Session, payload: schemas.MonitoringSensorDataCreate) -> MonitoringSensorData:
-    obj = MonitoringSensorData(**payload.dict())
-    db.add(obj)
+    upsert_sensor_data(db, [payload.dict()])
     db.commit()
-    db.refresh(obj)
-    return obj
+    return selectors.get_monitoring_sensor_data_entry(db, payload.sensor_field_id, payload.timestamp)
 
 def update_monitoring_sensor_data(db: Session, sensor_field_id: UUID, timestamp: datetime, payload: schemas.MonitoringSensorDataUpdate) -> MonitoringSensorData:
     obj = selectors.get_monitoring_sensor_data_entry(db, sensor_field_id, timestamp)
     if not obj:
         return None
-    for k, v in payload.dict(exclude_unset=True).items():
+    changes = payload.dict(exclude_unset=True)
+    for k, v in changes.items():
         setattr(obj, k, v)
+    add_event(db, LOGS_TOPIC, str(sensor_field_id), "sensor_data.updated", {
+        "sensor_id": obj.sensor_id,
+        "sensor_field_id": sensor_field_id,
+        "timestamp": timestamp,
+        "changes": changes,
+    })
     db.commit()
     db.refresh(obj)
     return obj
@@ -33,46 +88,262 @@ def delete_monitoring_sensor_data(db: Session, sensor_field_id: UUID, timestamp:
         db.delete(obj)
         db.commit()
 
+def copy_sensor_data(
+    db: Session,
+    series: Iterable[Tuple[UUID, UUID, UUID, "np.ndarray", "np.ndarray"]],
+) -> int:
+    """Bulk load columnar readings into ``mon_sensor_data`` with ``COPY``.
+
+    ``series`` yields ``(mon_loc_id, sensor_id, sensor_field_id, timestamps,
+    values)`` where ``timestamps`` is a UTC ``datetime64`` array and ``values``
+    a float array of the same length. NaN values are skipped. Rows are copied
+    into a session-local staging table and merged with the same upsert
+    semantics as ``upsert_sensor_data``, so files may be re-read safely. The
+    caller owns the transaction.
+    """
+    import numpy as np
+
+    buf = StringIO()
+    total = 0
+    for mon_loc_id, sensor_id, field_id, timestamps, values in series:
+        mask = np.isfinite(values)
+        if not mask.any():
+            continue
+        ts = np.char.add(np.datetime_as_string(timestamps[mask], unit="us"), "+00:00")
+        lines = np.char.add(np.char.add(f"{mon_loc_id},{sensor_id},{field_id},", ts), ",")
+        lines = np.char.add(lines, values[mask].astype(str))
+        buf.write("\n".join(lines.tolist()))
+        buf.write("\n")
+        total += int(mask.sum())
+
+    if not total:
+        return 0
+    buf.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(_CREATE_STAGE_SQL)
+        cursor.copy_expert(
+            "COPY mon_sensor_data_stage (mon_loc_id, sensor_id, sensor_field_id, timestamp, data) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+        cursor.execute(_MERGE_STAGE_SQL)
+        cursor.execute("TRUNCATE mon_sensor_data_stage")
+    finally:
+        cursor.close()
+    return total
+
+_CREATE_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS mon_sensor_data_stage (
+    seq bigserial,
+    mon_loc_id uuid,
+    sensor_id uuid,
+    sensor_field_id uuid,
+    timestamp timestamptz,
+    data double precision
+) ON COMMIT DELETE ROWS
+"""
+
+# ON CONFLICT cannot touch a row twice per statement, so keep the last copy of each key
+_MERGE_STAGE_SQL = """
+INSERT INTO mon_sensor_data (mon_loc_id, sensor_id, sensor_field_id, timestamp, data, is_approved)
+SELECT DISTINCT ON (sensor_field_id, timestamp) mon_loc_id, sensor_id, sensor_field_id, timestamp, data, false
+FROM mon_sensor_data_stage
+ORDER BY sensor_field_id, timestamp, seq DESC
+ON CONFLICT (sensor_field_id, timestamp) DO UPDATE
+SET mon_loc_id = EXCLUDED.mon_loc_id,
+    sensor_id = EXCLUDED.sensor_id,
+    data = EXCLUDED.data,
+    last_updated = now()
+WHERE mon_sensor_data.data IS DISTINCT FROM EXCLUDED.data
+"""
+
+def claim_idempotency_key(db: Session, key: str) -> Optional[Dict[str, Any]]:
+    """Reserve ``key`` for this request.
+
+    Returns ``None`` when the key is new, otherwise the response stored by the
+    request that used it first. A concurrent request holding the key blocks
+    here until it commits or rolls back.
+    """
+    table = IngestIdempotencyKey.__table__
+    stmt = insert_for(db, table).values(key=key).on_conflict_do_nothing(index_elements=[table.c.key])
+    if db.execute(stmt).rowcount:
+        return None
+    return db.get(IngestIdempotencyKey, key).response or {}
+
+def store_idempotent_response(db: Session, key: str, response: Dict[str, Any]) -> None:
+    db.query(IngestIdempotencyKey).filter(IngestIdempotencyKey.key == key).update(
+        {IngestIdempotencyKey.response: response}, synchronize_session=False
+    )
+
 def create_bulk_sensor_data_from_source(db: Session, request: schemas.MonitoringSensorDataBulkRequest):
-    produced = 0
+    """Produce every valid reading of ``request``; invalid ones go to the dead-letter topic.
 
-    for entry in request.items:
-        source_id = entry.source_id
-        timestamp = entry.timestamp
-        mon_loc_id = entry.mon_loc_id
-        for sensor_obj in entry.sensors:
-            sensor_id = sensor_obj.sensor_id
+    One bad sensor or field id only rejects that reading, so clients get
+    per-item counts back instead of having to re-upload the whole request.
+    """
+    if request.idempotency_key:
+        stored = claim_idempotency_key(db, request.idempotency_key)
+        if stored is not None:
+            return stored
+
+    accepted, rejected = _build_sensor_payloads(db, request.items)
+    for _, key, payload in accepted:
+        send_kafka_message(topic=KAFKA_TOPIC, key=key, value=payload)
+    for _, reason, payload in rejected:
+        _dead_letter(reason, payload)
+
+    items = [schemas.BulkIngestItemStatus(index=i) for i in range(len(request.items))]
+    for index, _, _ in accepted:
+        items[index].accepted += 1
+    for index, reason, _ in rejected:
+        items[index].rejected += 1
+        if len(items[index].errors) < MAX_BATCH_ERRORS:
+            items[index].errors.append(reason)
+
+    response = schemas.BulkIngestResult(
+        status=_ingest_status(len(accepted), len(rejected)),
+        records_enqueued=len(accepted),
+        records_rejected=len(rejected),
+        items=items,
+    ).model_dump(mode="json")
+    if request.idempotency_key:
+        store_idempotent_response(db, request.idempotency_key, response)
+        db.commit()
+    return response
+
+
+def _ingest_status(accepted: int, rejected: int) -> str:
+    if not rejected:
+        return "enqueued"
+    return "partial" if accepted else "rejected"
+
+
+def _dead_letter(reason: str, payload: dict) -> None:
+    """Park a rejected reading, with why it was rejected, on ``KAFKA_DLQ_TOPIC``."""
+    send_kafka_message(
+        topic=KAFKA_DLQ_TOPIC,
+        key=payload.get("sensor_id") or "",
+        value={"reason": reason, "rejected_at": datetime.now(timezone.utc).isoformat(), **payload},
+    )
 
-            sensor = db.query(MonitoringSensor).filter_by(id=sensor_id, mon_source_id=source_id).first()
-            if not sensor:
-                raise HTTPException(status_code=400, detail=f"Invalid sensor id: {sensor_id}")
 
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = MAX_NDJSON_LINE,
+) -> AsyncIterator[bytes]:
+    """Yield complete, non-empty lines from a chunked byte stream.
+
+    Only the pieces of the trailing partial line are kept between chunks and
+    each chunk is split once, so memory use is bounded by ``max_line_bytes``
+    rather than by the size of the upload. A longer line raises
+    ``LineTooLongError``.
+    """
+    parts: List[bytes] = []  # the line still being received
+    size = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join(parts) + lines[0]
+            parts, size = [], 0
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(f"NDJSON line longer than {max_line_bytes} bytes")
+            line = line.strip()
+            if line:
+                yield line
+        if rest:
+            parts.append(rest)
+            size += len(rest)
+            if size > max_line_bytes:
+                raise LineTooLongError(f"NDJSON line longer than {max_line_bytes} bytes")
+    last = b"".join(parts).strip()
+    if last:
+        yield last
+
+
+def _build_sensor_payloads(
+    db: Session,
+    items: List[schemas.BulkSensorDataItem],
+) -> Tuple[List[Tuple[int, str, dict]], List[Tuple[int, str, dict]]]:
+    """Validate bulk items against the metadata registry (or two set-based queries).
+
+    Returns ``(accepted, rejected)``, one entry per sensor reading.
+    ``accepted`` holds ``(item_index, key, payload)`` ready for Kafka and
+    ``rejected`` holds ``(item_index, reason, payload)``.
+    """
+    sensor_ids = {s.sensor_id for entry in items for s in entry.sensors}
+    field_ids = {f.field_id for entry in items for s in entry.sensors for f in s.data}
+
+    sensor_sources = metadata_registry.sensor_sources(db, sensor_ids)
+    field_sensors = metadata_registry.field_sensors(db, field_ids)
+
+    accepted: List[Tuple[int, str, dict]] = []
+    rejected: List[Tuple[int, str, dict]] = []
+    for index, entry in enumerate(items):
+        for sensor_obj in entry.sensors:
+            sensor_id = sensor_obj.sensor_id
             payload = {
-                "sensor_id": str(sensor.id),
-                "mon_loc_id": str(mon_loc_id),
-                "timestamp": timestamp.isoformat(),
-                "fields": []
+                "sensor_id": str(sensor_id),
+                "mon_loc_id": str(entry.mon_loc_id),
+                "timestamp": entry.timestamp.isoformat(),
+                "fields": [{"field_id": str(f.field_id), "value": f.value} for f in sensor_obj.data],
             }
+            if sensor_sources.get(sensor_id) != entry.source_id:
+                rejected.append((index, f"Invalid sensor id: {sensor_id}", {"source_id": str(entry.source_id), **payload}))
+                continue
+            bad_field = next((f.field_id for f in sensor_obj.data if field_sensors.get(f.field_id) != sensor_id), None)
+            if bad_field is not None:
+                rejected.append((index, f"Invalid field id {bad_field} for sensor {sensor_id}", {"source_id": str(entry.source_id), **payload}))
+                continue
+            accepted.append((index, str(sensor_id), payload))
+    return accepted, rejected
 
-            for field_val in sensor_obj.data:
-                field_id = field_val.field_id
-                value = field_val.value
 
-                field = db.query(MonitoringSensorField).filter_by(id=field_id, sensor_id=sensor_id).first()
-                if not field:
-                    raise HTTPException(status_code=400, detail=f"Invalid field id {field_id} for sensor {sensor_id}")
+def ingest_sensor_data_batch(
+    db: Session,
+    batch: int,
+    lines: List[bytes],
+    idempotency_key: Optional[str] = None,
+) -> schemas.BulkIngestBatchResult:
+    """Parse, validate and produce one batch of NDJSON lines.
 
-                payload["fields"].append({
-                    "field_id": str(field.id),
-                    "value": value
-                })
+    Each line is a ``BulkSensorDataItem``. Malformed lines count as one
+    rejection each; otherwise every sensor reading is accepted or rejected
+    on its own. A batch whose ``idempotency_key`` was already used returns
+    the stored result without producing again.
+    """
+    if idempotency_key:
+        stored = claim_idempotency_key(db, idempotency_key)
+        if stored is not None:
+            return schemas.BulkIngestBatchResult(**stored)
 
-            send_kafka_message(
-                topic=KAFKA_TOPIC,
-                key=str(sensor.id),
-                value=payload
-            )
+    items: List[schemas.BulkSensorDataItem] = []
+    errors: List[str] = []
+    for line in lines:
+        try:
+            items.append(schemas.BulkSensorDataItem.model_validate_json(line))
+        except ValidationError as exc:
+            reason = f"Malformed line: {exc.errors()[0]['msg']}"
+            errors.append(reason)
+            _dead_letter(reason, {"line": line[:MAX_DEAD_LETTER_LINE].decode("utf-8", "replace")})
 
-            produced += 1
+    accepted, rejected = _build_sensor_payloads(db, items)
+    for _, key, payload in accepted:
+        send_kafka_message(topic=KAFKA_TOPIC, key=key, value=payload)
+    for _, reason, payload in rejected:
+        errors.append(reason)
+        _dead_letter(reason, payload)
 
-    return {"status": "enqueued", "records_enqueued": produced}
+    result = schemas.BulkIngestBatchResult(
+        batch=batch,
+        lines=len(lines),
+        accepted=len(accepted),
+        rejected=len(errors),
+        errors=errors[:MAX_BATCH_ERRORS],
+    )
+    if idempotency_key:
+        store_idempotent_response(db, idempotency_key, result.model_dump())
+        db.commit()
+    return result
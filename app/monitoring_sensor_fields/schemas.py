@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -32,3 +32,30 @@ class MonitoringSensorFieldName(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+# Bulk upsert, keyed on (sensor_id, field_name)
+MAX_BULK_UPSERT = 5000
+UpsertStatus = Literal["created", "updated", "unchanged"]
+
+
+class MonitoringSensorFieldBulkItem(MonitoringSensorFieldCreate):
+    sensor_id: UUID
+
+
+class MonitoringSensorFieldBulkUpsert(BaseModel):
+    fields: List[MonitoringSensorFieldBulkItem] = Field(..., min_length=1, max_length=MAX_BULK_UPSERT)
+
+
+class MonitoringSensorFieldUpsertResult(BaseModel):
+    id: UUID
+    sensor_id: UUID
+    field_name: str
+    status: UpsertStatus
+
+
+class MonitoringSensorFieldBulkResult(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    items: List[MonitoringSensorFieldUpsertResult]
@@ -1,22 +1,58 @@
+import uuid
+from collections import Counter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
+from app.common.upserts import upsert_returning_ids
 from app.monitoring_sensor_fields import schemas, selectors
 from app.monitoring_sensor_fields.models import MonitoringSensorField
 from app.monitoring_sensor.models import MonitoringSensor
 from app.monitoring_source import services as source_services
 
+def _touch_parent_source(db: Session, sensor_id: UUID) -> None:
+    sensor = db.query(MonitoringSensor).filter(MonitoringSensor.id == sensor_id).first()
+    if sensor:
+        # updating a sensor field changes the parent source's structure
+        source_services.touch_source(db, sensor.mon_source_id)
+
 def create_sensor_field(db: Session, sensor_id: UUID, payload: schemas.MonitoringSensorFieldCreate) -> MonitoringSensorField:
     obj = MonitoringSensorField(sensor_id=sensor_id, **payload.dict())
     db.add(obj)
     db.commit()
     db.refresh(obj)
-    sensor = db.query(MonitoringSensor).filter(MonitoringSensor.id == sensor_id).first()
-    if sensor:
-        # updating a sensor field changes the parent source's structure
-        source_services.touch_source(db, sensor.mon_source_id)
+    _touch_parent_source(db, sensor_id)
     return obj
 
+def bulk_upsert_sensor_fields(db: Session, fields: List[schemas.MonitoringSensorFieldBulkItem]) -> dict:
+    """Create or update fields by ``(sensor_id, field_name)`` in one transaction.
+
+    The sources of every sensor that gained or changed a field are touched once.
+    """
+    results = upsert_returning_ids(
+        db,
+        MonitoringSensorField.__table__,
+        [dict(f.dict(), id=uuid.uuid4()) for f in fields],
+        keys=("sensor_id", "field_name"),
+        updates=("uom", "is_calculated", "field_type"),
+    )
+    changed = {sensor_id for (sensor_id, _), (_, status) in results.items() if status != "unchanged"}
+    if changed:
+        source_services.touch_sources(
+            db, select(MonitoringSensor.mon_source_id).where(MonitoringSensor.id.in_(changed))
+        )
+    db.commit()
+    counts = Counter(status for _, status in results.values())
+    return {
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "unchanged": counts["unchanged"],
+        "items": [
+            {"id": id, "sensor_id": sensor_id, "field_name": name, "status": status}
+            for (sensor_id, name), (id, status) in results.items()
+        ],
+    }
+
 def update_sensor_field(db: Session, field_id: UUID, payload: schemas.MonitoringSensorFieldUpdate) -> Optional[MonitoringSensorField]:
     obj = db.query(MonitoringSensorField).filter(MonitoringSensorField.id == field_id).first()
     if not obj:
@@ -25,10 +61,13 @@ def update_sensor_field(db: Session, field_id: UUID, payload: schemas.Monitoring
         setattr(obj, key, value)
     db.commit()
     db.refresh(obj)
+    _touch_parent_source(db, obj.sensor_id)
     return obj
 
 def delete_sensor_field(db: Session, field_id: UUID) -> None:
     obj = db.query(MonitoringSensorField).filter(MonitoringSensorField.id == field_id).first()
     if obj:
+        sensor_id = obj.sensor_id
         db.delete(obj)
         db.commit()
+        _touch_parent_source(db, sensor_id)
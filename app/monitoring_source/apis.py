@@ -1,12 +1,19 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_params
+from app.common.types import PageParams
 from app.monitoring_source import schemas, selectors, services
-from app.monitoring_sensor import schemas as sensor_schemas, services as sensor_services
+from app.monitoring_sensor import (
+    schemas as sensor_schemas,
+    selectors as sensor_selectors,
+    services as sensor_services,
+)
+from app.source_ingestion import schemas as ingest_schemas
+from app.source_ingestion.worker import submit_ingest
 
 router = APIRouter(prefix="/monitoring-sources", tags=["Monitoring Sources"])
 
@@ -19,28 +26,31 @@ def create_source(payload: schemas.SourceCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[schemas.Source])
 def list_sources(
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sources = selectors.get_sources(db, skip)
-    return [services.enrich_source(src, False, False) for src in sources]
+    sources = selectors.get_source_rows(db, page)
+    return sources.apply(selectors.SOURCE_ROW.response(sources.items))
 
 
 @router.get("/last-updated", response_model=List[schemas.SourceLastUpdated])
 def list_sources_last_updated(
-    skip: int = 0,
+    response: Response,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    rows = selectors.get_source_updates(db, skip)
-    return [schemas.SourceLastUpdated(id=row[0], last_updated=row[1]) for row in rows]
+    rows = selectors.get_source_updates(db, page)
+    rows.apply(response)
+    return [schemas.SourceLastUpdated(id=row[0], last_updated=row[1]) for row in rows.items]
 
 
 @router.get("/with-children", response_model=List[schemas.SourceWithSensors])
 def list_sources_with_children(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
 ):
-    sources = selectors.get_sources(db, skip, limit)
-    return [services.enrich_source(src, True, False) for src in sources]
+    sources = selectors.get_sources(db, page, selectors.SOURCE_WITH_SENSORS)
+    sources.apply(response)
+    return [services.enrich_source(src, True, False) for src in sources.items]
 
 
 @router.get(
@@ -48,10 +58,11 @@ def list_sources_with_children(
     response_model=List[schemas.SourceWithSensorNames],
 )
 def list_sources_with_minimal_children(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
 ):
-    sources = selectors.get_sources(db, skip, limit)
-    return [services.enrich_source(src, True, True) for src in sources]
+    sources = selectors.get_sources(db, page, selectors.SOURCE_WITH_SENSOR_NAMES)
+    sources.apply(response)
+    return [services.enrich_source(src, True, True) for src in sources.items]
 
 
 @router.get("/{source_id}", response_model=schemas.Source)
@@ -67,7 +78,7 @@ def get_source(
 
 @router.get("/{source_id}/with-children", response_model=schemas.SourceWithSensors)
 def get_source_with_children(source_id: UUID, db: Session = Depends(get_db)):
-    src = selectors.get_source(db, source_id)
+    src = selectors.get_source(db, source_id, selectors.SOURCE_WITH_SENSORS)
     if not src:
         raise HTTPException(status_code=404, detail="Source not found")
     return services.enrich_source(src, True, False)
@@ -77,7 +88,7 @@ def get_source_with_children(source_id: UUID, db: Session = Depends(get_db)):
     "/{source_id}/with-minimal-children", response_model=schemas.SourceWithSensorNames
 )
 def get_source_with_minimal_children(source_id: UUID, db: Session = Depends(get_db)):
-    src = selectors.get_source(db, source_id)
+    src = selectors.get_source(db, source_id, selectors.SOURCE_WITH_SENSOR_NAMES)
     if not src:
         raise HTTPException(status_code=404, detail="Source not found")
     return services.enrich_source(src, True, True)
@@ -90,6 +101,14 @@ def get_source_by_name(source_name: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Source not found")
     return services.enrich_source(src)
 
+@router.post("/{source_id}/ingest", response_model=ingest_schemas.SourceIngestQueued, status_code=status.HTTP_202_ACCEPTED)
+def ingest_source_files(source_id: UUID, db: Session = Depends(get_db)):
+    src = selectors.get_source(db, source_id)
+    if not src:
+        raise HTTPException(status_code=404, detail="Source not found")
+    queued = submit_ingest(src.id)
+    return ingest_schemas.SourceIngestQueued(source_id=src.id, queued=queued)
+
 @router.patch("/{source_id}", response_model=schemas.Source)
 def update_source(
     source_id: UUID, payload: schemas.SourceUpdate, db: Session = Depends(get_db)
@@ -114,8 +133,8 @@ def delete_source(source_id: UUID, db: Session = Depends(get_db)):
 )
 def list_source_sensors(
     source_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sensors = sensor_services.list_sensors_for_source(db, source_id, skip=skip)
-    return [sensor_services.enrich_sensor(sen) for sen in sensors]
\ No newline at end of file
+    sensors = sensor_services.list_sensors_for_source(db, source_id, page)
+    return sensors.apply(sensor_selectors.SENSOR_ROW.response(sensors.items))
\ No newline at end of file
@@ -9,7 +9,7 @@ class Source(DBBase):
     __tablename__ = "mon_sources"
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
-    mon_loc_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_loc.id", ondelete="CASCADE"), nullable=False)
+    mon_loc_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_loc.id", ondelete="CASCADE"), nullable=False, index=True)
     source_name = Column(Text, nullable=False)
     folder_path = Column(Text, nullable=False)
     file_keyword = Column(Text, nullable=False)
@@ -27,4 +27,4 @@ class Source(DBBase):
         back_populates="mon_sources",
     )
 
-    mon_sensors = relationship(MonitoringSensor, back_populates="mon_source", lazy="selectin")
\ No newline at end of file
+    mon_sensors = relationship(MonitoringSensor, back_populates="mon_source", lazy="raise_on_sql", passive_deletes=True)
\ No newline at end of file
@@ -1,43 +1,101 @@
-from typing import List, Optional
+from typing import List, Optional, Set
 from uuid import UUID
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.common.paginators import Keyset, Page
+from app.common.projections import Projection
+from app.common.types import PageParams
 from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_source import schemas
 from app.monitoring_source.models import Source
+from app.project.models import Project
 
+# Loader profiles. Collections are ``raise_on_sql`` on the models, so each
+# endpoint states what it serializes: the location/project details always,
+# the sensors (and their fields) only for the with-children variants.
+SOURCE_DETAILS = (joinedload(Source.mon_loc).joinedload(Location.project),)
+SOURCE_WITH_SENSOR_NAMES = SOURCE_DETAILS + (
+    selectinload(Source.mon_sensors).selectinload(MonitoringSensor.fields),
+)
+SOURCE_WITH_SENSORS = SOURCE_WITH_SENSOR_NAMES + (
+    selectinload(Source.mon_sensors).joinedload(MonitoringSensor.mon_loc_group),
+)
 
-def get_source(db: Session, source_id: UUID) -> Optional[Source]:
+# the columns behind schemas.Source, for the list endpoints
+SOURCE_ROW = Projection(schemas.Source, {
+    "id": Source.id,
+    "mon_loc_id": Source.mon_loc_id,
+    "source_name": Source.source_name,
+    "folder_path": Source.folder_path,
+    "file_keyword": Source.file_keyword,
+    "file_type": Source.file_type,
+    "source_type": Source.source_type,
+    "config": Source.config,
+    "last_data_upload": Source.last_data_upload,
+    "active": Source.active,
+    "root_directory": Source.root_directory,
+    "last_updated": Source.last_updated,
+    "details": {
+        "loc_number": Location.loc_number,
+        "loc_name": Location.loc_name,
+        "project_id": Project.id,
+        "project_number": Project.project_number,
+        "project_name": Project.project_name,
+    },
+})
+SOURCE_KEYSET = Keyset(Source.source_name, Source.id)
+
+
+def get_source(db: Session, source_id: UUID, profile=SOURCE_DETAILS) -> Optional[Source]:
     return (
         db.query(Source)
-        .options(joinedload(Source.mon_loc).joinedload(Location.project))
+        .options(*profile)
         .filter(Source.id == source_id)
         .first()
     )
 
 
-def get_sources(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[Source]:
-    return (
-        db.query(Source)
-        .options(joinedload(Source.mon_loc).joinedload(Location.project))
-        .order_by(Source.source_name)
-        .offset(skip)
-        .limit(limit)
-        .all()
+def get_sources(db: Session, page: PageParams, profile=SOURCE_DETAILS) -> Page:
+    return SOURCE_KEYSET.paginate(db.query(Source).options(*profile), page)
+
+def get_source_rows(
+    db: Session,
+    page: PageParams,
+    project_id: Optional[UUID] = None,
+    loc_id: Optional[UUID] = None,
+) -> Page:
+    qs = (
+        db.query(*SOURCE_ROW.columns)
+        .join(Location, Location.id == Source.mon_loc_id)
+        .join(Project, Project.id == Location.project_id)
     )
+    if project_id is not None:
+        qs = qs.filter(Location.project_id == project_id)
+    if loc_id is not None:
+        qs = qs.filter(Source.mon_loc_id == loc_id)
+    result = SOURCE_KEYSET.paginate(qs, page)
+    return result._replace(items=SOURCE_ROW.rows(result.items))
 
 def get_source_by_name(db: Session, source_name: str) -> Optional[Source]:
     return (
         db.query(Source)
-        .options(joinedload(Source.mon_loc).joinedload(Location.project))
+        .options(*SOURCE_DETAILS)
         .filter(Source.source_name == source_name)
         .first()
     )
 
 
-def get_source_updates(db: Session, skip: int = 0, limit: int = 100):
+def get_existing_source_ids(db: Session, source_ids: Set[UUID]) -> Set[UUID]:
+    return {row[0] for row in db.query(Source.id).filter(Source.id.in_(list(source_ids)))}
+
+
+def get_active_sources(db: Session) -> List[Source]:
+    return db.query(Source).filter(Source.active == 1).order_by(Source.source_name).all()
+
+
+def get_source_updates(db: Session, page: PageParams) -> Page:
     """Return only the id and last_updated fields for all sources."""
 
-    return db.query(Source.id, Source.last_updated).offset(skip).limit(limit).all()
+    return Keyset(Source.id).paginate(db.query(Source.id, Source.last_updated), page)
@@ -5,10 +5,11 @@ from app.monitoring_sensor_fields.schemas import (
     MonitoringSensorField,
     MonitoringSensorFieldName,
 )
-from app.location.models import Location
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from uuid import UUID
+from app.common.paginators import Page
+from app.common.types import PageParams
 from app.monitoring_sensor import services as sensor_services
 
 def touch_source(db: Session, source_id: UUID) -> Optional[Source]:
@@ -22,6 +23,15 @@ def touch_source(db: Session, source_id: UUID) -> Optional[Source]:
     db.refresh(obj)
     return obj
 
+def touch_sources(db: Session, source_ids) -> None:
+    """Update ``last_updated`` for many sources in one statement; the caller commits.
+
+    ``source_ids`` is a collection of ids or a subquery selecting them.
+    """
+    db.query(Source).filter(Source.id.in_(source_ids)).update(
+        {"last_updated": func.now()}, synchronize_session=False
+    )
+
 def create_source(db: Session, payload: schemas.SourceCreate) -> Source:
     obj = Source(**payload.dict())
     db.add(obj)
@@ -48,29 +58,16 @@ def delete_source(db: Session, source_id: UUID) -> None:
 def list_sources_for_project(
     db: Session,
     project_id: UUID,
-    skip: int = 0,
-) -> List[Source]:
-    return (
-        db.query(Source)
-          .join(Location, Source.mon_loc_id == Location.id)
-          .filter(Location.project_id == project_id)
-          .order_by(Source.source_name)
-          .offset(skip)
-          .all()
-    )
+    page: PageParams,
+) -> Page:
+    return selectors.get_source_rows(db, page, project_id=project_id)
 
 def list_sources_for_location(
     db: Session,
     loc_id: UUID,
-    skip: int = 0,
-) -> List[Source]:
-    return (
-        db.query(Source)
-          .filter(Source.mon_loc_id == loc_id)
-          .order_by(Source.source_name)
-          .offset(skip)
-          .all()
-    )
+    page: PageParams,
+) -> Page:
+    return selectors.get_source_rows(db, page, loc_id=loc_id)
 
 def enrich_source(
     source: Source,
@@ -107,7 +104,7 @@ def enrich_source(
             else:
                 base_model = sensor_services.enrich_sensor(sensor)
                 sensor_model = schemas.MonitoringSensorWithFields(
-                    **base_model.model_dump(),
+                    **base_model,
                     fields=[
                         MonitoringSensorField.model_construct(**f.__dict__)
                         for f in sorted(sensor.fields, key=lambda f: f.field_name or "")
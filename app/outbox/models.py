@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.config.database import DBBase
+
+class OutboxEvent(DBBase):
+    """A Kafka message written in the same transaction as the change it describes."""
+    __tablename__ = "outbox_events"
+
+    # monotonically increasing, so the relay publishes in commit-ish order
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    topic = Column(Text, nullable=False)
+    key = Column(Text, nullable=True)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,115 @@
+"""Transactional outbox: record events with the DB change, publish them later.
+
+Services call ``add_event`` before committing, so the event exists exactly
+when the change does. ``relay_outbox`` publishes pending events in batches,
+waits for each event's own delivery report and deletes only the events Kafka
+acknowledged (or the disk spool stored), which gives at-least-once delivery
+without producing on the request path. Other traffic on the shared producer
+does not hold a batch back. Several relays may run at once thanks to
+``SKIP LOCKED``.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app import kafka_producer
+from app.outbox.models import OutboxEvent
+
+
+def add_event(db: Session, topic: str, key: Optional[str], event: str, data: Dict[str, Any]) -> OutboxEvent:
+    """Stage an event in the caller's transaction; nothing is sent until the relay runs."""
+    obj = OutboxEvent(topic=topic, key=key, payload={"event": event, "data": jsonable_encoder(data)})
+    db.add(obj)
+    return obj
+
+
+def relay_outbox(db: Session, batch_size: int = 1000, delivery_timeout: float = 10.0) -> int:
+    """Publish pending events oldest first; returns how many were handed over.
+
+    A batch waits up to ``delivery_timeout`` seconds for its delivery reports.
+    """
+    total = 0
+    while True:
+        events = (
+            db.query(OutboxEvent)
+              .order_by(OutboxEvent.id)
+              .limit(batch_size)
+              .with_for_update(skip_locked=True)
+              .all()
+        )
+        if not events:
+            db.rollback()
+            return total
+        done: List[int] = []
+        reports = [0]
+        reported = threading.Condition()
+
+        def on_done(event_id: int):
+            def callback(error: Optional[str]) -> None:
+                with reported:
+                    reports[0] += 1
+                    if error is None:
+                        done.append(event_id)
+                    reported.notify_all()
+            return callback
+
+        sent = 0
+        try:
+            for event in events:
+                kafka_producer.send_kafka_message(
+                    topic=event.topic, key=event.key or "", value=event.payload, on_done=on_done(event.id),
+                )
+                sent += 1
+        finally:
+            deadline = time.monotonic() + delivery_timeout
+            with reported:
+                while reports[0] < sent and reported.wait(max(deadline - time.monotonic(), 0)):
+                    pass
+                delivered = list(done)
+            if delivered:
+                # the rest stay and go out again next time (at-least-once)
+                db.query(OutboxEvent).filter(OutboxEvent.id.in_(delivered)).delete(synchronize_session=False)
+                db.commit()
+            else:
+                db.rollback()
+        total += len(delivered)
+        if len(delivered) < len(events) or len(events) < batch_size:
+            return total
+
+
+_stop_relay = threading.Event()
+_relay_thread: Optional[threading.Thread] = None
+
+
+def _relay_loop(interval: float) -> None:
+    from app.config.database import SessionLocal
+
+    while not _stop_relay.wait(interval):
+        if not kafka_producer.ready.is_set() and kafka_producer.spool is None:
+            continue
+        db = SessionLocal()
+        try:
+            relay_outbox(db)
+        except Exception as e:
+            print("[Outbox] relay failed:", e)
+        finally:
+            db.close()
+
+
+def start_relay(interval: float = 1.0) -> None:
+    """Run ``relay_outbox`` every ``interval`` seconds on a daemon thread."""
+    global _relay_thread
+
+    _stop_relay.clear()
+    _relay_thread = threading.Thread(target=_relay_loop, args=(interval,), name="outbox-relay", daemon=True)
+    _relay_thread.start()
+
+
+def stop_relay(timeout: float = 10.0) -> None:
+    _stop_relay.set()
+    if _relay_thread is not None:
+        _relay_thread.join(timeout=timeout)
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_params
+from app.common.types import PageParams
 from app.project import schemas, selectors, services
-from app.location import schemas as location_schemas
+from app.project.tree import MAX_DEPTH, project_trees
+from app.location import schemas as location_schemas, selectors as location_selectors
 import app.location.services  as location_services
-from app.monitoring_source import schemas as source_schemas, services as source_services
-from app.monitoring_sensor import schemas as sensor_schemas, services as sensor_services
+from app.monitoring_source import (
+    schemas as source_schemas,
+    selectors as source_selectors,
+    services as source_services,
+)
+from app.monitoring_sensor import (
+    schemas as sensor_schemas,
+    selectors as sensor_selectors,
+    services as sensor_services,
+)
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -24,11 +34,11 @@ def create_project(
 )
 def list_project_locations(
     project_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    locations = location_services.list_locations_for_project(db, project_id, skip=skip)
-    return [location_services.enrich_location(loc) for loc in locations]
+    locations = location_services.list_locations_for_project(db, project_id, page)
+    return locations.apply(location_selectors.LOCATION_ROW.response(locations.items))
 
 @router.get(
     "/{project_id}/sources",
@@ -36,11 +46,11 @@ def list_project_locations(
 )
 def list_project_sources(
     project_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sources = source_services.list_sources_for_project(db, project_id, skip=skip)
-    return [source_services.enrich_source(src) for src in sources]
+    sources = source_services.list_sources_for_project(db, project_id, page)
+    return sources.apply(source_selectors.SOURCE_ROW.response(sources.items))
 
 @router.get(
     "/{project_id}/sensors",
@@ -48,11 +58,32 @@ def list_project_sources(
 )
 def list_project_sensors(
     project_id: UUID,
-    skip: int = 0,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    sensors = sensor_services.list_sensors_for_project(db, project_id, skip=skip)
-    return [sensor_services.enrich_sensor(sen) for sen in sensors]
+    sensors = sensor_services.list_sensors_for_project(db, project_id, page)
+    return sensors.apply(sensor_selectors.SENSOR_ROW.response(sensors.items))
+
+@router.get(
+    "/{project_id}/tree",
+    response_class=Response,
+    responses={200: {"content": {"application/json": {}}}, 304: {"description": "Tree unchanged"}},
+)
+def get_project_tree(
+    project_id: UUID,
+    depth: int = Query(MAX_DEPTH, ge=0, le=MAX_DEPTH, description="1 = locations ... 4 = sensor fields"),
+    minimal: bool = Query(False, description="Only ids and names at every level"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    tree = project_trees.get(db, project_id, depth, minimal)
+    if tree is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Project not found")
+    version, body = tree
+    etag = f'"{version}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.get("/{project_id}", response_model=schemas.Project)
 def get_project(project_id: UUID, db: Session = Depends(get_db)):
@@ -70,10 +101,13 @@ def get_project_by_number(project_number: str, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[schemas.Project])
 def list_projects(
-    skip: int = 0,
+    response: Response,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
 ):
-    return selectors.get_projects(db, skip=skip)
+    projects = selectors.get_projects(db, page)
+    projects.apply(response)
+    return projects.items
 
 @router.patch("/{project_id}", response_model=schemas.Project)
 def update_project(
@@ -2,8 +2,7 @@ from sqlalchemy import Column, Text, Date, Integer, DateTime, text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from app.config.database import DBBase
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy import select
 from app.location.models import Location
 
@@ -21,22 +20,19 @@ class Project(DBBase):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    # collections raise instead of loading; endpoints opt in to what they serialize
     mon_locs = relationship(
         Location,
         back_populates="project",
-        lazy="selectin",
-        cascade="all, delete-orphan"
+        lazy="raise_on_sql",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
-    @hybrid_property
-    def locations_count(self) -> int:
-        return len(self.mon_locs)
-    
-    @locations_count.expression
-    def locations_count(cls):
-        return (
-            select(func.count(Location.id))
-            .where(Location.project_id == cls.id)
-            .correlate(cls)
-            .scalar_subquery()
-        )
+    # counted in the same SELECT, so listing projects never touches their locations
+    locations_count = column_property(
+        select(func.count(Location.id))
+        .where(Location.project_id == id)
+        .correlate_except(Location)
+        .scalar_subquery()
+    )
@@ -1,22 +1,26 @@
 # app/project/selectors.py
 
-from typing import List, Optional
+from typing import Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.common.paginators import Keyset, Page
+from app.common.types import PageParams
 from app.project.models  import Project as ProjectModel
 from app.project.schemas import Project as ProjectSchema
 
-def get_projects(db: Session, skip: int = 0) -> List[ProjectSchema]:
-    stmt     = select(ProjectModel).order_by(ProjectModel.start_date.desc()).offset(skip)
-    projects = db.execute(stmt).scalars().all()
-    return [ProjectSchema.from_orm(p) for p in projects]
+# newest projects first, as before; the id keeps equal start dates in a stable order
+PROJECT_KEYSET = Keyset(ProjectModel.start_date, ProjectModel.id, descending=True)
+
+def get_projects(db: Session, page: PageParams) -> Page:
+    projects = PROJECT_KEYSET.paginate(db.query(ProjectModel), page)
+    return projects._replace(items=[ProjectSchema.model_validate(p) for p in projects.items])
 
 def get_project(db: Session, project_id: UUID) -> Optional[ProjectSchema]:
     stmt = select(ProjectModel).where(ProjectModel.id == project_id)
     p = db.execute(stmt).scalars().first()
-    return ProjectSchema.from_orm(p) if p else None
+    return ProjectSchema.model_validate(p) if p else None
 
 def get_project_model(db: Session, project_id: UUID) -> Optional[ProjectModel]:
     return db.get(ProjectModel, project_id)
@@ -24,4 +28,4 @@ def get_project_model(db: Session, project_id: UUID) -> Optional[ProjectModel]:
 def get_project_by_number(db: Session, project_number: int) -> Optional[ProjectSchema]:
     stmt = select(ProjectModel).where(ProjectModel.project_number == project_number)
     p = db.execute(stmt).scalars().first()
-    return ProjectSchema.from_orm(p) if p else None
\ No newline at end of file
+    return ProjectSchema.model_validate(p) if p else None
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""The project -> location -> source -> sensor -> field hierarchy as one JSON document.
+
+Postgres assembles the whole tree in a single statement: every level is a
+correlated ``json_agg`` of ``json_build_object`` rows, ordered by name in
+SQL, and the result comes back as text that is sent as-is. Trees are cached
+per ``(project, depth, minimal)`` and versioned by the newest
+``last_updated`` below the project together with the number of rows at each
+level, so deletions (which leave no timestamp behind) also change the
+version. Checking the version is one small query.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Text, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.config.settings import get_settings
+from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+MAX_DEPTH = 4  # locations, sources, sensors, fields
+
+
+class Level(NamedTuple):
+    key: str  # the parent's attribute holding this level
+    minimal: List[ColumnElement]
+    full: List[ColumnElement]
+    parent: Optional[ColumnElement]  # foreign key to the level above
+    order_by: Optional[ColumnElement]
+
+
+LEVELS = [
+    Level(
+        "project",
+        [Project.id, Project.project_number, Project.project_name],
+        [Project.description, Project.start_date, Project.end_date, Project.status,
+         Project.active, Project.created_at, Project.last_updated],
+        None,
+        None,
+    ),
+    Level(
+        "locations",
+        [Location.id, Location.loc_number, Location.loc_name],
+        [Location.lat, Location.lon, Location.frequency, Location.active,
+         Location.created_at, Location.last_updated],
+        Location.project_id,
+        Location.loc_name,
+    ),
+    Level(
+        "sources",
+        [Source.id, Source.source_name],
+        [Source.folder_path, Source.file_keyword, Source.file_type, Source.source_type, Source.config,
+         Source.last_data_upload, Source.active, Source.root_directory, Source.last_updated],
+        Source.mon_loc_id,
+        Source.source_name,
+    ),
+    Level(
+        "sensors",
+        [MonitoringSensor.id, MonitoringSensor.sensor_name],
+        [MonitoringSensor.sensor_type, MonitoringSensor.sensor_group_id, MonitoringSensor.active,
+         MonitoringSensor.created_at, MonitoringSensor.last_updated],
+        MonitoringSensor.mon_source_id,
+        MonitoringSensor.sensor_name,
+    ),
+    Level(
+        "fields",
+        [MonitoringSensorField.id, MonitoringSensorField.field_name],
+        [MonitoringSensorField.uom, MonitoringSensorField.is_calculated, MonitoringSensorField.field_type],
+        MonitoringSensorField.sensor_id,
+        MonitoringSensorField.field_name,
+    ),
+]
+
+
+def _object(level_no: int, depth: int, minimal: bool) -> ColumnElement:
+    level = LEVELS[level_no]
+    columns = level.minimal if minimal else level.minimal + level.full
+    args: List[ColumnElement] = []
+    for column in columns:
+        args += [literal_column(f"'{column.key}'"), column]
+    if level_no < depth:
+        child = LEVELS[level_no + 1]
+        args += [literal_column(f"'{child.key}'"), _children(level_no + 1, depth, minimal)]
+    return func.json_build_object(*args)
+
+
+def _children(level_no: int, depth: int, minimal: bool) -> ColumnElement:
+    level = LEVELS[level_no]
+    parent_id = LEVELS[level_no - 1].minimal[0]
+    rows = func.json_agg(aggregate_order_by(_object(level_no, depth, minimal), level.order_by))
+    return (
+        select(func.coalesce(rows, literal_column("'[]'::json")))
+        .where(level.parent == parent_id)
+        .scalar_subquery()
+    )
+
+
+def tree_query(project_id: UUID, depth: int = MAX_DEPTH, minimal: bool = False):
+    """The project's tree, ``depth`` levels down, as one JSON text value."""
+    return select(cast(_object(0, depth, minimal), Text)).where(Project.id == project_id)
+
+
+def version_query(project_id: UUID):
+    """Newest ``last_updated`` and row counts below the project, in one row."""
+    locations = select(Location.id).where(Location.project_id == project_id)
+    sources = select(Source.id).where(Source.mon_loc_id.in_(locations))
+    sensors = select(MonitoringSensor.id).where(MonitoringSensor.mon_source_id.in_(sources))
+
+    columns = [Project.last_updated]
+    for model, below_project in (
+        (Location, Location.project_id == project_id),
+        (Source, Source.mon_loc_id.in_(locations)),
+        (MonitoringSensor, MonitoringSensor.mon_source_id.in_(sources)),
+        (MonitoringSensorField, MonitoringSensorField.sensor_id.in_(sensors)),
+    ):
+        columns.append(select(func.count()).select_from(model).where(below_project).scalar_subquery())
+        if hasattr(model, "last_updated"):  # fields have none; their services touch the parent source
+            columns.append(select(func.max(model.last_updated)).where(below_project).scalar_subquery())
+    return select(*columns).where(Project.id == project_id)
+
+
+def tree_version(db: Session, project_id: UUID) -> Optional[str]:
+    row = db.execute(version_query(project_id)).first()
+    if row is None:
+        return None
+    return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()[:20]
+
+
+class ProjectTreeCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[UUID, int, bool], Tuple[str, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, db: Session, project_id: UUID, depth: int = MAX_DEPTH, minimal: bool = False) -> Optional[Tuple[str, bytes]]:
+        """``(version, JSON bytes)`` of the tree, or None when the project does not exist."""
+        version = tree_version(db, project_id)
+        key = (project_id, depth, minimal)
+        if version is None:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(key)
+                return cached
+        text = db.execute(tree_query(project_id, depth, minimal)).scalar()
+        if text is None:  # deleted in between
+            return None
+        entry = (version, text.encode())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+project_trees = ProjectTreeCache(get_settings().PROJECT_TREE_CACHE_SIZE)
@@ -3,7 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
 
-from app.common.dependencies import get_db
+from app.common.dependencies import get_db, page_limit
 from app.scheduler_task import schemas, selectors, services
 from app.scheduler_task.services import run_task_by_id
 
@@ -29,7 +29,7 @@ def get_task(task_id: UUID, db: Session = Depends(get_db)):
 @router.get("/", response_model=List[schemas.SchedulerTask])
 def list_tasks(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Depends(page_limit),
     enabled: Optional[int] = None,
     db: Session = Depends(get_db),
 ):
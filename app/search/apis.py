@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.common.dependencies import get_db
+from app.search import schemas, selectors
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("/", response_model=List[schemas.SearchHit])
+def search(
+    q: str = Query(..., min_length=2, max_length=200, description="Part of a name or number"),
+    types: Optional[List[schemas.SearchType]] = Query(None, description="Only these entity types"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    return selectors.search(db, q.strip(), types, limit)
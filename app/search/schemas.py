@@ -0,0 +1,15 @@
+from typing import Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+SearchType = Literal["project", "location", "source", "sensor"]
+
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: UUID
+    name: str
+    number: Optional[str] = None  # project_number / loc_number
+    parent_id: Optional[UUID] = None  # project of a location, location of a source, source of a sensor
+    score: float
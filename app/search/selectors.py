@@ -0,0 +1,78 @@
+"""Name search across projects, locations, sources and sensors.
+
+One ``UNION ALL`` statement with a branch per table. Every branch filters
+its name (and number) columns with ``ILIKE '%q%'`` or the trigram
+similarity operator ``%``, both answered by the ``gin_trgm_ops`` indexes of
+the ``search_trigram_indexes`` migration, and keeps only its best ``limit``
+hits. Hits rank exact matches first, then prefixes, then by trigram
+similarity.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import Float, Text, case, cast, func, literal, null, or_, select, union_all
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from app.location.models import Location
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+
+class Target(NamedTuple):
+    id: ColumnElement
+    name: ColumnElement
+    number: Optional[ColumnElement]
+    parent: Optional[ColumnElement]
+
+
+TARGETS: Dict[str, Target] = {
+    "project": Target(Project.id, Project.project_name, Project.project_number, None),
+    "location": Target(Location.id, Location.loc_name, Location.loc_number, Location.project_id),
+    "source": Target(Source.id, Source.source_name, None, Source.mon_loc_id),
+    "sensor": Target(MonitoringSensor.id, MonitoringSensor.sensor_name, None, MonitoringSensor.mon_source_id),
+}
+
+
+def _matches(column: ColumnElement, q: str) -> ColumnElement:
+    return or_(column.icontains(q, autoescape=True), column.op("%")(q))
+
+
+def _score(column: ColumnElement, q: str) -> ColumnElement:
+    rank = case(
+        (func.lower(column) == q.lower(), 2.0),
+        (column.istartswith(q, autoescape=True), 1.0),
+        else_=0.0,
+    )
+    return func.coalesce(rank + func.similarity(column, q), 0.0)
+
+
+def _branch(type_: str, target: Target, q: str, limit: int):
+    columns = [target.name] + ([target.number] if target.number is not None else [])
+    score = _score(columns[0], q) if len(columns) == 1 else func.greatest(*(_score(c, q) for c in columns))
+    score = cast(score, Float).label("score")
+    return (
+        select(
+            literal(type_, Text).label("type"),
+            target.id.label("id"),
+            target.name.label("name"),
+            (target.number if target.number is not None else cast(null(), Text)).label("number"),
+            (target.parent if target.parent is not None else cast(null(), PGUUID(as_uuid=True))).label("parent_id"),
+            score,
+        )
+        .where(or_(*(_matches(c, q) for c in columns)))
+        .order_by(score.desc(), target.name)
+        .limit(limit)
+    )
+
+
+def search_query(q: str, types: Optional[Sequence[str]] = None, limit: int = 20):
+    branches = [_branch(t, target, q, limit) for t, target in TARGETS.items() if not types or t in types]
+    hits = union_all(*branches).subquery("hits")
+    return select(hits).order_by(hits.c.score.desc(), hits.c.name, hits.c.type).limit(limit)
+
+
+def search(db: Session, q: str, types: Optional[Sequence[str]] = None, limit: int = 20) -> List[dict]:
+    return [dict(row._mapping) for row in db.execute(search_query(q, types, limit))]
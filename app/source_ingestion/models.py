@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, LargeBinary, Text, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.sql import func
+from app.config.database import DBBase
+
+class SourceFileCheckpoint(DBBase):
+    """How far a single logger file of a Source has been ingested."""
+
+    __tablename__ = "mon_source_file_checkpoints"
+
+    __table_args__ = (
+        UniqueConstraint("source_id", "file_path", name="uq_source_file_checkpoint"),
+    )
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    source_id = Column(PGUUID(as_uuid=True), ForeignKey("mon_sources.id", ondelete="CASCADE"), nullable=False)
+    file_path = Column(Text, nullable=False)
+    inode = Column(BigInteger, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    byte_offset = Column(BigInteger, nullable=False)
+    tail_anchor = Column(LargeBinary, nullable=True)  # bytes just before byte_offset, to spot copytruncate
+    last_timestamp = Column(DateTime(timezone=True), nullable=True)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
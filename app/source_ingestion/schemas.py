@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from uuid import UUID
+
+
+class SourceIngestFileResult(BaseModel):
+    file: str
+    rows: int = 0
+    skipped: bool = False
+    error: Optional[str] = None
+
+
+class SourceIngestResult(BaseModel):
+    source_id: UUID
+    rows: int = 0
+    files: List[SourceIngestFileResult] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class SourceIngestQueued(BaseModel):
+    source_id: UUID
+    queued: bool  # False when the source was already waiting to be ingested
@@ -0,0 +1,10 @@
+from typing import Dict
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.source_ingestion.models import SourceFileCheckpoint
+
+
+def get_checkpoints(db: Session, source_id: UUID) -> Dict[str, SourceFileCheckpoint]:
+    """Return the file checkpoints of a source keyed by file path."""
+    rows = db.query(SourceFileCheckpoint).filter(SourceFileCheckpoint.source_id == source_id).all()
+    return {row.file_path: row for row in rows}
@@ -0,0 +1,392 @@
+"""Ingest logger files from disk using the ``Source`` folder settings."""
+
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert.engine import evaluate_series
+from app.monitoring_sensor_data.services import copy_sensor_data
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source import selectors as source_selectors
+from app.monitoring_source.models import Source
+from app.source_ingestion import schemas, selectors
+from app.source_ingestion.models import SourceFileCheckpoint
+from app.source_ingestion.parsers import ParsedFile, get_parser
+from app.source_ingestion.tail import FileTail, TailState, is_unchanged, read_file_tail
+
+# (mon_loc_id, sensor_id, sensor_field_id, timestamps, values)
+Series = Tuple[UUID, UUID, UUID, np.ndarray, np.ndarray]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def load_source_config(source: Source) -> dict:
+    """``Source.config`` is stored as JSON text; anything else is ignored."""
+    if not source.config:
+        return {}
+    try:
+        config = json.loads(source.config)
+    except ValueError:
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def source_directory(source: Source) -> str:
+    return os.path.join(source.root_directory or "", source.folder_path)
+
+
+def list_source_files(source: Source) -> List[str]:
+    """Files in the source folder whose name contains ``file_keyword``, oldest first."""
+    directory = source_directory(source)
+    if not os.path.isdir(directory):
+        return []
+    keyword = (source.file_keyword or "").lower()
+    with os.scandir(directory) as entries:
+        files = [e for e in entries if e.is_file() and keyword in e.name.lower()]
+    files.sort(key=lambda e: (e.stat().st_mtime, e.name))
+    return [e.path for e in files]
+
+
+def build_column_map(db: Session, source: Source, config: dict) -> Dict[str, Tuple[UUID, UUID]]:
+    """Map file column names to ``(sensor_id, sensor_field_id)`` for a source.
+
+    Columns are matched as ``<sensor_name><sep><field_name>`` (``sep`` from
+    ``config["column_separator"]``, default ``"_"``), or by the bare sensor
+    name for single-field sensors. ``config["columns"]`` may map a column
+    name straight to a field id and takes precedence.
+    """
+    sep = config.get("column_separator", "_")
+    rows = (
+        db.query(MonitoringSensor.id, MonitoringSensor.sensor_name, MonitoringSensorField.id, MonitoringSensorField.field_name)
+          .join(MonitoringSensorField, MonitoringSensorField.sensor_id == MonitoringSensor.id)
+          .filter(MonitoringSensor.mon_source_id == source.id, MonitoringSensor.active == 1)
+          .all()
+    )
+
+    mapping: Dict[str, Tuple[UUID, UUID]] = {}
+    by_field: Dict[str, Tuple[UUID, UUID]] = {}
+    field_counts: Dict[UUID, int] = {}
+    for sensor_id, sensor_name, field_id, field_name in rows:
+        mapping[f"{sensor_name}{sep}{field_name}"] = (sensor_id, field_id)
+        by_field[str(field_id)] = (sensor_id, field_id)
+        field_counts[sensor_id] = field_counts.get(sensor_id, 0) + 1
+    for sensor_id, sensor_name, field_id, _ in rows:
+        if field_counts[sensor_id] == 1:
+            mapping.setdefault(sensor_name, (sensor_id, field_id))
+
+    for column, field_id in (config.get("columns") or {}).items():
+        if str(field_id) in by_field:
+            mapping[column] = by_field[str(field_id)]
+    return mapping
+
+
+def parse_high_water_mark(value: Optional[str]) -> Optional[np.datetime64]:
+    """``last_data_upload`` holds the newest ingested timestamp as ISO text."""
+    if not value:
+        return None
+    try:
+        return _as_datetime64(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def select_series(
+    source: Source,
+    parsed: ParsedFile,
+    column_map: Dict[str, Tuple[UUID, UUID]],
+    since: Optional[np.datetime64] = None,
+) -> Tuple[List[Series], int, Optional[np.datetime64]]:
+    """Pick the mapped columns of ``parsed`` with rows newer than ``since``.
+
+    Returns the series ready for ``copy_sensor_data``, the number of
+    readings they hold and the newest timestamp seen.
+    """
+    if not len(parsed):
+        return [], 0, None
+    keep = parsed.timestamps > since if since is not None else np.ones(len(parsed), dtype=bool)
+    if not keep.any():
+        return [], 0, None
+    timestamps = parsed.timestamps[keep]
+
+    series: List[Series] = []
+    rows = 0
+    for column, (sensor_id, field_id) in column_map.items():
+        if column not in parsed.columns:
+            continue
+        values = parsed.columns[column][keep]
+        series.append((source.mon_loc_id, sensor_id, field_id, timestamps, values))
+        rows += int(np.isfinite(values).sum())
+    return series, rows, timestamps.max()
+
+
+def _as_datetime64(value: datetime) -> np.datetime64:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "us")
+
+
+def _as_datetime(ts: np.datetime64) -> datetime:
+    return ts.astype("datetime64[us]").item().replace(tzinfo=timezone.utc)
+
+
+def _format_high_water_mark(ts: np.datetime64) -> str:
+    return np.datetime_as_string(ts, unit="us") + "+00:00"
+
+
+def _save_checkpoint(
+    db: Session,
+    source: Source,
+    path: str,
+    checkpoint: Optional[SourceFileCheckpoint],
+    tail: FileTail,
+    newest: Optional[np.datetime64],
+) -> SourceFileCheckpoint:
+    if checkpoint is None:
+        checkpoint = SourceFileCheckpoint(source_id=source.id, file_path=path)
+        db.add(checkpoint)
+    checkpoint.inode = tail.inode
+    checkpoint.size = tail.size
+    checkpoint.byte_offset = tail.byte_offset
+    checkpoint.tail_anchor = tail.anchor
+    if newest is not None:
+        checkpoint.last_timestamp = _as_datetime(newest)
+    return checkpoint
+
+
+def parse_file_job(job: Tuple[str, str, dict, Optional[TailState], Optional[int]]) -> Tuple[Optional[FileTail], Optional[str]]:
+    """Process-pool entry point: parse one file tail into columnar arrays.
+
+    Only plain, picklable values cross the process boundary in either
+    direction; errors are returned rather than raised so one bad file does
+    not abort the whole run.
+    """
+    path, file_type, config, state, max_bytes = job
+    try:
+        return read_file_tail(path, get_parser(file_type), config, state, max_bytes), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+@dataclass
+class _SourcePlan:
+    source: Source
+    config: dict
+    file_type: str
+    column_map: Dict[str, Tuple[UUID, UUID]]
+    checkpoints: Dict[str, SourceFileCheckpoint]
+    result: schemas.SourceIngestResult
+
+
+@dataclass
+class _PendingFile:
+    plan: _SourcePlan
+    file_result: schemas.SourceIngestFileResult
+    checkpoint: Optional[SourceFileCheckpoint]
+    tail: FileTail
+    series: List[Series]
+    rows: int
+    newest: Optional[np.datetime64]
+
+
+class _SensorDataWriter:
+    """Single writer that groups parsed files into large COPY batches.
+
+    Files are added in the order they were submitted, which keeps the writes
+    for each sensor field in file order. Rows, alerts raised by them,
+    checkpoints and ``last_data_upload`` of a batch are committed in one
+    transaction. When a batch fails, its files are written again one by one,
+    so only the files that fail on their own are marked failed.
+    """
+
+    def __init__(self, db: Session, batch_rows: int):
+        self.db = db
+        self.batch_rows = batch_rows
+        self.pending: List[_PendingFile] = []
+        self.rows = 0
+
+    def add(self, plan: _SourcePlan, file_result: schemas.SourceIngestFileResult, tail: FileTail) -> None:
+        checkpoint = plan.checkpoints.get(file_result.file)
+        # after a rotation/truncation the file is re-read from the top,
+        # so rows that were already ingested are dropped by timestamp
+        since = None
+        if tail.reset and checkpoint.last_timestamp is not None:
+            since = _as_datetime64(checkpoint.last_timestamp)
+        series, rows, newest = select_series(plan.source, tail.parsed, plan.column_map, since)
+
+        self.pending.append(_PendingFile(plan, file_result, checkpoint, tail, series, rows, newest))
+        self.rows += rows
+        if self.rows >= self.batch_rows:
+            self.flush()
+
+    def _write(self, items: List[_PendingFile]) -> None:
+        for item in items:
+            source, path = item.plan.source, item.file_result.file
+            item.plan.checkpoints[path] = _save_checkpoint(self.db, source, path, item.checkpoint, item.tail, item.newest)
+            high_water_mark = parse_high_water_mark(source.last_data_upload)
+            if item.newest is not None and (high_water_mark is None or item.newest > high_water_mark):
+                source.last_data_upload = _format_high_water_mark(item.newest)
+        series = [s for item in items for s in item.series]
+        copy_sensor_data(self.db, series)
+        evaluate_series(self.db, series)
+        self.db.commit()
+        for item in items:
+            item.file_result.rows += item.rows
+            item.plan.result.rows += item.rows
+
+    def flush(self) -> None:
+        pending, self.pending, self.rows = self.pending, [], 0
+        if not pending:
+            return
+        try:
+            self._write(pending)
+        except Exception as exc:
+            self.db.rollback()
+            if len(pending) == 1:
+                self._fail(pending[0], exc)
+                return
+            for item in pending:  # find the files that fail on their own
+                try:
+                    self._write([item])
+                except Exception as item_exc:
+                    self.db.rollback()
+                    self._fail(item, item_exc)
+
+    @staticmethod
+    def _fail(item: _PendingFile, exc: Exception) -> None:
+        item.file_result.error = str(exc)
+        item.plan.checkpoints.pop(item.file_result.file, None)
+
+
+def _plan_source(db: Session, source: Source) -> _SourcePlan:
+    config = load_source_config(source)
+    plan = _SourcePlan(
+        source=source,
+        config=config,
+        file_type=config.get("format") or source.file_type,
+        column_map={},
+        checkpoints={},
+        result=schemas.SourceIngestResult(source_id=source.id),
+    )
+    try:
+        get_parser(plan.file_type)
+    except ValueError as exc:
+        plan.result.error = str(exc)
+        return plan
+    plan.column_map = build_column_map(db, source, config)
+    if not plan.column_map:
+        plan.result.error = "No sensor fields match the source columns"
+        return plan
+    plan.checkpoints = selectors.get_checkpoints(db, source.id)
+    return plan
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    # the API process runs daemon threads (Kafka poller, registry, relay);
+    # forking it could copy a lock another thread holds into every worker
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def map_in_order(executor: Executor, fn: Callable[[T], R], items: Iterable[T], in_flight: int) -> Iterator[R]:
+    """Like ``executor.map``, but with at most ``in_flight`` items submitted
+    ahead of the one being consumed, so results cannot pile up in memory."""
+    futures = deque()
+    for item in items:
+        if len(futures) >= in_flight:
+            yield futures.popleft().result()
+        futures.append(executor.submit(fn, item))
+    while futures:
+        yield futures.popleft().result()
+
+
+def _tail_state(checkpoint: Optional[SourceFileCheckpoint]) -> Optional[TailState]:
+    if checkpoint is None:
+        return None
+    return TailState(
+        inode=checkpoint.inode,
+        byte_offset=checkpoint.byte_offset,
+        size=checkpoint.size,
+        tail_anchor=checkpoint.tail_anchor,
+    )
+
+
+def ingest_sources(
+    db: Session,
+    sources: List[Source],
+    workers: Optional[int] = None,
+) -> List[schemas.SourceIngestResult]:
+    """Load the rows appended to every matching file of ``sources``.
+
+    Files whose inode and size match their checkpoint are skipped after a
+    single ``stat``. The others are parsed in a process pool of ``workers``
+    processes (``INGEST_WORKERS`` by default, ``0`` meaning one per CPU) and
+    handed, in submission order, to a single writer that batches COPY. Each
+    file is read at most ``INGEST_TAIL_CHUNK_BYTES`` at a time; files with
+    more to read go round again once the previous chunks are committed.
+    """
+    settings = get_settings()
+    if workers is None:
+        workers = settings.INGEST_WORKERS or os.cpu_count() or 1
+
+    plans = [_plan_source(db, source) for source in sources]
+    jobs: List[Tuple[_SourcePlan, schemas.SourceIngestFileResult, Optional[TailState]]] = []
+    for plan in plans:
+        if plan.result.error:
+            continue
+        for path in list_source_files(plan.source):
+            file_result = schemas.SourceIngestFileResult(file=path)
+            plan.result.files.append(file_result)
+            checkpoint = plan.checkpoints.get(path)
+            if is_unchanged(path, checkpoint):
+                file_result.skipped = True
+                continue
+            jobs.append((plan, file_result, _tail_state(checkpoint)))
+
+    writer = _SensorDataWriter(db, settings.INGEST_COPY_BATCH_ROWS)
+    with ExitStack() as stack:
+        mapper: Callable = map
+        if workers > 1 and len(jobs) > 1:
+            pool_size = min(workers, len(jobs))
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=pool_size, mp_context=_pool_context()))
+            mapper = partial(map_in_order, pool, in_flight=2 * pool_size)
+        while jobs:
+            payloads = (
+                (file_result.file, plan.file_type, plan.config, state, settings.INGEST_TAIL_CHUNK_BYTES)
+                for plan, file_result, state in jobs
+            )
+            unfinished = []
+            for (plan, file_result, _), (tail, error) in zip(jobs, mapper(parse_file_job, payloads)):
+                if error is not None:
+                    file_result.error = error
+                    continue
+                writer.add(plan, file_result, tail)
+                if tail.more:
+                    unfinished.append((plan, file_result, TailState(tail.inode, tail.byte_offset, tail.size, tail.anchor)))
+            writer.flush()
+            # a failed chunk is retried from its checkpoint on the next run, never skipped over
+            jobs = [job for job in unfinished if job[1].error is None]
+
+    return [plan.result for plan in plans]
+
+
+def ingest_source(db: Session, source: Source) -> schemas.SourceIngestResult:
+    return ingest_sources(db, [source])[0]
+
+
+def ingest_active_sources(db: Session) -> List[schemas.SourceIngestResult]:
+    return ingest_sources(db, source_selectors.get_active_sources(db))
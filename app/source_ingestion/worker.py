@@ -0,0 +1,69 @@
+"""Background ingestion of the sources queued through the API.
+
+``POST /monitoring-sources/{id}/ingest`` only queues the source and returns;
+one daemon thread works through the queue with its own session, so a
+request never runs the parser pool itself. A source that is already waiting
+is queued once.
+"""
+
+import logging
+import queue
+import threading
+from typing import Optional, Set
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+_queue: "queue.Queue[Optional[UUID]]" = queue.Queue()
+_queued: Set[UUID] = set()
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def submit_ingest(source_id: UUID) -> bool:
+    """Queue ``source_id`` for ingestion; False when it is already waiting."""
+    global _thread
+
+    with _lock:
+        if source_id in _queued:
+            return False
+        _queued.add(source_id)
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_ingest_loop, name="source-ingest", daemon=True)
+            _thread.start()
+    _queue.put(source_id)
+    return True
+
+
+def _ingest_loop() -> None:
+    # imported on use: the ingestion engine pulls in numpy
+    from app.config.database import SessionLocal
+    from app.monitoring_source.selectors import get_source
+    from app.source_ingestion.services import ingest_source
+
+    while True:
+        source_id = _queue.get()
+        if source_id is None:
+            return
+        with _lock:
+            _queued.discard(source_id)  # files written from now on need another run
+        db = SessionLocal()
+        try:
+            source = get_source(db, source_id)
+            if source is not None:
+                result = ingest_source(db, source)
+                logger.info("Ingested %d rows from source %s (%s)", result.rows, source_id, result.error or "ok")
+        except Exception:
+            logger.exception("Ingesting source %s failed", source_id)
+        finally:
+            db.close()
+
+
+def stop_ingest_worker(timeout: float = 10.0) -> None:
+    global _thread
+
+    if _thread is None:
+        return
+    _queue.put(None)
+    _thread.join(timeout=timeout)
+    _thread = None
@@ -0,0 +1,111 @@
+"""``/monitoring-sensors/`` serialization: ORM enrichment vs. lean row projection.
+
+Both paths run against an in-memory SQLite copy of the metadata tables and
+end with the JSON body the endpoint sends:
+
+* enrich: load ``MonitoringSensor`` objects with their source and group,
+  ``enrich_sensor`` each one, then validate and dump against the
+  ``response_model`` the way FastAPI does;
+* rows: ``get_monitoring_sensor_rows`` selects only the emitted columns and
+  ``SENSOR_ROW.response`` hands the dicts to orjson.
+
+    python -m benchmarks.bench_list_projection
+"""
+
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import List
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.common.types import PageParams
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor import schemas, selectors, services
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+SENSOR_COUNTS = (1_000, 10_000, 50_000)
+SENSORS_PER_SOURCE = 50
+REPEAT = 3
+TABLES = [t.__table__ for t in (Project, Location, Source, MonitoringGroup, MonitoringSensor)]
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb(element, compiler, **kw):
+    return "TEXT"
+
+
+def make_engine():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda conn, _: conn.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4())))
+    for table in TABLES:
+        for column in table.columns:
+            if column.server_default is not None and "gen_random_uuid" in str(column.server_default.arg):
+                column.server_default = None
+    DBBase.metadata.create_all(engine, tables=TABLES)
+    return engine
+
+
+def populate(engine, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    project_id, loc_id, group_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    source_ids = [uuid.uuid4() for _ in range(count // SENSORS_PER_SOURCE)]
+    with engine.begin() as conn:
+        conn.execute(insert(Project), [{"id": project_id, "project_name": "P", "start_date": date.today(), "status": "active"}])
+        conn.execute(insert(Location), [{"id": loc_id, "project_id": project_id, "loc_name": "L", "lat": 0.0, "lon": 0.0, "frequency": "daily"}])
+        conn.execute(insert(MonitoringGroup), [{"id": group_id, "mon_loc_id": loc_id, "group_name": "G", "group_type": "chain"}])
+        conn.execute(insert(Source), [
+            {"id": sid, "mon_loc_id": loc_id, "source_name": f"S{i:05d}", "folder_path": "fp", "file_keyword": "kw", "file_type": "csv"}
+            for i, sid in enumerate(source_ids)
+        ])
+        conn.execute(insert(MonitoringSensor), [
+            {
+                "id": uuid.uuid4(), "mon_source_id": source_ids[i // SENSORS_PER_SOURCE], "sensor_group_id": group_id,
+                "sensor_name": f"sen{i:06d}", "sensor_type": "analog", "created_at": now, "last_updated": now,
+            }
+            for i in range(count)
+        ])
+
+
+def enrich(db: Session, adapter: TypeAdapter, page: PageParams) -> bytes:
+    payload = [services.enrich_sensor(s) for s in selectors.get_monitoring_sensors(db, page).items]
+    return ORJSONResponse(adapter.dump_python(adapter.validate_python(payload), mode="json")).body
+
+
+def rows(db: Session, page: PageParams) -> bytes:
+    return selectors.SENSOR_ROW.response(selectors.get_monitoring_sensor_rows(db, page).items).body
+
+
+def timed(fn, engine, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            fn(db, *args)
+            best = min(best, time.perf_counter() - started)
+    return best * 1e3
+
+
+def main() -> None:
+    adapter = TypeAdapter(List[schemas.MonitoringSensor])
+    print(f"{'sensors':>8} {'enrich ms':>10} {'rows ms':>8} {'speedup':>8}")
+    for count in SENSOR_COUNTS:
+        engine = make_engine()
+        populate(engine, count)
+        page = PageParams(limit=count)  # one page holding every sensor
+        before, after = timed(enrich, engine, adapter, page), timed(rows, engine, page)
+        print(f"{count:>8} {before:>10.1f} {after:>8.1f} {before / after:>7.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-reading alert evaluation cost as the number of rules grows.
+
+Loads synthetic rules (two per field) into a ``RuleIndex`` and times the
+in-memory part of ``evaluate_series`` -- lookup, derived matrix and alarm
+state -- for a fixed batch of readings. The cost should stay flat from 100
+to 100,000 rules, since a reading only touches the rules of its own field.
+
+    python -m benchmarks.bench_rule_index
+"""
+
+import time
+import uuid
+
+import numpy as np
+
+from app.monitoring_sensor_alert.engine import alarm_transitions, derived_matrix
+from app.monitoring_sensor_alert.rule_index import RuleIndex, RuleRow
+
+RULE_COUNTS = (100, 1_000, 10_000, 100_000)
+FIELDS_PER_BATCH = 50
+READINGS_PER_FIELD = 20
+REPEAT = 20
+
+
+def synthetic_rules(count: int):
+    rows = []
+    for _ in range(count // 2):
+        field_id, sensor_id = uuid.uuid4(), uuid.uuid4()
+        rows.append(RuleRow(uuid.uuid4(), field_id, sensor_id, "threshold", -10.0, 10.0, 0.5, 300, None))
+        rows.append(RuleRow(uuid.uuid4(), field_id, sensor_id, "rate_of_change", None, 50.0, 0.0, 300, None))
+    return rows
+
+
+def evaluate(index: RuleIndex, field_ids, times: np.ndarray, values: np.ndarray) -> int:
+    starts = 0
+    for field_id in field_ids:
+        rules = index.lookup(field_id)
+        unseen = np.full(len(rules.rule_ids), np.nan)
+        derived = derived_matrix(rules, times, values, index.baseline(rules.sensor_id), unseen, unseen)
+        (rule_idx, _), _, _ = alarm_transitions(derived, rules.lower, rules.upper, rules.hysteresis, np.zeros(len(unseen), dtype=bool))
+        starts += len(rule_idx)
+    return starts
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    times = np.arange(READINGS_PER_FIELD) * 60.0
+    values = rng.normal(0.0, 8.0, READINGS_PER_FIELD)
+    readings = FIELDS_PER_BATCH * READINGS_PER_FIELD
+    print(f"{'rules':>8} {'load ms':>9} {'us/reading':>11}")
+    for count in RULE_COUNTS:
+        rows = synthetic_rules(count)
+        index = RuleIndex()
+        started = time.perf_counter()
+        index.load(rows)
+        load_ms = (time.perf_counter() - started) * 1e3
+
+        field_ids = [rows[i].sensor_field_id for i in rng.choice(len(rows), FIELDS_PER_BATCH, replace=False)]
+        evaluate(index, field_ids, times, values)  # warm up
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            evaluate(index, field_ids, times, values)
+        per_reading = (time.perf_counter() - started) / (REPEAT * readings) * 1e6
+        print(f"{count:>8} {load_ms:>9.1f} {per_reading:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+
+# TestClient lifespans start the Kafka producer; with no broker every message
+# would land in the disk spool, so tests run without one
+os.environ.setdefault("KAFKA_SPOOL_DIR", "")
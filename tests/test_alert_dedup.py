@@ -0,0 +1,212 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.common.dependencies import get_db
+from app.common.types import PageParams
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert import schemas, selectors, services
+from app.monitoring_sensor_alert.apis import router
+from app.monitoring_source.models import Source
+from app.project.models import Project
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert
+from app.outbox.models import OutboxEvent
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorAlert.__table__,
+        OutboxEvent.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+def _trigger(sensor_id, minutes, message="high"):
+    return {
+        "sensor_id": sensor_id,
+        "alert_type": "threshold",
+        "message": message,
+        "triggered_at": datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes),
+    }
+
+
+def test_repeat_triggers_fold_into_one_incident(db):
+    sensor_id = uuid.uuid4()
+
+    services.record_alerts(db, [_trigger(sensor_id, 0), _trigger(sensor_id, 10)])
+    services.record_alerts(db, [_trigger(sensor_id, 20, "higher")])
+    db.commit()
+
+    alert = db.query(MonitoringSensorAlert).one()
+    assert (alert.occurrences, alert.active, alert.message) == (3, 1, "higher")
+    assert alert.last_seen.replace(tzinfo=None) == datetime(2024, 1, 1, 0, 20)
+    assert [e.payload["event"] for e in db.query(OutboxEvent)] == ["alert.created"]
+
+
+def test_quiet_period_longer_than_the_window_starts_a_new_incident(db):
+    sensor_id = uuid.uuid4()
+
+    services.record_alerts(db, [_trigger(sensor_id, 0)])
+    services.record_alerts(db, [_trigger(sensor_id, 120), _trigger(sensor_id, 300)])
+    db.commit()
+
+    alerts = db.query(MonitoringSensorAlert).order_by(MonitoringSensorAlert.first_seen).all()
+    assert [(a.active, a.occurrences) for a in alerts] == [(0, 1), (0, 1), (1, 1)]
+    assert [a.resolved_at is not None for a in alerts] == [True, True, False]
+    assert len({a.fingerprint for a in alerts}) == 1
+
+
+def test_bulk_resolve_is_one_update_and_publishes_each_alert(db):
+    sensor_id, other = uuid.uuid4(), uuid.uuid4()
+    services.record_alerts(db, [
+        _trigger(sensor_id, 0),
+        dict(_trigger(sensor_id, 0), alert_type="rate_of_change"),
+        _trigger(other, 0),
+    ])
+    db.commit()
+
+    updated = services.bulk_update_monitoring_sensor_alerts(
+        db, schemas.MonitoringSensorAlertBulkAction(action="resolve", sensor_id=sensor_id),
+    )
+    again = services.bulk_update_monitoring_sensor_alerts(
+        db, schemas.MonitoringSensorAlertBulkAction(action="resolve", sensor_id=sensor_id),
+    )
+
+    assert (updated, again) == (2, 0)
+    assert sorted(a.active for a in db.query(MonitoringSensorAlert)) == [0, 0, 1]
+    assert [e.payload["event"] for e in db.query(OutboxEvent).order_by(OutboxEvent.id)][-2:] == ["alert.resolved"] * 2
+
+
+def _sensor_under(db, project_name):
+    project = Project(id=uuid.uuid4(), project_name=project_name, start_date=datetime.utcnow().date(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="s1", sensor_type="analog")
+    db.add_all([project, location, source, sensor])
+    db.commit()
+    return project, location, sensor
+
+
+def test_alert_list_filters_by_project_and_pages_by_triggered_at(db):
+    project, _, sensor = _sensor_under(db, "P1")
+    _, _, other = _sensor_under(db, "P2")
+    services.record_alerts(db, [dict(_trigger(sensor.id, m), alert_type=f"t{m}") for m in range(5)] + [_trigger(other.id, 0)])
+    db.commit()
+
+    first = selectors.get_monitoring_sensor_alerts(db, PageParams(limit=2), project_id=project.id)
+    second = selectors.get_monitoring_sensor_alerts(
+        db, PageParams(limit=10, cursor=first.next_cursor), project_id=project.id,
+    )
+
+    assert [a.alert_type for a in first.items + second.items] == ["t4", "t3", "t2", "t1", "t0"]
+    assert second.next_cursor is None
+
+
+def test_summary_counts_open_alerts_per_project_location_and_type(db):
+    project, location, sensor = _sensor_under(db, "P1")
+    services.record_alerts(db, [_trigger(sensor.id, 0), dict(_trigger(sensor.id, 0), alert_type="rate_of_change")])
+    services.record_alerts(db, [dict(_trigger(sensor.id, 0), alert_type="manual")])
+    services.bulk_update_monitoring_sensor_alerts(
+        db, schemas.MonitoringSensorAlertBulkAction(action="resolve", alert_type="manual"),
+    )
+
+    summary = selectors.get_active_alert_summary(db)
+
+    assert summary == [{
+        "project_id": project.id,
+        "active": 2,
+        "by_type": {"rate_of_change": 1, "threshold": 1},
+        "locations": [{"location_id": location.id, "active": 2, "by_type": {"rate_of_change": 1, "threshold": 1}}],
+    }]
+
+
+def test_backfilled_triggers_do_not_move_last_seen_back(db):
+    sensor_id = uuid.uuid4()
+
+    services.record_alerts(db, [_trigger(sensor_id, 30)])
+    services.record_alerts(db, [_trigger(sensor_id, 10)])
+    db.commit()
+
+    alert = db.query(MonitoringSensorAlert).one()
+    assert alert.occurrences == 2
+    assert alert.last_seen.replace(tzinfo=None) == datetime(2024, 1, 1, 0, 30)
+
+
+def test_reopening_an_alert_next_to_an_open_duplicate_conflicts(db):
+    sensor_id = uuid.uuid4()
+    services.record_alerts(db, [_trigger(sensor_id, 0)])
+    services.record_alerts(db, [_trigger(sensor_id, 300)])  # resolves the first, opens a second
+    db.commit()
+    resolved, open_ = db.query(MonitoringSensorAlert).order_by(MonitoringSensorAlert.first_seen).all()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    def patch(alert, **changes):
+        body = {"sensor_id": str(sensor_id), "alert_type": "threshold", "message": "high", "active": alert.active}
+        return client.patch(f"/monitoring-sensor-alerts/{alert.id}", json=dict(body, **changes))
+
+    response = patch(resolved, active=1)
+    assert response.status_code == 409
+    assert str(open_.id) in response.json()["detail"]
+    assert patch(resolved, message="note").status_code == 200
+    assert patch(open_, message="note").status_code == 200  # the open alert itself is no duplicate
+
+    assert patch(open_, active=0).status_code == 200
+    assert patch(resolved, active=1).status_code == 200
@@ -0,0 +1,107 @@
+import uuid
+
+import numpy as np
+
+from app.monitoring_sensor_alert.engine import alarm_transitions, derived_matrix
+from app.monitoring_sensor_alert.rule_index import RuleIndex, RuleRow, compile_field
+
+
+def _rule(field_id, rule_type, lower=None, upper=None, hysteresis=0.0):
+    return RuleRow(uuid.uuid4(), field_id, uuid.uuid4(), rule_type, lower, upper, hysteresis, 0, None)
+
+
+def _evaluate(rules, times, values, baseline=np.nan, in_alarm=False, last_time=np.nan, last_value=np.nan):
+    """Derived matrix and alarm transitions of ``rules`` over one batch, every rule starting from the same state."""
+    k = len(rules.rule_ids)
+    derived = derived_matrix(rules, times, values, baseline, np.full(k, last_time), np.full(k, last_value))
+    return derived, alarm_transitions(derived, rules.lower, rules.upper, rules.hysteresis, np.full(k, in_alarm))
+
+
+def test_hysteresis_needs_values_back_inside_the_margin_to_clear():
+    rules = compile_field([_rule(uuid.uuid4(), "threshold", upper=10.0, hysteresis=1.0)])
+    values = np.array([1.0, 12.0, 9.5, 11.0, 8.0, 11.0])
+
+    _, ((_, starts), (_, ends), final) = _evaluate(rules, np.arange(6) * 60.0, values)
+
+    # 9.5 is inside the bounds but not by the 1.0 margin, so 11.0 is the same alarm
+    assert starts.tolist() == [1, 5]
+    assert ends.tolist() == [4]
+    assert final.tolist() == [True]
+
+
+def test_alarm_state_carries_over_between_batches():
+    rules = compile_field([_rule(uuid.uuid4(), "threshold", upper=10.0)])
+
+    _, ((_, starts), _, final) = _evaluate(rules, np.array([0.0, 60.0]), np.array([15.0, 16.0]), in_alarm=True)
+
+    assert starts.tolist() == []
+    assert final.tolist() == [True]
+
+
+def test_rate_of_change_uses_the_previous_batch():
+    rules = compile_field([_rule(uuid.uuid4(), "rate_of_change")])
+    times = np.array([3600.0, 7200.0])
+    values = np.array([4.0, 4.5])
+
+    derived, _ = _evaluate(rules, times, values, last_time=0.0, last_value=1.0)
+
+    assert derived[0].tolist() == [3.0, 0.5]
+
+
+def test_baseline_deviation_without_baseline_leaves_the_state_alone():
+    rules = compile_field([_rule(uuid.uuid4(), "baseline_deviation", upper=0.0)])
+
+    derived, (_, _, final) = _evaluate(rules, np.array([0.0]), np.array([1.0]))
+    assert np.isnan(derived).all() and final.tolist() == [False]
+    derived, _ = _evaluate(rules, np.array([0.0]), np.array([1.0]), baseline=3.0)
+    assert derived[0].tolist() == [-2.0]
+
+
+def test_index_compiles_rules_per_field():
+    field_a, field_b = uuid.uuid4(), uuid.uuid4()
+    index = RuleIndex()
+    index.load([_rule(field_a, "threshold", upper=10.0), _rule(field_a, "rate_of_change", lower=-1.0), _rule(field_b, "threshold")])
+
+    rules = index.lookup(field_a)
+    assert len(index) == 3
+    assert rules.kinds.tolist() == [0, 2]
+    assert rules.lower.tolist() == [-np.inf, -1.0]
+    assert rules.upper.tolist() == [10.0, np.inf]
+    assert index.lookup(uuid.uuid4()) is None
+
+
+def test_matrix_matches_rule_by_rule_evaluation():
+    field = uuid.uuid4()
+    rows = [_rule(field, "threshold", upper=10.0, hysteresis=1.0), _rule(field, "baseline_deviation", lower=-2.0, upper=2.0)]
+    times = np.arange(6) * 60.0
+    values = np.array([1.0, 12.0, 9.5, 11.0, 8.0, 11.0])
+
+    _, ((starts_rule, starts_reading), (ends_rule, ends_reading), final) = _evaluate(compile_field(rows), times, values, 9.0)
+
+    for r, row in enumerate(rows):
+        _, ((_, expected_starts), (_, expected_ends), expected_final) = _evaluate(compile_field([row]), times, values, 9.0)
+        assert starts_reading[starts_rule == r].tolist() == expected_starts.tolist()
+        assert ends_reading[ends_rule == r].tolist() == expected_ends.tolist()
+        assert final[r] == expected_final[0]
+
+
+def test_matrix_skips_readings_each_rule_has_seen():
+    field = uuid.uuid4()
+    index = RuleIndex()
+    index.load([_rule(field, "threshold", upper=0.0), _rule(field, "rate_of_change", upper=100.0)])
+    times = np.array([0.0, 60.0, 120.0])
+
+    derived = derived_matrix(index.lookup(field), times, np.array([1.0, 2.0, 3.0]), np.nan, np.array([60.0, np.nan]), np.array([2.0, np.nan]))
+
+    assert np.isnan(derived[0, :2]).all() and derived[0, 2] == 3.0
+    assert np.isnan(derived[1, 0]) and derived[1, 1:].tolist() == [60.0, 60.0]
+
+
+def test_field_baseline_takes_precedence_over_the_sensor_baseline():
+    sensor_id, field_id = uuid.uuid4(), uuid.uuid4()
+    index = RuleIndex()
+    index.load([], {sensor_id: {None: 1.0, field_id: 2.0}})
+
+    assert index.baseline(sensor_id, field_id) == 2.0
+    assert index.baseline(sensor_id, uuid.uuid4()) == 1.0
+    assert np.isnan(index.baseline(uuid.uuid4()))
@@ -0,0 +1,200 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.elements import WithinGroup
+
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_baseline import schemas, services
+from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.monitoring_sensor_baseline.selectors import baseline_field_scope, baseline_statistics_query
+from app.monitoring_sensor_data.models import MonitoringSensorData
+from app.monitoring_sensor_data.selectors import query_monitoring_sensor_data
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class _PercentileCont:
+    """sqlite stand-in for Postgres' ``percentile_cont`` (linear interpolation)."""
+
+    def __init__(self):
+        self.values, self.fraction = [], None
+
+    def step(self, value, fraction):
+        self.values.append(value)
+        self.fraction = fraction
+
+    def finalize(self):
+        values = sorted(self.values)
+        position = (len(values) - 1) * self.fraction
+        low = int(position)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_functions(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+    dbapi_connection.create_aggregate("percentile_cont", 2, _PercentileCont)
+
+
+@compiles(WithinGroup, "sqlite")
+def _compile_within_group(element, compiler, **kw):  # pragma: no cover
+    fraction, = element.element.clauses
+    return f"percentile_cont({compiler.process(element.order_by, **kw)}, {compiler.process(fraction, **kw)})"
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+        MonitoringSensorData.__table__,
+        MonitoringSensorBaseline.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+def test_statistics_are_one_grouped_statement_over_each_fields_first_window():
+    sql = _sql(baseline_statistics_query(baseline_field_scope(project_id=uuid.uuid4()), timedelta(days=7)))
+
+    assert sql.count("WITHIN GROUP") == 3
+    assert "FILTER (WHERE" in sql
+    assert "MIN(MON_SENSOR_DATA.TIMESTAMP) AS T0" in sql
+    assert "GROUP BY BASELINE_WINDOW.SENSOR_FIELD_ID" in sql
+
+
+def test_explicit_window_skips_the_first_reading_lookup():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    sql = _sql(baseline_statistics_query(baseline_field_scope(sensor_ids=[uuid.uuid4()]), timedelta(days=7), start=start))
+
+    assert " T0" not in sql
+    assert "MON_SENSOR_DATA.TIMESTAMP >=" in sql
+
+
+START = datetime(2024, 1, 1)
+
+
+def _sensor_with_readings(db, readings):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=date.today(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="sen", sensor_type="analog")
+    fields = {name: MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name=name) for name in readings}
+    db.add_all([project, location, source, sensor, *fields.values()])
+    db.add_all([
+        MonitoringSensorData(mon_loc_id=location.id, sensor_id=sensor.id, sensor_field_id=fields[name].id,
+                             timestamp=START + timedelta(hours=i), data=value)
+        for name, values in readings.items() for i, value in enumerate(values)
+    ])
+    db.commit()
+    return location.id, sensor, fields
+
+
+def test_grouped_statistics_and_replaced_baselines(db):
+    location_id, sensor, fields = _sensor_with_readings(db, {
+        "x": [5, 1, 100, 9, 3, 7, 2, 10, 8, 4, 6],  # 100 lies beyond the 1.5 IQR fence
+        "y": [10, 40, 20, 30],
+    })
+    x, y = fields["x"].id, fields["y"].id
+    # after the window
+    db.add(MonitoringSensorData(mon_loc_id=location_id, sensor_id=sensor.id, sensor_field_id=y,
+                                timestamp=START + timedelta(hours=11), data=1000.0))
+    old = MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=x, baseline_value=-1.0)
+    whole_sensor = MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, baseline_value=-2.0)
+    db.add_all([old, whole_sensor])
+    db.commit()
+
+    scope = baseline_field_scope(sensor_ids=[sensor.id])
+    stats = {
+        r.sensor_field_id: r
+        for r in db.execute(baseline_statistics_query(scope, timedelta(hours=1), START, START + timedelta(hours=11)))
+    }
+    assert (stats[x].median, stats[x].mean, stats[x].sample_count) == (6.0, pytest.approx(5.5), 11)
+    assert (stats[y].median, stats[y].mean, stats[y].sample_count) == (25.0, pytest.approx(25.0), 4)
+    assert stats[y].window_end.replace(tzinfo=None) == START + timedelta(hours=3)
+
+    payload = schemas.MonitoringSensorBaselineCompute(
+        sensor_ids=[sensor.id], start=START, end=START + timedelta(hours=11), min_samples=5,
+    )
+    assert services.compute_monitoring_sensor_baselines(db, payload) == 1  # y has too few readings
+
+    db.expire_all()
+    active = db.query(MonitoringSensorBaseline).filter(MonitoringSensorBaseline.active == 1).all()
+    assert {(b.sensor_field_id, b.baseline_value, b.method, b.sample_count) for b in active} == {
+        (x, 6.0, "median", 11),
+        (None, -2.0, "manual", None),  # whole-sensor baselines are not recomputed
+    }
+    assert db.get(MonitoringSensorBaseline, old.id).active == 0
+
+
+def test_rebaselining_keeps_the_older_baseline_for_older_readings(db):
+    _, sensor, fields = _sensor_with_readings(db, {"x": [5, 1, 100, 9, 3, 7, 2, 10, 8, 4, 6]})
+    x = fields["x"].id
+    older = MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=x,
+                                     baseline_value=1.0, recorded_at=START)
+    overlapping = MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=x,
+                                           baseline_value=50.0, recorded_at=START + timedelta(hours=8))
+    db.add_all([older, overlapping])
+    db.commit()
+
+    payload = schemas.MonitoringSensorBaselineCompute(
+        sensor_ids=[sensor.id], start=START + timedelta(hours=5), end=START + timedelta(hours=11), min_samples=5,
+    )
+    assert services.compute_monitoring_sensor_baselines(db, payload) == 1
+
+    db.expire_all()
+    assert (db.get(MonitoringSensorBaseline, older.id).active, db.get(MonitoringSensorBaseline, overlapping.id).active) == (1, 0)
+    rows = query_monitoring_sensor_data(db, sensor_id=sensor.id, relative_to="baseline")
+    # readings before the new window stay relative to the older baseline, the rest to the new median 6.5
+    assert [r.data for r in rows] == [4.0, 0.0, 99.0, 8.0, 2.0, 0.5, -4.5, 3.5, 1.5, -2.5, -0.5]
@@ -0,0 +1,183 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.common.dependencies import get_db
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor import schemas, services
+from app.monitoring_sensor.apis import router
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields import schemas as field_schemas, services as field_services
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+OLD = datetime(2020, 1, 1)
+
+
+def _sources(db, count):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=date.today(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    sources = [
+        Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name=f"S{i}", folder_path="fp",
+               file_keyword="kw", file_type="csv", last_updated=OLD)
+        for i in range(count)
+    ]
+    db.add_all([project, location, *sources])
+    db.commit()
+    return [s.id for s in sources]
+
+
+def _last_updated(db, source_id):
+    db.expire_all()
+    return db.get(Source, source_id).last_updated.replace(tzinfo=None)
+
+
+def test_sensors_upsert_in_a_fixed_number_of_statements(db):
+    s1, s2, untouched = _sources(db, 3)
+    sensors = [
+        schemas.MonitoringSensorCreate(mon_source_id=s1 if i % 2 else s2, sensor_name=f"sen{i}", sensor_type="analog")
+        for i in range(300)
+    ]
+    statements.clear()
+    result = services.bulk_upsert_monitoring_sensors(db, sensors + sensors[:5])  # repeats collapse
+    # lookup, upsert, touch the sources, commit
+    assert len([s for s in statements if not s.startswith(("BEGIN", "COMMIT"))]) == 3
+    assert (result["created"], result["updated"], result["unchanged"]) == (300, 0, 0)
+    assert db.query(MonitoringSensor).count() == 300
+    ids = {item["sensor_name"]: item["id"] for item in result["items"]}
+    assert ids == {name: id for id, name in db.query(MonitoringSensor.id, MonitoringSensor.sensor_name)}
+    assert _last_updated(db, s1) > OLD and _last_updated(db, s2) > OLD
+    assert _last_updated(db, untouched) == OLD
+
+    db.query(Source).update({"last_updated": OLD})
+    db.commit()
+    again = [sensors[1].model_copy(update={"sensor_type": "digital"}), sensors[2],
+             schemas.MonitoringSensorCreate(mon_source_id=s1, sensor_name="new", sensor_type="analog")]
+    result = services.bulk_upsert_monitoring_sensors(db, again)
+    assert [item["status"] for item in result["items"]] == ["updated", "unchanged", "created"]
+    assert result["items"][0]["id"] == ids["sen1"]
+    assert db.get(MonitoringSensor, ids["sen1"]).sensor_type == "digital"
+    assert _last_updated(db, s1) > OLD
+    assert _last_updated(db, s2) == OLD  # sen2 did not change
+
+
+def test_fields_upsert_and_touch_the_sources_of_their_sensors(db):
+    source, other = _sources(db, 2)
+    sensors = services.bulk_upsert_monitoring_sensors(db, [
+        schemas.MonitoringSensorCreate(mon_source_id=source, sensor_name=f"sen{i}", sensor_type="analog") for i in range(3)
+    ])["items"]
+    db.query(Source).update({"last_updated": OLD})
+    db.commit()
+
+    fields = [
+        field_schemas.MonitoringSensorFieldBulkItem(sensor_id=s["id"], field_name=name, uom="mm")
+        for s in sensors for name in ("x", "y")
+    ]
+    result = field_services.bulk_upsert_sensor_fields(db, fields)
+    assert (result["created"], result["updated"], result["unchanged"]) == (6, 0, 0)
+    assert _last_updated(db, source) > OLD and _last_updated(db, other) == OLD
+
+    fields[0] = fields[0].model_copy(update={"uom": "m"})
+    result = field_services.bulk_upsert_sensor_fields(db, fields)
+    assert (result["created"], result["updated"], result["unchanged"]) == (0, 1, 5)
+    assert db.query(MonitoringSensorField).filter(MonitoringSensorField.uom == "m").count() == 1
+
+
+def test_bulk_endpoints_check_parents(db):
+    source, = _sources(db, 1)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    unknown = str(uuid.uuid4())
+    payload = {"sensors": [
+        {"mon_source_id": str(source), "sensor_name": "a", "sensor_type": "analog"},
+        {"mon_source_id": unknown, "sensor_name": "b", "sensor_type": "analog"},
+    ]}
+    response = client.post("/monitoring-sensors/bulk", json=payload)
+    assert response.status_code == 404
+    assert unknown in response.json()["detail"]
+    assert db.query(MonitoringSensor).count() == 0
+    assert client.post("/monitoring-sensors/bulk", json={"sensors": []}).status_code == 422
+
+    payload["sensors"].pop()
+    response = client.post("/monitoring-sensors/bulk", json=payload)
+    assert response.status_code == 200
+    sensor_id = response.json()["items"][0]["id"]
+
+    response = client.post("/monitoring-sensors/fields/bulk", json={"fields": [
+        {"sensor_id": sensor_id, "field_name": "x"},
+        {"sensor_id": unknown, "field_name": "x"},
+    ]})
+    assert response.status_code == 404
+    response = client.post("/monitoring-sensors/fields/bulk", json={"fields": [{"sensor_id": sensor_id, "field_name": "x"}]})
+    assert response.json()["created"] == 1
@@ -0,0 +1,146 @@
+import pytest
+
+from app import kafka_producer
+from app.kafka_spool import DiskSpool
+
+
+class FakeProducer:
+    """Local queue of one message; ``poll`` delivers everything queued."""
+
+    def __init__(self, config):
+        self.queue = []
+        self.delivered = []
+
+    def produce(self, topic, key, value, on_delivery):
+        if self.queue:
+            raise BufferError("Local: Queue full")
+        self.queue.append((topic, key, value, on_delivery))
+
+    def poll(self, timeout):
+        queued, self.queue = self.queue, []
+        for topic, key, value, on_delivery in queued:
+            self.delivered.append(key)
+            on_delivery(None, None)
+        return len(queued)
+
+    def flush(self, timeout):
+        self.poll(0)
+        return 0
+
+    def __len__(self):
+        return len(self.queue)
+
+
+@pytest.fixture()
+def service():
+    svc = kafka_producer.KafkaProducerService({}, enqueue_timeout=2.0, poll_interval=0.01, client=FakeProducer({}))
+    yield svc
+    svc.close()
+
+
+def test_produce_waits_for_capacity(service):
+    service.start()
+    for i in range(5):
+        service.produce("t", str(i), {"i": i})
+    service.close()
+
+    assert service._producer.delivered == ["0", "1", "2", "3", "4"]
+    metrics = service.metrics()
+    assert metrics["delivered"] == 5
+    assert metrics["queue_depth"] == 0
+
+
+def test_produce_times_out_when_nothing_is_delivered(service):
+    service.produce("t", "a", {})
+
+    with pytest.raises(BufferError):
+        service.produce("t", "b", {}, timeout=0.05)
+    assert service.queue_depth() == 1
+
+
+def test_plan_topic_changes_creates_missing_and_only_grows_partitions():
+    spec = kafka_producer.TopicSpec
+    wanted = {"new": spec(6, 3), "small": spec(12, 1), "big": spec(2, 1), "same": spec(6, 1)}
+
+    to_create, to_grow = kafka_producer.plan_topic_changes({"small": 1, "big": 8, "same": 6}, wanted)
+
+    assert to_create == {"new": spec(6, 3)}
+    assert to_grow == {"small": 12}
+
+
+class FakeError:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def __str__(self):
+        return self._name
+
+
+class FakeMessage:
+    def __init__(self, topic, key, value):
+        self._topic, self._key, self._value = topic, key, value
+
+    def topic(self):
+        return self._topic
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+
+def test_only_transient_delivery_failures_are_spooled(service):
+    spooled, dead = [], []
+    service.on_failure = lambda topic, key, value: spooled.append(key)
+    service.on_permanent_failure = lambda topic, key, value, reason: dead.append((key, reason))
+
+    service._on_delivery(0.0)(FakeError("_MSG_TIMED_OUT"), FakeMessage("t", b"a", b"{}"))
+    service._on_delivery(0.0)(FakeError("MSG_SIZE_TOO_LARGE"), FakeMessage("t", b"b", b"{}"))
+
+    assert spooled == ["a"]
+    assert dead == [("b", "MSG_SIZE_TOO_LARGE")]
+    assert service.metrics()["failed"] == 2
+
+
+def test_each_message_reports_its_own_delivery(service):
+    reports = []
+    service.on_failure = lambda topic, key, value: None
+
+    service._on_delivery(0.0, reports.append)(None, FakeMessage("t", b"a", b"{}"))
+    service._on_delivery(0.0, reports.append)(FakeError("_MSG_TIMED_OUT"), FakeMessage("t", b"b", b"{}"))  # spooled
+    service._on_delivery(0.0, reports.append)(FakeError("MSG_SIZE_TOO_LARGE"), FakeMessage("t", b"c", b"{}"))
+
+    assert reports == [None, None, "MSG_SIZE_TOO_LARGE"]
+
+
+@pytest.fixture()
+def full_spool(tmp_path, monkeypatch, service):
+    spool = DiskSpool(str(tmp_path), max_bytes=60)
+    spool.append("t", "backlog", b"{}")
+    monkeypatch.setattr(kafka_producer, "spool", spool)
+    monkeypatch.setattr(kafka_producer, "producer", service)
+    yield spool
+    spool.close()
+
+
+def test_full_spool_falls_back_to_kafka_when_it_is_healthy(full_spool, service, monkeypatch):
+    monkeypatch.setattr(kafka_producer, "_kafka_available", lambda: True)
+    reports = []
+
+    kafka_producer.send_kafka_message("t", "a", {"x" * 100: 1}, on_done=reports.append)
+    service.flush(1.0)
+
+    assert service._producer.delivered == ["a"]
+    assert reports == [None]
+
+
+def test_full_spool_while_kafka_is_down_is_reported_as_unavailable(full_spool, monkeypatch):
+    monkeypatch.setattr(kafka_producer, "_kafka_available", lambda: False)
+
+    with pytest.raises(kafka_producer.KafkaUnavailableError):
+        kafka_producer.send_kafka_message("t", "a", {"x" * 100: 1})
+    assert full_spool.metrics()["rejected"] == 1
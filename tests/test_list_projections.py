@@ -0,0 +1,191 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.common.projections import Projection
+from app.common.dependencies import get_db
+from app.config.database import DBBase
+from app.location import schemas as location_schemas, services as location_services
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor import schemas as sensor_schemas, services as sensor_services
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source import services as source_services
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# one shared connection: the endpoints run in the test client's worker threads
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def client(db):
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def _tree(db, locations=3, sources=2, sensors=2, fields=2):
+    project = Project(id=uuid.uuid4(), project_name="P1", start_date=date.today(), status="active")
+    db.add(project)
+    source_ids = []
+    for l in range(locations):
+        loc = Location(id=uuid.uuid4(), project_id=project.id, loc_name=f"L{l}", lat=0.0, lon=0.0, frequency="daily")
+        group = MonitoringGroup(id=uuid.uuid4(), mon_loc_id=loc.id, group_name=f"G{l}", group_type="chain")
+        db.add_all([loc, group])
+        for s in range(sources):
+            src = Source(
+                id=uuid.uuid4(), mon_loc_id=loc.id, source_name=f"S{l}-{s}",
+                folder_path="fp", file_keyword="kw", file_type="csv",
+            )
+            db.add(src)
+            source_ids.append(src.id)
+            for n in range(sensors):
+                sensor = MonitoringSensor(
+                    id=uuid.uuid4(), mon_source_id=src.id, sensor_group_id=group.id,
+                    sensor_name=f"sen{n}", sensor_type="analog",
+                )
+                db.add(sensor)
+                db.add_all(
+                    MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name=f"f{f}")
+                    for f in range(fields)
+                )
+    db.commit()
+    db.expunge_all()
+    return project, source_ids
+
+
+def _get(client, db, url):
+    db.expunge_all()
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json(), len(statements)
+
+
+def test_sensor_rows_match_the_enriched_objects(client, db):
+    project, source_ids = _tree(db, locations=2, sources=2, sensors=3)
+    rows, queries = _get(client, db, "/monitoring-sensors/")
+    assert queries == 1
+    assert len(rows) == 2 * 2 * 3
+    assert [r["sensor_name"] for r in rows] == sorted(r["sensor_name"] for r in rows)
+
+    sensor = db.query(MonitoringSensor).filter(MonitoringSensor.id == uuid.UUID(rows[0]["id"])).one()
+    expected = sensor_schemas.MonitoringSensor.model_validate(sensor_services.enrich_sensor(sensor))
+    expected.source_name = sensor.mon_source.source_name
+    assert rows[0] == expected.model_dump(mode="json")
+
+    scoped, queries = _get(client, db, f"/projects/{project.id}/sensors")
+    assert queries == 1 and len(scoped) == 12
+    scoped, _ = _get(client, db, f"/monitoring-sources/{source_ids[0]}/sensors")
+    assert {r["mon_source_id"] for r in scoped} == {str(source_ids[0])}
+    assert all(r["details"]["group_name"] == "G0" for r in scoped)
+
+
+def test_source_and_location_rows_match_the_enriched_objects(client, db):
+    project, source_ids = _tree(db, locations=2, sources=2, sensors=1)
+
+    rows, queries = _get(client, db, f"/projects/{project.id}/sources")
+    assert queries == 1 and len(rows) == 4
+    source = db.query(Source).filter(Source.id == uuid.UUID(rows[0]["id"])).one()
+    expected = source_services.enrich_source(source)
+    assert rows[0] == expected.model_dump(mode="json")
+
+    rows, queries = _get(client, db, f"/projects/{project.id}/locations")
+    assert queries == 1 and len(rows) == 2
+    location = db.query(Location).filter(Location.id == uuid.UUID(rows[0]["id"])).one()
+    expected = location_schemas.Location.model_validate(location_services.enrich_location(location))
+    assert rows[0] == expected.model_dump(mode="json")
+
+    rows, _ = _get(client, db, "/locations/")
+    assert {r["details"]["project_name"] for r in rows} == {"P1"}
+
+
+def test_projection_must_cover_the_schema():
+    with pytest.raises(TypeError, match="missing"):
+        Projection(sensor_schemas.MonitoringSensorName, {"id": MonitoringSensor.id})
+    with pytest.raises(TypeError, match="unknown"):
+        Projection(sensor_schemas.MonitoringSensorName, {
+            "id": MonitoringSensor.id,
+            "sensor_name": MonitoringSensor.sensor_name,
+            "sensor_type": MonitoringSensor.sensor_type,
+        })
+
+
+def test_first_row_is_validated():
+    projection = Projection(sensor_schemas.MonitoringSensorName, {
+        "id": MonitoringSensor.id,
+        "sensor_name": MonitoringSensor.sensor_name,
+    })
+    with pytest.raises(ValueError):
+        projection.response([{"id": "not-a-uuid", "sensor_name": "a"}])
+    body = projection.response([{"id": uuid.UUID(int=1), "sensor_name": "a"}]).body
+    assert body == b'[{"id":"00000000-0000-0000-0000-000000000001","sensor_name":"a"}]'
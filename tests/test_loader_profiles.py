@@ -0,0 +1,182 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.common.dependencies import get_db
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group import services as group_services
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# one shared connection: the endpoints run in the test client's worker threads
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def client(db):
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+def _tree(db, locations=3, sources=2, sensors=2, fields=2):
+    project = Project(id=uuid.uuid4(), project_name="P1", start_date=date.today(), status="active")
+    db.add(project)
+    source_ids = []
+    for l in range(locations):
+        loc = Location(id=uuid.uuid4(), project_id=project.id, loc_name=f"L{l}", lat=0.0, lon=0.0, frequency="daily")
+        group = MonitoringGroup(id=uuid.uuid4(), mon_loc_id=loc.id, group_name=f"G{l}", group_type="chain")
+        db.add_all([loc, group])
+        for s in range(sources):
+            src = Source(
+                id=uuid.uuid4(), mon_loc_id=loc.id, source_name=f"S{l}-{s}",
+                folder_path="fp", file_keyword="kw", file_type="csv",
+            )
+            db.add(src)
+            source_ids.append(src.id)
+            for n in range(sensors):
+                sensor = MonitoringSensor(
+                    id=uuid.uuid4(), mon_source_id=src.id, sensor_group_id=group.id,
+                    sensor_name=f"sen{n}", sensor_type="analog",
+                )
+                db.add(sensor)
+                db.add_all(
+                    MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name=f"f{f}")
+                    for f in range(fields)
+                )
+    db.commit()
+    db.expunge_all()
+    return project, source_ids
+
+
+def _get(client, db, url):
+    db.expunge_all()
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json(), len(statements)
+
+
+def test_project_list_is_one_query_regardless_of_size(client, db):
+    project, _ = _tree(db, locations=1, sources=1, sensors=1)
+    _, small = _get(client, db, "/projects/")
+
+    _tree(db, locations=6, sources=3, sensors=4)
+    body, large = _get(client, db, "/projects/")
+
+    assert small == large == 1
+    assert sorted(p["locations_count"] for p in body) == [1, 6]
+    one, queries = _get(client, db, f"/projects/{project.id}")
+    assert one["locations_count"] == 1 and queries == 1
+
+
+def test_source_endpoints_load_only_what_they_serialize(client, db):
+    _, source_ids = _tree(db, sensors=2)
+    source_id = source_ids[0]
+
+    _, flat = _get(client, db, "/monitoring-sources/")
+    assert flat == 1
+
+    detail, queries = _get(client, db, f"/monitoring-sources/{source_id}/with-children")
+    assert queries == 3  # source + sensors (with their group) + fields
+    assert [s["sensor_name"] for s in detail["sensors"]] == ["sen0", "sen1"]
+    assert [f["field_name"] for f in detail["sensors"][0]["fields"]] == ["f0", "f1"]
+    assert detail["sensors"][0]["details"]["group_name"] == "G0"
+
+    minimal, queries = _get(client, db, f"/monitoring-sources/{source_id}/with-minimal-children")
+    assert queries == 3
+    assert [f["field_name"] for f in minimal["sensors"][1]["fields"]] == ["f0", "f1"]
+
+    _tree(db, sensors=8, fields=5)
+    listed, queries = _get(client, db, "/monitoring-sources/with-children?limit=1000")
+    assert queries == 3
+    assert sum(len(s["sensors"]) for s in listed) == 6 * 2 + 6 * 8
+
+
+def test_unloaded_collections_raise_instead_of_querying(db):
+    project, _ = _tree(db, locations=1)
+    loaded = db.get(Project, project.id)
+    with pytest.raises(InvalidRequestError):
+        loaded.mon_locs
+
+
+def test_deleting_a_group_keeps_its_sensors(db):
+    _tree(db, locations=1, sources=1, sensors=2)
+    group = db.query(MonitoringGroup).one()
+
+    group_services.delete_monitoring_group(db, group.id)
+
+    assert db.query(MonitoringGroup).count() == 0
+    assert [s.sensor_group_id for s in db.query(MonitoringSensor).all()] == [None, None]
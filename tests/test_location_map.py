@@ -0,0 +1,173 @@
+import uuid
+from datetime import date
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.common.dependencies import get_db
+from app.config.database import DBBase
+from app.config.settings import get_settings
+from app.location import geohash, schemas, services
+from app.location.apis import router
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert, MonitoringSensorAlertRule
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.project.models import Project
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+        MonitoringSensorAlertRule.__table__,
+        MonitoringSensorAlert.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def client(db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+# Copenhagen, Aarhus (twice) and Oslo
+POINTS = [("cph", 55.676, 12.568), ("aar1", 56.157, 10.210), ("aar2", 56.150, 10.200), ("oslo", 59.913, 10.752)]
+DENMARK = "8,54.5,13,57.8"
+
+
+def _locations(db):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=date.today(), status="active")
+    db.add(project)
+    locations = {
+        name: Location(id=uuid.uuid4(), project_id=project.id, loc_name=name, lat=lat, lon=lon, frequency="daily")
+        for name, lat, lon in POINTS
+    }
+    db.add_all(locations.values())
+    db.commit()
+    return locations
+
+
+def _open_alert(db, location):
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="sen", sensor_type="analog")
+    db.add_all([source, sensor])
+    db.flush()
+    db.add(MonitoringSensorAlert(id=uuid.uuid4(), sensor_id=sensor.id, alert_type="threshold"))
+    db.commit()
+
+
+def test_geohash_cells_cover_the_box():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    box = geohash.BBox.parse(DENMARK)
+    cells = geohash.covering_cells(box)
+    assert 1 < len(cells) <= geohash.MAX_COVER_CELLS
+    for lat in (box.south, 56.0, box.north):
+        for lon in (box.west, 10.5, box.east):
+            assert geohash.encode(lat, lon).startswith(tuple(cells))
+    assert geohash.covering_cells(geohash.BBox.parse("-200,-100,200,100"))[0] == "0"
+    for bad in ("1,2,3", "a,b,c,d", "5,55,10,50", "nan,1,2,3"):
+        with pytest.raises(ValueError):
+            geohash.BBox.parse(bad)
+
+
+def test_low_zoom_returns_clusters_with_open_alerts(db, client):
+    locations = _locations(db)
+    _open_alert(db, locations["aar1"])
+
+    body = client.get("/locations/map", params={"bbox": DENMARK, "zoom": 6}).json()
+    assert body["markers"] == []
+    clusters = {c["count"]: c for c in body["clusters"]}
+    assert sorted(clusters) == [1, 2]  # Oslo is outside the box
+    aarhus = clusters[2]
+    assert aarhus["active_alerts"] == 1 and clusters[1]["active_alerts"] == 0
+    assert aarhus["lat"] == pytest.approx(56.1535) and len(aarhus["geohash"]) == geohash.cluster_precision(6)
+
+
+def test_high_zoom_returns_markers_unless_too_many(db, client, monkeypatch):
+    locations = _locations(db)
+    params = {"bbox": "10.1,56.1,10.3,56.2", "zoom": 14}
+    body = client.get("/locations/map", params=params).json()
+    assert body["clusters"] == []
+    assert {m["loc_name"] for m in body["markers"]} == {"aar1", "aar2"}
+    assert set(body["markers"][0]) == {"id", "loc_name", "lat", "lon"}
+
+    monkeypatch.setattr(get_settings(), "LOCATION_MAP_MAX_MARKERS", 1)
+    body = client.get("/locations/map", params=params).json()
+    assert body["markers"] == [] and sum(c["count"] for c in body["clusters"]) == 2
+
+    assert client.get("/locations/map", params={"bbox": "5,60,10,55", "zoom": 3}).status_code == 400
+
+    services.update_location(db, locations["oslo"].id, schemas.LocationUpdate(lat=56.152, lon=10.205))
+    assert locations["oslo"].geohash == geohash.encode(56.152, 10.205)
+
+
+def test_boxes_across_the_antimeridian_are_split(db, client):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=date.today(), status="active")
+    db.add(project)
+    for name, lon in (("fiji", 178.4), ("samoa", -172.1), ("perth", 115.9)):
+        db.add(Location(id=uuid.uuid4(), project_id=project.id, loc_name=name, lat=-15.0, lon=lon, frequency="daily"))
+    db.commit()
+
+    box = geohash.BBox.parse("170,-20,-170,-10")
+    assert box.parts() == [(170, -20, 180, -10), (-180, -20, -170, -10)]
+    cells = geohash.covering_cells(box)
+    assert len(cells) <= geohash.MAX_COVER_CELLS
+    assert geohash.encode(-15.0, 178.4).startswith(tuple(cells)) and geohash.encode(-15.0, -172.1).startswith(tuple(cells))
+
+    body = client.get("/locations/map", params={"bbox": "170,-20,-170,-10", "zoom": 14}).json()
+    assert {m["loc_name"] for m in body["markers"]} == {"fiji", "samoa"}
+    body = client.get("/locations/map", params={"bbox": "170,-20,-170,-10", "zoom": 2}).json()
+    assert sum(c["count"] for c in body["clusters"]) == 2
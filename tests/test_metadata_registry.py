@@ -0,0 +1,230 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import DBBase
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.location.models import Location
+from app.project.models import Project
+from app.monitoring_sensor_data.models import MonitoringSensorData
+from app.monitoring_sensor_data import selectors as data_selectors
+from app.monitoring_sensor_data import services as data_services
+from app import metadata_registry as registry_module
+from app.metadata_registry import MetadataRegistry
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+        MonitoringSensorData.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def registry(db, monkeypatch):
+    # the version lives in a Postgres sequence; SQLite has none
+    monkeypatch.setattr(registry_module, "_current_version", lambda db: 7)
+    registry = MetadataRegistry()
+    monkeypatch.setattr(data_selectors, "metadata_registry", registry)
+    monkeypatch.setattr(data_services, "metadata_registry", registry)
+    return registry
+
+
+def _hierarchy(db):
+    """Two projects, each with two locations of two sources of two sensors with two fields."""
+    ids = {"fields": []}
+    day = datetime(2024, 1, 1)
+    for p in range(2):
+        project = Project(id=uuid.uuid4(), project_number=f"P{p}", project_name=f"P{p}", start_date=day.date(), status="active")
+        db.add(project)
+        for l in range(2):
+            location = Location(id=uuid.uuid4(), project_id=project.id, loc_number=f"L{l}", loc_name=f"L{l}",
+                                lat=0.0, lon=0.0, frequency="daily")
+            group = MonitoringGroup(id=uuid.uuid4(), mon_loc_id=location.id, group_name="g", group_type="chain")
+            db.add_all([location, group])
+            for s in range(2):
+                source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name=f"S{s}",
+                                folder_path="fp", file_keyword="kw", file_type="csv")
+                db.add(source)
+                for n in range(2):
+                    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name=f"sen{n}",
+                                              sensor_type=f"type{n}", sensor_group_id=group.id if n else None)
+                    db.add(sensor)
+                    for name in ("temp", "humid"):
+                        field = MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name=name)
+                        db.add(field)
+                        db.add(MonitoringSensorData(sensor_id=sensor.id, sensor_field_id=field.id,
+                                                    mon_loc_id=location.id, timestamp=day, data=1.0))
+                        ids["fields"].append(field.id)
+                ids.setdefault("sources", []).append(source.id)
+                ids.setdefault("groups", []).append(group.id)
+            ids.setdefault("locations", []).append(location.id)
+        ids.setdefault("projects", []).append(project.id)
+    db.commit()
+    return ids
+
+
+def _sql_field_ids(db, **filters):
+    criteria = data_selectors._metadata_filters(**{**FILTERS_NONE, **filters})
+    qs = (
+        select(MonitoringSensorField.id)
+        .join(MonitoringSensor, MonitoringSensor.id == MonitoringSensorField.sensor_id)
+        .join(Source, Source.id == MonitoringSensor.mon_source_id)
+        .join(Location, Location.id == Source.mon_loc_id)
+        .join(Project, Project.id == Location.project_id)
+        .outerjoin(MonitoringGroup, MonitoringGroup.id == MonitoringSensor.sensor_group_id)
+        .where(*criteria)
+    )
+    return set(db.execute(qs).scalars())
+
+
+FILTERS_NONE = dict(
+    project_id=None, project_number=None, location_id=None, location_number=None, sensor_id=None,
+    sensor_name=None, sensor_type=None, sensor_group_id=None, source_ids=None, source_names=None, field_name=None,
+)
+
+
+def test_resolved_field_ids_match_the_sql_filters(db, registry):
+    ids = _hierarchy(db)
+    registry.load(db)
+    registry.live = True
+    cases = [
+        dict(project_id=ids["projects"][0]),
+        dict(project_number="P1", field_name="temp"),
+        dict(location_id=ids["locations"][1], sensor_type="type1"),
+        dict(location_number="L0", project_number="P0"),
+        dict(source_ids=[ids["sources"][0], ids["sources"][5]], sensor_name="sen0"),
+        dict(source_names=["S1"], project_id=ids["projects"][1]),
+        dict(sensor_group_id=ids["groups"][2], field_name="humid"),
+        dict(sensor_name="sen1", location_number="L1"),
+        dict(project_number="nope"),
+    ]
+    for filters in cases:
+        registry.live = False  # the join path
+        expected = _sql_field_ids(db, **filters)
+        registry.live = True
+        assert registry.resolve_field_ids(**filters) == expected, filters
+
+    assert registry.resolve_field_ids(field_name="temp") is None  # nothing narrows the search
+    registry.live = False
+    assert registry.resolve_field_ids(project_id=ids["projects"][0]) is None
+
+
+def test_sensor_data_query_gives_the_same_rows_through_the_registry(db, registry):
+    ids = _hierarchy(db)
+    registry.load(db)
+    filters = dict(project_number="P0", sensor_name="sen1", include_field_name=True)
+
+    joined = data_selectors.query_monitoring_sensor_data(db, **filters)
+    registry.live = True
+    statements.clear()
+    resolved = data_selectors.query_monitoring_sensor_data(db, **filters)
+
+    assert len(joined) == 8
+    assert [tuple(r) for r in resolved] == [tuple(r) for r in joined]
+    assert "mon_sensor_data.sensor_field_id IN" in statements[0]
+    assert "projects.project_number =" not in statements[0]
+
+
+def test_apply_rereads_only_the_changed_rows(db, registry):
+    ids = _hierarchy(db)
+    registry.load(db)
+    sensor = db.get(MonitoringSensor, db.get(MonitoringSensorField, ids["fields"][0]).sensor_id)
+    sensor.sensor_name = "renamed"
+    doomed = db.get(MonitoringSensorField, ids["fields"][1])
+    db.query(MonitoringSensorData).filter(MonitoringSensorData.sensor_field_id == doomed.id).delete()
+    db.delete(doomed)
+    added = MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name="wind")
+    db.add(added)
+    db.commit()
+
+    statements.clear()
+    registry.apply(db, {"mon_sensors": {sensor.id}, "mon_sensor_fields": {doomed.id, added.id}, "other": {uuid.uuid4()}})
+
+    assert len(statements) == 2  # one read per changed table
+    assert registry.sensors.find("sensor_name", "renamed") == {sensor.id}
+    assert registry.fields.get(doomed.id) is None
+    assert registry.fields.children(sensor.id) == {ids["fields"][0], added.id}
+    assert registry.version == 7
+
+
+def test_ingest_validation_hits_the_registry_while_live(db, registry):
+    ids = _hierarchy(db)
+    field = db.get(MonitoringSensorField, ids["fields"][0])
+    sensor = db.get(MonitoringSensor, field.sensor_id)
+    registry.load(db)
+
+    statements.clear()
+    assert registry.sensor_sources(db, [sensor.id]) == {sensor.id: sensor.mon_source_id}
+    assert len(statements) == 1  # not live: straight to the database
+
+    registry.live = True
+    statements.clear()
+    assert registry.sensor_sources(db, [sensor.id]) == {sensor.id: sensor.mon_source_id}
+    assert registry.field_sensors(db, [field.id]) == {field.id: sensor.id}
+    assert statements == []
+
+    unknown = uuid.uuid4()
+    assert registry.field_sensors(db, [field.id, unknown]) == {field.id: sensor.id}
+    assert len(statements) == 1  # only the miss is looked up
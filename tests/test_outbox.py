@@ -0,0 +1,126 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app import kafka_producer
+from app.config.database import DBBase
+from app.location.models import Location
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_alert import schemas, services
+from app.monitoring_source.models import Source
+from app.project.models import Project
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert
+from app.outbox.models import OutboxEvent
+from app.outbox.services import relay_outbox
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorAlert.__table__,
+        OutboxEvent.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def kafka(monkeypatch):
+    sent = []
+
+    def send(topic, key, value, on_done=None):
+        sent.append((topic, key, value))
+        on_done(None)
+
+    monkeypatch.setattr(kafka_producer, "send_kafka_message", send)
+    return sent
+
+
+def test_alert_changes_are_written_to_the_outbox_and_relayed_in_order(db, kafka):
+    alert_id = uuid.uuid4()
+    sensor_id = uuid.uuid4()
+    db.add(MonitoringSensorAlert(id=alert_id, sensor_id=sensor_id, alert_type="threshold", message="high"))
+    db.commit()
+
+    services.update_monitoring_sensor_alert(db, alert_id, schemas.MonitoringSensorAlertUpdate(
+        sensor_id=sensor_id, alert_type="threshold", message="high", active=0,
+    ))
+    services.delete_monitoring_sensor_alert(db, alert_id)
+    assert db.query(OutboxEvent).count() == 2
+
+    assert relay_outbox(db, batch_size=1) == 2
+    assert [(topic, key, value["event"]) for topic, key, value in kafka] == [
+        ("alerts", str(sensor_id), "alert.updated"),
+        ("alerts", str(sensor_id), "alert.deleted"),
+    ]
+    assert kafka[0][2]["data"]["active"] == 0
+    assert db.query(OutboxEvent).count() == 0
+
+
+def test_events_stay_in_the_outbox_until_kafka_takes_them(db, monkeypatch):
+    for message in ("first", "second", "third"):
+        db.add(MonitoringSensorAlert(id=uuid.uuid4(), sensor_id=uuid.uuid4(), alert_type="threshold", message=message))
+    db.commit()
+    for alert in db.query(MonitoringSensorAlert).all():
+        services.update_monitoring_sensor_alert(db, alert.id, schemas.MonitoringSensorAlertUpdate(
+            sensor_id=alert.sensor_id, alert_type="threshold", message=alert.message, active=0,
+        ))
+
+    def send(topic, key, value, on_done=None):
+        message = value["data"]["message"]
+        if message == "first":
+            on_done(None)  # acknowledged
+        elif message == "second":
+            on_done("Broker: Message size too large")
+        # "third" never hears back, e.g. stuck behind other traffic on the shared producer
+
+    monkeypatch.setattr(kafka_producer, "send_kafka_message", send)
+
+    assert relay_outbox(db, delivery_timeout=0.05) == 1
+    assert sorted(e.payload["data"]["message"] for e in db.query(OutboxEvent)) == ["second", "third"]
@@ -0,0 +1,150 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.common import paginators
+from app.common.dependencies import page_params
+from app.common.types import PageParams
+from app.config.database import DBBase
+from app.config.settings import get_settings
+from app.location import selectors as location_selectors
+from app.location.models import Location
+from app.project import selectors as project_selectors
+from app.project.models import Project
+
+engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [Project.__table__, Location.__table__]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+def _locations(db, names):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=date.today(), status="active")
+    db.add(project)
+    db.add_all([
+        Location(id=uuid.uuid4(), project_id=project.id, loc_name=name, lat=0.0, lon=0.0, frequency="daily")
+        for name in names
+    ])
+    db.commit()
+    return project
+
+
+def _walk(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page = fetch(PageParams(limit=limit, cursor=cursor))
+        pages.append(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_row_once_in_sort_order(db):
+    # duplicate names: the id decides between them
+    _locations(db, ["b", "a", "c", "a", "b", "a", "d"])
+    expected = location_selectors.get_location_rows(db, PageParams(limit=100)).items
+    assert [r["loc_name"] for r in expected] == ["a", "a", "a", "b", "b", "c", "d"]
+
+    pages = _walk(lambda page: location_selectors.get_location_rows(db, page), limit=3)
+    assert [len(p) for p in pages] == [3, 3, 1]
+    assert [r["id"] for p in pages for r in p] == [r["id"] for r in expected]
+
+
+def test_descending_keyset_on_projects(db):
+    for days in (0, 3, 3, 1, 7):
+        db.add(Project(id=uuid.uuid4(), project_name="P", start_date=date.today() - timedelta(days=days), status="active"))
+    db.commit()
+
+    pages = _walk(lambda page: project_selectors.get_projects(db, page), limit=2)
+    dates = [p.start_date for page in pages for p in page]
+    assert len(dates) == 5
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_count_modes(db):
+    project = _locations(db, ["a", "b", "c"])
+    _locations(db, ["x"])
+
+    def total(count):
+        return location_selectors.get_location_rows(db, PageParams(limit=1, count=count), project_id=project.id).total
+
+    assert total("none") is None
+    assert total("exact") == 3
+    assert total("estimated") == 3  # exact outside Postgres
+
+    query = db.query(Location.id).filter(Location.project_id == project.id)
+    sql = str(paginators._Explain(query.statement).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT mon_loc.id")
+    assert "WHERE mon_loc.project_id = %(project_id_1)s" in sql
+
+
+def test_page_size_is_capped_and_cursors_are_checked(db):
+    _locations(db, ["a"])
+    with pytest.raises(HTTPException) as exc:
+        location_selectors.get_location_rows(db, PageParams(limit=10, cursor="bm90IGpzb24"))
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):  # a cursor of another keyset
+        location_selectors.get_location_rows(db, PageParams(limit=10, cursor=paginators.encode_cursor(["a"])))
+
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(response: Response, page: PageParams = Depends(page_params)):
+        result = paginators.Page([page.limit], "next", 42)
+        result.apply(response)
+        return result.items
+
+    client = TestClient(app)
+    max_size = get_settings().PAGE_SIZE_MAX
+    assert client.get("/items").json() == [get_settings().PAGE_SIZE_DEFAULT]
+    assert client.get("/items", params={"limit": max_size}).status_code == 200
+    assert client.get("/items", params={"limit": max_size + 1}).status_code == 422
+    assert client.get("/items", params={"count": "sometimes"}).status_code == 422
+    headers = client.get("/items").headers
+    assert (headers["X-Next-Cursor"], headers["X-Total-Count"]) == ("next", "42")
@@ -0,0 +1,84 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.project import tree
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class _FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class _FakeSession:
+    def __init__(self):
+        self.tree_queries = 0
+
+    def execute(self, stmt):
+        self.tree_queries += 1
+        return _FakeResult('{"id" : "p", "locations" : []}')
+
+
+def test_tree_is_one_statement_nested_to_the_requested_depth():
+    full = _sql(tree.tree_query(uuid.uuid4()))
+    assert full.count("json_agg(") == 4
+    assert full.count("SELECT") == 5
+    for order in ("mon_loc.loc_name", "mon_sources.source_name", "mon_sensors.sensor_name", "mon_sensor_fields.field_name"):
+        assert f"ORDER BY {order})" in full
+    assert "'folder_path', mon_sources.folder_path" in full
+    assert full.startswith("SELECT CAST(json_build_object(")
+
+    shallow = _sql(tree.tree_query(uuid.uuid4(), depth=2, minimal=True))
+    assert shallow.count("json_agg(") == 2
+    assert "mon_sensors" not in shallow
+    assert "folder_path" not in shallow
+    assert "'source_name', mon_sources.source_name" in shallow
+
+    assert "json_agg" not in _sql(tree.tree_query(uuid.uuid4(), depth=0))
+
+
+def test_version_covers_every_level_below_the_project():
+    sql = _sql(tree.version_query(uuid.uuid4()))
+    for table in ("mon_loc", "mon_sources", "mon_sensors"):
+        assert f"max({table}.last_updated)" in sql
+    assert sql.count("count(*)") == 4
+
+
+def test_cache_rebuilds_only_when_the_version_changes(monkeypatch):
+    versions = iter(["v1", "v1", "v2", None])
+    monkeypatch.setattr(tree, "tree_version", lambda db, project_id: next(versions))
+    cache = tree.ProjectTreeCache(max_entries=2)
+    db, project_id = _FakeSession(), uuid.uuid4()
+
+    assert cache.get(db, project_id) == ("v1", b'{"id" : "p", "locations" : []}')
+    assert cache.get(db, project_id)[0] == "v1"
+    assert db.tree_queries == 1
+    assert cache.get(db, project_id)[0] == "v2"
+    assert db.tree_queries == 2
+    assert cache.get(db, project_id) is None
+    assert len(cache) == 0
+
+
+def test_cache_keeps_only_the_most_recent_trees(monkeypatch):
+    monkeypatch.setattr(tree, "tree_version", lambda db, project_id: "v")
+    cache = tree.ProjectTreeCache(max_entries=2)
+    db = _FakeSession()
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    cache.get(db, first)
+    cache.get(db, second)
+    cache.get(db, first)  # hit: first becomes the most recent
+    cache.get(db, third)  # evicts second
+
+    assert db.tree_queries == 3
+    cache.get(db, first)
+    assert db.tree_queries == 3
+    cache.get(db, second)
+    assert db.tree_queries == 4
@@ -0,0 +1,75 @@
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.common.dependencies import get_db
+from app.search import selectors
+from app.search.apis import router
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_one_statement_with_an_indexed_branch_per_table():
+    stmt = selectors.search_query("pump_1", limit=5)
+    sql = _sql(stmt)
+    assert sql.count(" UNION ALL ") == 3
+    for table, column in (
+        ("projects", "project_name"),
+        ("projects", "project_number"),
+        ("mon_loc", "loc_name"),
+        ("mon_loc", "loc_number"),
+        ("mon_sources", "source_name"),
+        ("mon_sensors", "sensor_name"),
+    ):
+        assert f"{table}.{column} ILIKE '%%' || " in sql
+        assert f"{table}.{column} %% " in sql
+        assert f"similarity({table}.{column}, " in sql
+    assert sql.count("ORDER BY score DESC") == 4
+    assert "ORDER BY hits.score DESC, hits.name, hits.type" in sql
+
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert "pump/_1" in params.values()  # LIKE wildcards in the query are literal
+
+
+def test_types_select_the_branches():
+    sql = _sql(selectors.search_query("abc", types=["sensor", "source"]))
+    assert " UNION ALL " in sql
+    assert "FROM mon_sensors" in sql and "FROM mon_sources" in sql
+    assert "FROM projects" not in sql and "FROM mon_loc " not in sql
+
+
+class _FakeRow:
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class _FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return [_FakeRow(r) for r in self.rows]
+
+
+def test_endpoint_validates_and_returns_typed_hits():
+    hit = {"type": "sensor", "id": uuid.uuid4(), "name": "pump_1", "number": None, "parent_id": uuid.uuid4(), "score": 2.0}
+    db = _FakeSession([hit])
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    assert client.get("/search/", params={"q": "p"}).status_code == 422
+    assert client.get("/search/", params={"q": "pump", "types": "gateway"}).status_code == 422
+    assert db.statements == []
+
+    response = client.get("/search/", params={"q": "pump", "types": ["sensor"]})
+    assert response.status_code == 200
+    assert response.json() == [dict(hit, id=str(hit["id"]), parent_id=str(hit["parent_id"]))]
+    assert "FROM mon_sensors" in _sql(db.statements[0]) and "FROM projects" not in _sql(db.statements[0])
@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import DBBase
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.location.models import Location
+from app.project.models import Project
+from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.monitoring_sensor_data.models import MonitoringSensorData
+from app.monitoring_sensor_data.selectors import join_baselines, query_monitoring_sensor_data
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+        MonitoringSensorData.__table__,
+        MonitoringSensorBaseline.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+def test_relative_to_baseline_subtracts_the_baseline_in_effect(db):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=datetime.utcnow().date(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="s1", sensor_type="analog")
+    field = MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name="temp")
+    db.add_all([project, location, source, sensor, field])
+    db.add_all([
+        MonitoringSensorData(sensor_id=sensor.id, sensor_field_id=field.id, mon_loc_id=location.id,
+                             timestamp=datetime(2024, 1, day), data=10.0 + day)
+        for day in (1, 2, 3, 4)
+    ])
+    db.add_all([
+        # whole-sensor baseline from day 2, replaced by the field's own from day 3
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, baseline_value=2.0, recorded_at=datetime(2024, 1, 2)),
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=field.id,
+                                 baseline_value=10.0, recorded_at=datetime(2024, 1, 3)),
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=field.id,
+                                 baseline_value=99.0, recorded_at=datetime(2024, 1, 3), active=0),
+    ])
+    db.commit()
+
+    rows = query_monitoring_sensor_data(db, sensor_id=sensor.id, relative_to="baseline")
+
+    assert [r.data for r in rows] == [None, 10.0, 3.0, 4.0]
+
+
+def test_field_baselines_win_over_newer_sensor_baselines(db):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=datetime.utcnow().date(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="s1", sensor_type="analog")
+    own, other = (MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name=name) for name in ("a", "b"))
+    db.add_all([project, location, source, sensor, own, other])
+    db.add_all([
+        MonitoringSensorData(sensor_id=sensor.id, sensor_field_id=field.id, mon_loc_id=location.id,
+                             timestamp=datetime(2024, 1, day), data=100.0)
+        for field in (own, other) for day in (1, 2, 3, 4)
+    ])
+    db.add_all([
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=own.id,
+                                 baseline_value=10.0, recorded_at=datetime(2024, 1, 1)),
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, baseline_value=20.0, recorded_at=datetime(2024, 1, 2)),
+        MonitoringSensorBaseline(id=uuid.uuid4(), sensor_id=sensor.id, sensor_field_id=own.id,
+                                 baseline_value=30.0, recorded_at=datetime(2024, 1, 4)),
+    ])
+    db.commit()
+
+    rows = query_monitoring_sensor_data(db, sensor_id=sensor.id, relative_to="baseline", include_field_name=True)
+    by_field = {name: [r.data for r in rows if r.field_name == name] for name in ("a", "b")}
+
+    # the field's own baselines hold throughout; the other field falls back to the sensor's from day 2
+    assert by_field == {"a": [90.0, 90.0, 90.0, 70.0], "b": [None, 80.0, 80.0, 80.0]}
+
+
+def test_baselines_are_joined_not_looked_up_per_reading():
+    query, _ = join_baselines(TestingSessionLocal().query(MonitoringSensorData.data))
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("LEFT OUTER JOIN (SELECT") == 2
+    assert sql.count("lead(mon_sensor_baselines.recorded_at) OVER (PARTITION BY") == 2
+    assert "LIMIT" not in sql
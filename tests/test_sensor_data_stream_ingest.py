@@ -0,0 +1,371 @@
+import asyncio
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import kafka_producer
+from app.common.dependencies import get_db
+from app.config.database import DBBase
+from app.monitoring_group.models import MonitoringGroup
+from app.monitoring_sensor.models import MonitoringSensor
+from app.monitoring_sensor_fields.models import MonitoringSensorField
+from app.monitoring_source.models import Source
+from app.location.models import Location
+from app.project.models import Project
+from app.monitoring_sensor_data import services
+from app.monitoring_sensor_data.apis import router
+from app.monitoring_sensor_data.models import IngestIdempotencyKey, MonitoringSensorData
+from app.monitoring_sensor_alert import engine as alert_engine
+from app.monitoring_sensor_alert.models import MonitoringSensorAlert, MonitoringSensorAlertRule
+from app.monitoring_sensor_alert import rule_index as rule_index_module
+from app.monitoring_sensor_alert.rule_index import RuleIndex
+from app.monitoring_sensor_baseline.models import MonitoringSensorBaseline
+from app.outbox.models import OutboxEvent
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _register_sqlite_uuid(dbapi_connection, _):
+    dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid.uuid4()))
+
+
+@compiles(PGUUID, "sqlite")
+def _compile_pg_uuid(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_pg_jsonb(element, compiler, **kw):  # pragma: no cover
+    return "TEXT"
+
+
+@pytest.fixture()
+def db():
+    tables = [
+        Project.__table__,
+        Location.__table__,
+        Source.__table__,
+        MonitoringGroup.__table__,
+        MonitoringSensor.__table__,
+        MonitoringSensorField.__table__,
+        MonitoringSensorData.__table__,
+        IngestIdempotencyKey.__table__,
+        MonitoringSensorAlertRule.__table__,
+        MonitoringSensorAlert.__table__,
+        MonitoringSensorBaseline.__table__,
+        OutboxEvent.__table__,
+    ]
+    removed_defaults = []
+    for table in tables:
+        for column in table.columns:
+            default = getattr(column, "server_default", None)
+            if default is None:
+                continue
+            default_text = str(getattr(default, "arg", default))
+            if "gen_random_uuid" in default_text:
+                removed_defaults.append((column, default))
+                column.server_default = None
+    DBBase.metadata.create_all(bind=engine, tables=tables)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        DBBase.metadata.drop_all(bind=engine, tables=tables)
+        for column, default in removed_defaults:
+            column.server_default = default
+
+
+@pytest.fixture()
+def produced(monkeypatch):
+    sent = []
+    monkeypatch.setattr(services, "send_kafka_message", lambda topic, key, value: sent.append((topic, key, value)))
+    return sent
+
+
+def _setup(db):
+    project = Project(id=uuid.uuid4(), project_name="P", start_date=datetime.utcnow().date(), status="active")
+    location = Location(id=uuid.uuid4(), project_id=project.id, loc_name="L", lat=0.0, lon=0.0, frequency="daily")
+    source = Source(id=uuid.uuid4(), mon_loc_id=location.id, source_name="S", folder_path="fp", file_keyword="kw", file_type="csv")
+    sensor = MonitoringSensor(id=uuid.uuid4(), mon_source_id=source.id, sensor_name="s1", sensor_type="analog")
+    field = MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name="temp")
+    db.add_all([project, location, source, sensor, field])
+    db.commit()
+    return location, source, sensor, field
+
+
+def _line(location, source, sensor_id, field_id):
+    return json.dumps({
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "source_id": str(source.id),
+        "mon_loc_id": str(location.id),
+        "sensor_type": "analog",
+        "sensors": [{"sensor_id": str(sensor_id), "data": [{"field_id": str(field_id), "value": 1.5}]}],
+    }).encode()
+
+
+async def _collect(chunks):
+    async def gen():
+        for chunk in chunks:
+            yield chunk
+    return [line async for line in services.iter_ndjson_lines(gen())]
+
+
+def test_iter_ndjson_lines_handles_split_chunks():
+    lines = asyncio.run(_collect([b'{"a":', b' 1}\n\n{"b"', b": 2}\n", b'{"c": 3}']))
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+
+def test_iter_ndjson_lines_rejects_overlong_lines():
+    async def collect(chunks):
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+        return [line async for line in services.iter_ndjson_lines(gen(), max_line_bytes=8)]
+
+    assert asyncio.run(collect([b"1234", b"5678\n12345678"])) == [b"12345678", b"12345678"]
+    with pytest.raises(services.LineTooLongError):
+        asyncio.run(collect([b"12345", b"6789"]))  # no newline yet, already too long
+    with pytest.raises(services.LineTooLongError):
+        asyncio.run(collect([b"123456789\n"]))
+
+
+def test_stream_response_keeps_totals_and_only_the_batches_with_rejections(db, produced):
+    location, source, sensor, field = _setup(db)
+    good = _line(location, source, sensor.id, field.id)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    body = b"\n".join([good] * 4 + [b"not json"] + [good] * 3)
+    response = client.post("/monitoring-sensor-data/stream-from-source?batch_size=2", content=body)
+
+    assert response.status_code == 201
+    result = response.json()
+    assert (result["lines"], result["accepted"], result["rejected"], result["batch_count"]) == (8, 7, 1, 4)
+    assert [b["batch"] for b in result["batches"]] == [2]
+
+    too_long = b"x" * (services.MAX_NDJSON_LINE + 1)
+    assert client.post("/monitoring-sensor-data/stream-from-source", content=too_long).status_code == 413
+
+
+def test_stream_answers_503_and_keeps_no_key_when_kafka_cannot_take_a_batch(db, monkeypatch):
+    location, source, sensor, field = _setup(db)
+
+    def unavailable(topic, key, value):
+        raise kafka_producer.KafkaUnavailableError("Kafka is unavailable and Kafka spool is full")
+
+    monkeypatch.setattr(services, "send_kafka_message", unavailable)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    response = client.post(
+        "/monitoring-sensor-data/stream-from-source",
+        content=_line(location, source, sensor.id, field.id),
+        headers={"Idempotency-Key": "upload-1"},
+    )
+
+    assert response.status_code == 503
+    assert db.query(IngestIdempotencyKey).count() == 0
+
+
+def test_batch_counts_accepted_and_rejected(db, produced):
+    location, source, sensor, field = _setup(db)
+    lines = [
+        _line(location, source, sensor.id, field.id),
+        _line(location, source, uuid.uuid4(), field.id),
+        b"not json",
+    ]
+
+    result = services.ingest_sensor_data_batch(db, 0, lines)
+
+    assert (result.lines, result.accepted, result.rejected) == (3, 1, 2)
+    readings = [p for p in produced if p[0] == services.KAFKA_TOPIC]
+    assert len(readings) == 1
+    assert readings[0][1] == str(sensor.id)
+    dead = [p[2] for p in produced if p[0] == services.KAFKA_DLQ_TOPIC]
+    assert len(dead) == 2
+    assert all(d["reason"] for d in dead)
+
+
+def test_batch_with_idempotency_key_is_produced_once(db, produced):
+    location, source, sensor, field = _setup(db)
+    lines = [_line(location, source, sensor.id, field.id)]
+
+    first = services.ingest_sensor_data_batch(db, 0, lines, "upload-1:0")
+    retry = services.ingest_sensor_data_batch(db, 0, lines, "upload-1:0")
+
+    assert retry == first
+    assert len(produced) == 1
+
+
+def test_bulk_request_accepts_valid_readings_and_dead_letters_the_rest(db, produced):
+    location, source, sensor, field = _setup(db)
+    good = json.loads(_line(location, source, sensor.id, field.id))
+    bad = json.loads(_line(location, source, sensor.id, uuid.uuid4()))
+    good["sensors"].append(bad["sensors"][0])
+    request = services.schemas.MonitoringSensorDataBulkRequest(items=[good, bad])
+
+    result = services.create_bulk_sensor_data_from_source(db, request)
+
+    assert (result["status"], result["records_enqueued"], result["records_rejected"]) == ("partial", 1, 2)
+    assert [(i["accepted"], i["rejected"]) for i in result["items"]] == [(1, 1), (0, 1)]
+    assert [p[0] for p in produced].count(services.KAFKA_DLQ_TOPIC) == 2
+
+
+def test_redelivered_messages_upsert_on_field_and_timestamp(db, produced):
+    location, source, sensor, field = _setup(db)
+    row = {
+        "mon_loc_id": location.id,
+        "sensor_id": sensor.id,
+        "sensor_field_id": field.id,
+        "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "data": 1.5,
+    }
+
+    services.upsert_sensor_data(db, [row, row])
+    services.upsert_sensor_data(db, [dict(row, data=2.5)])
+    db.commit()
+
+    rows = db.query(MonitoringSensorData).all()
+    assert [row.data for row in rows] == [2.5]
+
+
+def test_upserted_readings_are_checked_against_alert_rules(db, produced, monkeypatch):
+    monkeypatch.setattr(alert_engine, "rule_index", RuleIndex())
+    location, source, sensor, field = _setup(db)
+    db.add(MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="threshold", upper=2.0))
+    db.commit()
+    row = {
+        "mon_loc_id": location.id,
+        "sensor_id": sensor.id,
+        "sensor_field_id": field.id,
+        "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "data": 5.0,
+    }
+
+    services.upsert_sensor_data(db, [row])
+    services.upsert_sensor_data(db, [row])  # re-delivery does not alert again
+    db.commit()
+
+    alerts = db.query(MonitoringSensorAlert).all()
+    assert [(a.sensor_id, a.alert_type) for a in alerts] == [(sensor.id, "threshold")]
+    assert db.query(OutboxEvent).count() == 1
+
+
+def test_rule_index_follows_rule_changes(db):
+    location, source, sensor, field = _setup(db)
+    rule = MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="threshold", upper=2.0)
+    db.add(rule)
+    db.commit()
+    index = RuleIndex()
+
+    index.refresh(db)
+    assert index.lookup(field.id).upper.tolist() == [2.0]
+
+    rule.upper = 3.0
+    db.add(MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="rate_of_change", lower=-1.0))
+    db.commit()
+    index.refresh(db, force=True)
+    assert sorted(index.lookup(field.id).upper.tolist()) == [3.0, float("inf")]
+
+    db.delete(rule)
+    db.commit()
+    index.refresh(db, force=True)
+    assert index.lookup(field.id).kinds.tolist() == [2]
+
+
+def test_rule_index_readers_see_the_old_rules_while_a_reload_runs(db, monkeypatch):
+    location, source, sensor, field = _setup(db)
+    other = MonitoringSensorField(id=uuid.uuid4(), sensor_id=sensor.id, field_name="other")
+    doomed = MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=other.id, rule_type="threshold", upper=1.0)
+    db.add_all([other, doomed, MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="threshold", upper=2.0)])
+    db.commit()
+    index = RuleIndex()
+    index.refresh(db)
+    db.delete(doomed)  # a deletion forces a full reload
+    db.commit()
+
+    compiling, release = threading.Event(), threading.Event()
+    compile_field = rule_index_module.compile_field
+    calls = []
+
+    def slow_compile(rows):
+        calls.append(rows)
+        if len(calls) > 1:  # the incremental pass compiles first, then the full reload
+            compiling.set()
+            release.wait(5)
+        return compile_field(rows)
+
+    monkeypatch.setattr(rule_index_module, "compile_field", slow_compile)
+    refresh = threading.Thread(target=index.refresh, args=(db,), kwargs={"force": True})
+    refresh.start()
+    try:
+        assert compiling.wait(5)
+        assert index.lookup(field.id).upper.tolist() == [2.0]
+    finally:
+        release.set()
+        refresh.join(5)
+    assert index.lookup(field.id).upper.tolist() == [2.0]
+    assert index.lookup(other.id) is None
+
+
+def _series(location, sensor, field, minutes, values):
+    times = np.array([datetime(2024, 1, 1) + timedelta(minutes=m) for m in minutes], dtype="datetime64[us]")
+    return (location.id, sensor.id, field.id, times, np.array(values, dtype=float))
+
+
+def test_series_of_one_field_are_evaluated_as_one(db, monkeypatch):
+    monkeypatch.setattr(alert_engine, "rule_index", RuleIndex())
+    location, source, sensor, field = _setup(db)
+    rule = MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="threshold", upper=2.0)
+    db.add(rule)
+    db.commit()
+
+    # two files of one COPY batch, the later one first; both readings belong to one alarm
+    alert_engine.evaluate_series(db, [
+        _series(location, sensor, field, [1], [6.0]),
+        _series(location, sensor, field, [0], [5.0]),
+    ])
+    db.commit()
+
+    alert = db.query(MonitoringSensorAlert).one()
+    assert (alert.occurrences, alert.triggered_at.replace(tzinfo=None)) == (1, datetime(2024, 1, 1))
+    db.refresh(rule)
+    assert (rule.in_alarm, rule.last_value) == (True, 6.0)
+    assert rule.last_timestamp.replace(tzinfo=None) == datetime(2024, 1, 1, 0, 1)
+
+
+def test_alarm_clearing_through_hysteresis_resolves_the_alert(db, monkeypatch):
+    monkeypatch.setattr(alert_engine, "rule_index", RuleIndex())
+    location, source, sensor, field = _setup(db)
+    db.add(MonitoringSensorAlertRule(id=uuid.uuid4(), sensor_field_id=field.id, rule_type="threshold", upper=2.0, hysteresis=0.5))
+    db.commit()
+
+    alert_engine.evaluate_series(db, [_series(location, sensor, field, [0], [5.0])])
+    alert_engine.evaluate_series(db, [_series(location, sensor, field, [1, 2], [1.8, 1.0])])  # 1.8 is inside the margin
+    alert_engine.evaluate_series(db, [_series(location, sensor, field, [3, 4, 5], [5.0, 1.0, 5.0])])
+    db.commit()
+
+    alerts = db.query(MonitoringSensorAlert).order_by(MonitoringSensorAlert.first_seen).all()
+    assert [a.active for a in alerts] == [0, 0, 1]
+    assert [a.resolved_at and a.resolved_at.replace(tzinfo=None) for a in alerts] == [
+        datetime(2024, 1, 1, 0, 2), datetime(2024, 1, 1, 0, 4), None,
+    ]
@@ -0,0 +1,44 @@
+import io
+
+import numpy as np
+import pytest
+
+from app.source_ingestion.parsers import get_parser
+
+TOA5 = (
+    b'"TOA5","CR1000X","CR1000X","1234","CR1000X.Std.05","CPU:prog.CR1X","1","Table1"\r\n'
+    b'"TIMESTAMP","RECORD","P1_temp","P2"\r\n'
+    b'"TS","RN","C","mm"\r\n'
+    b'"","","Smp","Smp"\r\n'
+    b'"2024-01-01 00:00:00",0,1.5,"NAN"\r\n'
+    b'"2024-01-01 00:10:00",1,2.5,7\r\n'
+)
+
+
+def test_csv_parser_returns_columnar_arrays():
+    data = b"time,a_x,b_y\n2024-01-01T00:00:00,1,\n2024-01-01T01:00:00,2,3.5\n"
+    parsed = get_parser("csv").parse(io.BytesIO(data), {})
+
+    assert len(parsed) == 2
+    assert parsed.timestamps.dtype == np.dtype("datetime64[us]")
+    assert parsed.columns["a_x"].tolist() == [1.0, 2.0]
+    assert np.isnan(parsed.columns["b_y"][0])
+
+
+def test_csv_parser_detects_toa5_header():
+    parsed = get_parser("csv").parse(io.BytesIO(TOA5), {})
+
+    assert set(parsed.columns) == {"RECORD", "P1_temp", "P2"}
+    assert parsed.timestamps[1] == np.datetime64("2024-01-01T00:10:00")
+    assert np.isnan(parsed.columns["P2"][0])
+
+
+def test_utc_offset_is_applied():
+    parsed = get_parser("toa5").parse(io.BytesIO(TOA5), {"utc_offset_minutes": -300})
+
+    assert parsed.timestamps[0] == np.datetime64("2024-01-01T05:00:00")
+
+
+def test_unknown_file_type_raises():
+    with pytest.raises(ValueError):
+        get_parser("xlsx")
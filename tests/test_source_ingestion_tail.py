@@ -0,0 +1,131 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.source_ingestion.models import SourceFileCheckpoint
+from app.source_ingestion.parsers import get_parser
+from app.source_ingestion.services import map_in_order, parse_file_job
+from app.source_ingestion.tail import TailState, is_unchanged, read_file_tail
+
+HEADER = b"time,a\n"
+
+
+def _checkpoint(tail, path):
+    return SourceFileCheckpoint(
+        file_path=str(path), inode=tail.inode, size=tail.size, byte_offset=tail.byte_offset, tail_anchor=tail.anchor,
+    )
+
+
+def test_only_appended_rows_are_read(tmp_path):
+    path = tmp_path / "logger.csv"
+    path.write_bytes(HEADER + b"2024-01-01T00:00:00,1\n2024-01-01T00:10:00,2\n")
+    parser = get_parser("csv")
+
+    first = read_file_tail(str(path), parser, {})
+    assert first.parsed.columns["a"].tolist() == [1.0, 2.0]
+    checkpoint = _checkpoint(first, path)
+    assert is_unchanged(str(path), checkpoint)
+
+    with open(path, "ab") as f:
+        f.write(b"2024-01-01T00:20:00,3\n2024-01-01T00:30:00,")  # last row still being written
+    second = read_file_tail(str(path), parser, {}, checkpoint)
+
+    assert second.parsed.columns["a"].tolist() == [3.0]
+    assert not second.reset
+    assert second.byte_offset < os.path.getsize(path)
+    assert is_unchanged(str(path), _checkpoint(second, path))  # the partial row is not re-read until it grows
+
+
+def test_truncated_file_is_read_from_the_start(tmp_path):
+    path = tmp_path / "logger.csv"
+    path.write_bytes(HEADER + b"2024-01-01T00:00:00,1\n2024-01-01T00:10:00,2\n")
+    parser = get_parser("csv")
+    checkpoint = _checkpoint(read_file_tail(str(path), parser, {}), path)
+
+    path.write_bytes(HEADER + b"2024-01-02T00:00:00,9\n")
+    tail = read_file_tail(str(path), parser, {}, checkpoint)
+
+    assert tail.reset
+    assert tail.parsed.columns["a"].tolist() == [9.0]
+
+
+def test_copytruncated_file_grown_past_the_offset_is_read_from_the_start(tmp_path):
+    path = tmp_path / "logger.csv"
+    path.write_bytes(HEADER + b"2024-01-01T00:00:00,1\n")
+    parser = get_parser("csv")
+    checkpoint = _checkpoint(read_file_tail(str(path), parser, {}), path)
+
+    with open(path, "r+b") as f:  # copytruncate keeps the inode
+        f.truncate(0)
+        f.write(HEADER + b"2024-01-02T00:00:00,7\n2024-01-02T00:10:00,8\n")
+    tail = read_file_tail(str(path), parser, {}, checkpoint)
+
+    assert tail.reset
+    assert tail.parsed.columns["a"].tolist() == [7.0, 8.0]
+
+
+def test_large_tails_are_read_in_bounded_chunks(tmp_path):
+    path = tmp_path / "logger.csv"
+    rows = [b"2024-01-01T00:%02d:00,%d\n" % (i, i) for i in range(10)]
+    path.write_bytes(HEADER + b"".join(rows))
+    parser = get_parser("csv")
+
+    values, state, reads = [], None, 0
+    while True:
+        tail = read_file_tail(str(path), parser, {}, state, max_bytes=len(rows[0]) * 3 + 5)
+        values += tail.parsed.columns["a"].tolist()
+        state, reads = TailState(tail.inode, tail.byte_offset, tail.size, tail.anchor), reads + 1
+        if not tail.more:
+            break
+
+    assert values == [float(i) for i in range(10)]
+    assert reads == 4
+    assert is_unchanged(str(path), state)
+
+    single = read_file_tail(str(path), parser, {}, max_bytes=4)  # a row longer than the limit is read whole
+    assert single.parsed.columns["a"].tolist() == [0.0]
+    assert single.more
+
+
+def test_parse_file_job_resumes_from_tail_state(tmp_path):
+    path = tmp_path / "logger.csv"
+    path.write_bytes(HEADER + b"2024-01-01T00:00:00,1\n")
+    first, error = parse_file_job((str(path), "csv", {}, None, None))
+    assert error is None
+
+    with open(path, "ab") as f:
+        f.write(b"2024-01-01T00:10:00,2\n")
+    state = TailState(inode=first.inode, byte_offset=first.byte_offset, size=first.size, tail_anchor=first.anchor)
+    second, error = parse_file_job((str(path), "csv", {}, state, None))
+
+    assert error is None
+    assert second.parsed.columns["a"].tolist() == [2.0]
+
+
+def test_parse_file_job_returns_errors(tmp_path):
+    tail, error = parse_file_job((str(tmp_path / "missing.csv"), "csv", {}, None, None))
+
+    assert tail is None
+    assert error
+
+
+def test_map_in_order_keeps_a_bounded_number_of_files_in_flight():
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def job(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        return i * i
+
+    def consume(results):
+        for result in results:
+            with lock:
+                running[0] -= 1
+            yield result
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        squares = list(consume(map_in_order(pool, job, iter(range(20)), in_flight=3)))
+
+    assert squares == [i * i for i in range(20)]
+    assert peak[0] <= 3